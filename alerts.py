@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import crime_data
+
+# 지역별 경보 단계 전환 감지 (예측 위험률, 지표 위험 점수)
+# - 단계마다 진입 기준과 그보다 낮은 해제 기준(히스테리시스)을 두어 기준값 근처의 잦은 전환을 막는다
+# - 데이터셋별로 처리한 행 수와 지역별 현재 단계를 상태 파일에 저장해 다음 실행은 추가된 행만 본다
+# - 전환 이벤트는 JSON Lines 파일에 한 줄씩 추가
+ALERT_DIR = "./data/alerts"
+HISTORY_LIMIT = 200
+
+# (단계 이름, 진입 기준, 해제 기준) — 낮은 단계부터
+PROBABILITY_LEVELS = [('경보', 0.7, 0.65), ('위험', 0.85, 0.8)]
+SCORE_LEVELS = [('점수 3', 3, 2)]
+SOURCE_LABELS = {'prediction': '예측 위험률', 'indicator': '위험 점수'}
+EVENT_COLUMNS = ['detected_at', 'date', 'region', 'source', 'level', 'direction', 'value']
+
+
+def hysteresis_levels(values, levels, start=0):
+    # 시계열 값 -> 단계(0=정상, 1.., len(levels)) 배열. 진입/해제 기준 사이에서는 직전 상태 유지
+    values = np.asarray(values, dtype=float)
+    result = np.zeros(len(values), dtype=np.int64)
+    for k, (_, enter, leave) in enumerate(levels, start=1):
+        state = np.where(values >= enter, 1.0, np.where(values < leave, 0.0, np.nan))
+        state = pd.Series(state).ffill().fillna(1.0 if start >= k else 0.0).to_numpy()
+        result += state.astype(np.int64)
+    return result
+
+
+def region_series(dataset, rows):
+    # 데이터셋 새 행 -> {지역: (날짜 배열, 값 배열)} (날짜순)
+    series = {}
+    if dataset == 'prediction':
+        rows = rows.sort_values('date', kind='stable')
+        for region, group in rows.groupby('도단위', sort=False):
+            series[region] = (group['date'].to_numpy(), group['crime_probability'].to_numpy(dtype=float))
+    else:
+        rows = rows.sort_values('date', kind='stable')
+        for region in crime_data.REGIONS:
+            climate, social, financial = crime_data.risk_flags(rows, region)
+            series[region] = (rows['date'].to_numpy(), (climate + social + financial).to_numpy())
+    return series
+
+
+def transitions(dataset, rows, current):
+    # 새 행에서 생긴 단계 전환 이벤트와 지역별 마지막 단계
+    levels = PROBABILITY_LEVELS if dataset == 'prediction' else SCORE_LEVELS
+    detected_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    events, last = [], {}
+    for region, (dates, values) in region_series(dataset, rows).items():
+        start = current.get(region, 0)
+        steps = hysteresis_levels(values, levels, start)
+        previous = np.concatenate([[start], steps[:-1]])
+        for i in np.flatnonzero(steps != previous):
+            new, old = int(steps[i]), int(previous[i])
+            events.append({
+                'detected_at': detected_at,
+                'date': pd.Timestamp(dates[i]).strftime('%Y-%m-%d'),
+                'region': region,
+                'source': dataset,
+                'level': levels[max(new, old) - 1][0],
+                'direction': '진입' if new > old else '해제',
+                'value': round(float(values[i]), 3),
+            })
+        if len(steps):
+            last[region] = int(steps[-1])
+    events.sort(key=lambda event: event['date'])
+    return events, last
+
+
+class AlertEngine:
+    # 프로세스 하나에 하나 (Streamlit에서는 st.cache_resource로 공유). 스레드 안전
+    def __init__(self, directory=ALERT_DIR):
+        self.log_path = os.path.join(directory, 'alerts.jsonl')
+        self.state_path = os.path.join(directory, 'state.json')
+        self.lock = threading.Lock()
+        self.state = {'rows': {}, 'levels': {}}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        temp = self.state_path + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(temp, self.state_path)
+
+    def _write_events(self, events):
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+    def evaluate(self, frames):
+        # frames: {'prediction': df, 'indicator': df} (추가만 되는 프레임). 지난 실행 이후 행만 평가
+        # 프레임이 줄었으면(파일 교체) 처음부터 다시 보되 지역별 단계는 이어 간다. 반환: 새 이벤트 목록
+        with self.lock:
+            new_events = []
+            changed = False
+            for dataset in ('prediction', 'indicator'):
+                frame = frames.get(dataset)
+                if frame is None:
+                    continue
+                seen = self.state['rows'].get(dataset, 0)
+                if len(frame) < seen:
+                    seen = 0
+                if len(frame) == seen:
+                    continue
+                current = self.state['levels'].setdefault(dataset, {})
+                events, last = transitions(dataset, frame.iloc[seen:], current)
+                current.update(last)
+                self.state['rows'][dataset] = len(frame)
+                new_events += events
+                changed = True
+            if new_events:
+                self._write_events(new_events)
+            if changed:
+                self._save_state()
+            return new_events
+
+    def recent(self, limit=20):
+        # 로그 파일 끝에서 최근 이벤트 limit개 (데이터 날짜 최신순)
+        if not os.path.exists(self.log_path):
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+        with open(self.log_path, encoding='utf-8') as f:
+            lines = deque(f, maxlen=HISTORY_LIMIT)
+        events = pd.DataFrame([json.loads(line) for line in lines if line.strip()], columns=EVENT_COLUMNS)
+        return events.sort_values(['date', 'detected_at'], ascending=False, kind='stable').head(limit).reset_index(drop=True)
+
+    def active(self):
+        # 현재 경보 단계 이상인 지역 [(데이터셋, 지역, 단계 이름)]
+        with self.lock:
+            result = []
+            for dataset, current in self.state['levels'].items():
+                levels = PROBABILITY_LEVELS if dataset == 'prediction' else SCORE_LEVELS
+                result += [(dataset, region, levels[level - 1][0]) for region, level in sorted(current.items()) if level]
+            return result
+
+
+def format_event(event):
+    return (f"{event['date']} {event['region']} {SOURCE_LABELS[event['source']]} {event['level']} {event['direction']}"
+            f" ({event['value']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="예측/지표 파일의 새 행을 평가해 경보 단계 전환을 기록")
+    parser.add_argument('--prediction-path', default=crime_data.PREDICTION_PATH)
+    parser.add_argument('--indicator-path', default=crime_data.INDICATOR_PATH)
+    parser.add_argument('--alert-dir', default=ALERT_DIR)
+    args = parser.parse_args()
+
+    engine = AlertEngine(args.alert_dir)
+    frames = {'prediction': crime_data.read_prediction(args.prediction_path),
+              'indicator': crime_data.read_indicator(args.indicator_path)}
+    for event in engine.evaluate(frames):
+        print(format_event(event))
@@ -0,0 +1,376 @@
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+import crime_data
+import ingest
+import range_sums
+
+# 읽기 전용 조회 API: 대시보드와 같은 지역별 위험 점수/crime_probability를 JSON으로 제공
+#   GET /api/regions
+#   GET /api/version
+#   GET /api/risk?year=2023 | date=2023-05-01 | start=2023-06-01&end=2023-08-31 [&region=서울특별시]
+#   GET /api/predictions?year=2025 | date=2025-01-01 | start=...&end=... [&region=...]
+#   GET /api/predictions/series?region=서울특별시[&start=...&end=...]
+
+
+class DataStore:
+    def __init__(self, crime_path, indicator_path, prediction_path, reload_interval=5.0):
+        self.paths = (crime_path, indicator_path, prediction_path)
+        self.reload_interval = reload_interval
+        self.lock = threading.Lock()
+        self.checked_at = 0.0
+        self.version = None
+        # API는 지표/예측만 제공하므로 사건 데이터는 읽지 않음
+        self.incremental = ingest.IncrementalStore(*self.paths, load=False)
+        self.incremental.activate(['indicator', 'prediction'])
+        self.load()
+
+    def load(self):
+        # 추가된 행만 읽어 갱신 (파일이 줄어들면 처음부터 다시 읽음)
+        self.incremental.refresh()
+        _, _, df_indicator, _, df_prediction, _ = self.incremental.data()
+        self.df_indicator = df_indicator
+        self.df_prediction = df_prediction.sort_values(['도단위', 'date'])
+        # 기간(start~end) 질의는 누적합 두 번 조회로 (프레임을 다시 거르지 않음)
+        self.sums = range_sums.RangeSums(df_indicator, df_prediction)
+        self.version = crime_data.data_version(*self.paths)
+
+    def current_version(self):
+        # 파일이 바뀌면 다시 로드 (reload_interval 초에 한 번만 확인)
+        now = time.monotonic()
+        if now - self.checked_at < self.reload_interval:
+            return self.version
+        with self.lock:
+            if now - self.checked_at >= self.reload_interval:
+                self.checked_at = now
+                if crime_data.data_version(*self.paths) != self.version:
+                    self.load()
+        return self.version
+
+
+class ResponseCache:
+    # (버전, 경로, 쿼리) -> (본문, gzip 본문, ETag) LRU 캐시
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class BadRequest(Exception):
+    pass
+
+
+# 받을 수 있는 날짜 범위: pandas 나노초 Timestamp 범위 안 (end + 1일 계산이 넘치지 않도록 하루 여유)
+MIN_DATE = pd.Timestamp.min.ceil('D')
+MAX_DATE = pd.Timestamp.max.floor('D') - pd.Timedelta(days=1)
+
+
+def parse_date(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        date = pd.Timestamp(value)
+    except (ValueError, OverflowError, pd.errors.OutOfBoundsDatetime):
+        raise BadRequest(f"잘못된 날짜: {name}={value}")
+    if pd.isna(date):  # 'nat', 'NaT' 등은 예외 없이 NaT가 됨
+        raise BadRequest(f"잘못된 날짜: {name}={value}")
+    # '0001-01-01', '9999-12-31'도 초 단위 Timestamp로 파싱되므로 범위를 따로 확인
+    if not MIN_DATE <= date <= MAX_DATE:
+        raise BadRequest(f"날짜 범위 밖: {name}={value} ({MIN_DATE:%Y-%m-%d} ~ {MAX_DATE:%Y-%m-%d})")
+    return date.normalize().as_unit('ns')
+
+
+def parse_range(params):
+    start, end = parse_date(params, 'start'), parse_date(params, 'end')
+    if start is not None and end is not None and start > end:
+        raise BadRequest(f"start가 end보다 늦음: start={params['start']}, end={params['end']}")
+    return start, end
+
+
+def parse_year(params):
+    value = params.get('year')
+    if value is None:
+        return None
+    if not (value.isascii() and value.isdigit()):  # '²' 같은 유니코드 숫자는 int()가 거부
+        raise BadRequest(f"잘못된 년도: year={value}")
+    return int(value)
+
+
+def parse_region(params):
+    region = params.get('region')
+    if region is not None and region not in crime_data.REGIONS:
+        raise BadRequest(f"알 수 없는 지역: {region}")
+    return region
+
+
+def period_query(params):
+    year, date = parse_year(params), parse_date(params, 'date')
+    start, end = parse_range(params)
+    if date is not None:
+        mode = "일별"
+    elif start is not None or end is not None:
+        mode = "기간별"
+    elif year is not None:
+        mode = "년도별"
+    else:
+        mode = "전체 데이터"
+    return {'mode': mode, 'year': year, 'date': date, 'start': start, 'end': end}
+
+
+def period_json(query):
+    return {
+        'mode': query['mode'],
+        'year': query['year'],
+        'date': query['date'].strftime('%Y-%m-%d') if query['date'] is not None else None,
+        'start': query['start'].strftime('%Y-%m-%d') if query['start'] is not None else None,
+        'end': query['end'].strftime('%Y-%m-%d') if query['end'] is not None else None,
+    }
+
+
+def risk_payload(store, params):
+    query = period_query(params)
+    region = parse_region(params)
+    if query['mode'] == "기간별":
+        table = store.sums.risk_table(query['start'], query['end'])
+    else:
+        table = crime_data.create_risk_score_table(store.df_indicator, query['mode'], query['year'], query['date'], query['start'], query['end'])
+    if region is not None:
+        table = table[table['지역'] == region]
+    rows = [{
+        'region': row['지역'],
+        'climate_score': row['기후스트레스 점수'],
+        'social_score': row['사회스트레스 점수'],
+        'financial_score': row['금융스트레스 점수'],
+        'total_score': row['총 점수'],
+    } for row in table.to_dict('records')]
+    return {'period': period_json(query), 'rows': rows}
+
+
+def prediction_payload(store, params):
+    query = period_query(params)
+    region = parse_region(params)
+    prediction_mode = "년도별" if query['mode'] == "전체 데이터" else query['mode']
+    if prediction_mode == "기간별":
+        probabilities = store.sums.probabilities(query['start'], query['end'])
+    else:
+        probabilities = crime_data.region_probabilities(store.df_prediction, query['year'], query['date'], prediction_mode, query['start'], query['end'])
+    rows = [{'region': name, 'crime_probability': prob, 'color': crime_data.get_prediction_color(prob)}
+            for name, prob in probabilities.items() if region is None or name == region]
+    return {'period': period_json(query), 'rows': rows}
+
+
+def prediction_series_payload(store, params):
+    region = parse_region(params)
+    if region is None:
+        raise BadRequest("region 파라미터가 필요합니다")
+    start, end = parse_range(params)
+    data = store.df_prediction[store.df_prediction['도단위'] == region]
+    data = crime_data.filter_period(data, start=start, end=end)
+    columns = [col for col in ['crime_probability', 'crime_predicted', 'risk_level', 'crime_occurred', 'crime_count'] if col in data.columns]
+    series = data[['date'] + columns].copy()
+    series['date'] = series['date'].dt.strftime('%Y-%m-%d')
+    return {'region': region, 'rows': series.astype(object).where(series.notna(), None).to_dict('records')}
+
+
+ROUTES = {
+    '/api/regions': lambda store, params: {'regions': crime_data.REGIONS},
+    '/api/version': lambda store, params: {'version': store.version},
+    '/api/risk': risk_payload,
+    '/api/predictions': prediction_payload,
+    '/api/predictions/series': prediction_series_payload,
+}
+
+
+def encode(payload, status=200):
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    etag = hashlib.sha1(body).hexdigest()[:20]
+    compressed = gzip.compress(body, compresslevel=6) if len(body) >= 512 else None
+    return status, body, compressed, etag
+
+
+def accepts_gzip(header):
+    # Accept-Encoding의 q 값 반영: 'gzip;q=0'은 거부, gzip이 없으면 '*'의 q 값을 따름
+    weights = {}
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    return weights.get('gzip', weights.get('x-gzip', weights.get('*', 0.0))) > 0
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store = None
+    cache = None
+    quiet = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        try:
+            params = {key: values[-1] for key, values in parse_qs(url.query, encoding='utf-8', errors='strict').items()}
+        except UnicodeDecodeError:
+            self.respond(encode({'error': "쿼리는 UTF-8 퍼센트 인코딩이어야 합니다"}, status=400))
+            return
+        route = ROUTES.get(url.path.rstrip('/') or '/')
+        if route is None:
+            self.respond(encode({'error': f"없는 경로: {url.path}"}, status=404))
+            return
+
+        version = self.store.current_version()
+        key = (version, url.path, tuple(sorted(params.items())))
+        entry = self.cache.get(key)
+        if entry is None:
+            try:
+                entry = encode(route(self.store, params))
+            except BadRequest as e:
+                self.respond(encode({'error': str(e)}, status=400))
+                return
+            except Exception:
+                # 처리기 버그로 연결이 끊기지 않도록 500 응답 (캐시하지 않음)
+                logging.exception("요청 처리 실패: %s", self.path)
+                self.respond(encode({'error': "서버 내부 오류"}, status=500))
+                return
+            self.cache.put(key, entry)
+        self.respond(entry)
+
+    def respond(self, entry):
+        status, body, compressed, etag = entry
+        use_gzip = compressed is not None and accepts_gzip(self.headers.get('Accept-Encoding', ''))
+        etag = f'"{etag}-gz"' if use_gzip else f'"{etag}"'
+
+        if status == 200 and etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        payload = compressed if use_gzip else body
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if status == 200:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host, port, store, quiet=True):
+    handler = type('Handler', (QueryHandler,), {'store': store, 'cache': ResponseCache(), 'quiet': quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+# 회귀 확인용 요청과 기대 상태 코드 (잘못된 입력은 연결이 끊기지 않고 400이어야 함)
+CHECK_QUERIES = [
+    ('/api/regions', 200),
+    ('/api/risk?year=2023', 200),
+    ('/api/risk?start=2023-06-01&end=2023-08-31', 200),
+    ('/api/predictions/series?region=서울특별시&start=2025-01-01', 200),
+    ('/api/risk?date=nat', 400),
+    ('/api/risk?start=2023-08-31&end=2023-06-01', 400),
+    ('/api/risk?start=0001-01-01&end=9999-12-31', 400),
+    ('/api/predictions/series?region=서울특별시&end=9999-12-31', 400),
+    ('/api/risk?year=²', 400),
+    ('/api/risk?start=1677-09-22&end=2262-04-10', 200),
+    ('/api/predictions/series?region=서울특별시&end=2262-04-10', 200),
+]
+
+
+def check(store):
+    # 임시 포트에 서버를 띄워 CHECK_QUERIES를 보내고 (경로, 기대, 실제) 불일치 목록을 돌려줌
+    import http.client
+    from urllib.parse import quote
+
+    server = make_server('127.0.0.1', 0, store)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    failures = []
+    try:
+        for path, expected in CHECK_QUERIES:
+            connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=30)
+            try:
+                connection.request('GET', quote(path, safe='/?&='))
+                status = connection.getresponse().status
+            except (http.client.HTTPException, OSError) as e:
+                status = f"응답 없음 ({type(e).__name__})"
+            finally:
+                connection.close()
+            print(f"{status} {path}")
+            if status != expected:
+                failures.append((path, expected, status))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="위험 점수/예측 확률 조회 API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--crime-path', default=crime_data.CRIME_PATH)
+    parser.add_argument('--indicator-path', default=crime_data.INDICATOR_PATH)
+    parser.add_argument('--prediction-path', default=crime_data.PREDICTION_PATH)
+    parser.add_argument('--verbose', action='store_true', help="요청 로그 출력")
+    parser.add_argument('--check', action='store_true', help="임시 포트에서 회귀 확인 요청을 보내고 종료")
+    args = parser.parse_args()
+
+    store = DataStore(args.crime_path, args.indicator_path, args.prediction_path)
+    if args.check:
+        failures = check(store)
+        for path, expected, status in failures:
+            print(f"실패: {path} 기대 {expected}, 실제 {status}")
+        sys.exit(1 if failures else 0)
+    server = make_server(args.host, args.port, store, quiet=not args.verbose)
+    print(f"API 서버 시작: http://{args.host}:{args.port} (데이터 버전 {store.version})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -2,16 +2,16 @@ import streamlit as st
 import pandas as pd
 import folium
 from streamlit_folium import folium_static
-import geopandas as gpd
-import requests
-from io import BytesIO
+import cache_manager
+import crime_data
+import geometry
 from folium.plugins import MarkerCluster
 
 # 페이지 설정
 st.set_page_config(page_title="범죄 및 위험 대시보드", page_icon="🚨", layout="wide", initial_sidebar_state="expanded")
 
 # 데이터 로드 함수
-@st.cache_data
+@cache_manager.memoize
 def load_data(crime_path, indicator_path, prediction_path):
     try:
         # 범죄 데이터
@@ -45,16 +45,13 @@ def load_data(crime_path, indicator_path, prediction_path):
         st.stop()
 
 # GeoJSON 로드 함수
-@st.cache_data
+@cache_manager.memoize
 def load_geojson():
-    geojson_url = "https://raw.githubusercontent.com/southkorea/southkorea-maps/master/gadm/json/skorea-provinces-geo.json"
     try:
-        response = requests.get(geojson_url)
-        response.raise_for_status()
-        return gpd.read_file(BytesIO(response.content))
+        return geometry.load_province_geojson()
     except Exception as e:
         st.error(f"GeoJSON 로드 실패: {e}")
-        return gpd.GeoDataFrame()  # 빈 GeoDataFrame 반환
+        return geometry.empty_geojson()  # 빈 FeatureCollection 반환
 
 # 위험 점수 계산
 def calculate_risk_score(row, region):
@@ -211,10 +208,10 @@ def create_map(view_type, selected_year=None, selected_date=None, df_crime=None,
 # 메인 앱
 st.title("범죄 및 위험 대시보드")
 
-# 데이터 파일 경로 (상대 경로로 수정)
-crime_path = "data/15~25년도 이상동기(도단위추가)_with_coords_openai.csv"
-indicator_path = "data/지표데이터(4대범죄추가계산).csv"
-prediction_path = "data/crime_predictions_2024_2025_binary_risk.csv"
+# 데이터 파일 경로 (데이터셋 레지스트리)
+crime_path = crime_data.DATASETS['crime'].path
+indicator_path = crime_data.DATASETS['indicator'].path
+prediction_path = crime_data.DATASETS['prediction'].path
 
 # 데이터 로드
 df_crime, crime_dates, df_indicator, indicator_dates, df_prediction, prediction_dates = load_data(crime_path, indicator_path, prediction_path)
@@ -2,14 +2,14 @@ import streamlit as st
 import pandas as pd
 import folium
 from streamlit_folium import folium_static
-import geopandas as gpd
-import requests
-from io import BytesIO
+import cache_manager
+import crime_data
+import geometry
 from folium.plugins import MarkerCluster
 
 st.set_page_config(page_title="범죄 및 위험 대시보드", page_icon="🚨", layout="wide", initial_sidebar_state="expanded")
 
-@st.cache_data
+@cache_manager.memoize
 def load_data(crime_path, indicator_path, prediction_path):
     df_crime = pd.read_csv(crime_path, encoding='cp949', usecols=['날짜', '위도', '경도'])
     df_crime['date'] = pd.to_datetime(df_crime['날짜'], errors='coerce')
@@ -31,11 +31,9 @@ def load_data(crime_path, indicator_path, prediction_path):
     
     return df_crime, crime_dates, df_indicator, indicator_dates, df_prediction, prediction_dates
 
-@st.cache_data
+@cache_manager.memoize
 def load_geojson():
-    url = "https://raw.githubusercontent.com/southkorea/southkorea-maps/master/gadm/json/skorea-provinces-geo.json"
-    response = requests.get(url, timeout=5)
-    return gpd.read_file(BytesIO(response.content))
+    return geometry.load_province_geojson()
 
 def calculate_risk_score(df, region):
     score = pd.Series(0, index=df.index)
@@ -181,9 +179,9 @@ def create_map(view_type, selected_year=None, selected_date=None, crime_data=Non
 
 st.title("범죄 및 위험 대시보드")
 
-crime_path = "data/15~25년도 이상동기(도단위추가)_with_coords_openai.csv"
-indicator_path = "data/지표데이터(4대범죄추가계산).csv"
-prediction_path = "data/crime_predictions_2024_2025_binary_risk.csv"
+crime_path = crime_data.DATASETS['crime'].path
+indicator_path = crime_data.DATASETS['indicator'].path
+prediction_path = crime_data.DATASETS['prediction'].path
 
 try:
     df_crime, crime_dates, df_indicator, indicator_dates, df_prediction, prediction_dates = load_data(crime_path, indicator_path, prediction_path)
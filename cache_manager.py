@@ -0,0 +1,165 @@
+import functools
+import inspect
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# 프로세스 전체가 공유하는 메모리 예산 기반 LRU 캐시 (st.cache_data 대체)
+# - 항목마다 크기(바이트)를 계산해 전체 예산을 넘으면 가장 오래 안 쓴 항목부터 제거
+# - 함수별 적중/실패/제거 통계 제공
+# - st.cache_data와 같이 '_'로 시작하는 인자는 키에서 제외
+# - 캐시된 객체를 그대로 돌려주므로(복사 없음) 호출 측에서 수정하면 안 됨
+DEFAULT_MAX_MB = float(os.environ.get('CACHE_MAX_MB', 512))
+
+
+def sizeof(value, _seen=None):
+    # 대략적인 메모리 사용량 (DataFrame은 deep, ndarray는 nbytes, 컨테이너/객체는 재귀)
+    seen = _seen if _seen is not None else set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k, seen) + sizeof(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(v, seen) for v in value)
+    if hasattr(value, '__dict__') and not isinstance(value, type):
+        return sys.getsizeof(value) + sizeof(vars(value), seen)
+    return sys.getsizeof(value)
+
+
+class _Fingerprints:
+    # DataFrame/Series 내용 해시를 객체별로 한 번만 계산 (객체가 살아 있는 동안 재사용)
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, value):
+        key = id(value)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0]() is value:
+                return entry[1]
+        digest = (type(value).__name__, value.shape, int(pd.util.hash_pandas_object(value, index=True).sum()),
+                  tuple(map(str, getattr(value, 'columns', ()))))
+        with self.lock:
+            self.entries[key] = (weakref.ref(value, lambda _, key=key: self.entries.pop(key, None)), digest)
+        return digest
+
+
+_fingerprints = _Fingerprints()
+
+
+def make_key(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return _fingerprints.get(value)
+    if isinstance(value, np.ndarray):
+        return ('ndarray', value.shape, str(value.dtype), hash(value.tobytes()))
+    if isinstance(value, dict):
+        return ('dict', tuple((make_key(k), make_key(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(make_key(v) for v in value))
+    try:
+        hash(value)
+    except TypeError:
+        return ('repr', repr(value))
+    return value
+
+
+class CacheManager:
+    def __init__(self, max_bytes=int(DEFAULT_MAX_MB * 2 ** 20)):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # (함수 이름, 인자 키) -> (값, 크기)
+        self.total_bytes = 0
+        self.counters = {}  # 함수 이름 -> {'hits', 'misses', 'evictions'}
+        self.lock = threading.Lock()
+
+    def _count(self, name, field):
+        self.counters.setdefault(name, {'hits': 0, 'misses': 0, 'evictions': 0})[field] += 1
+
+    def get(self, name, key):
+        with self.lock:
+            entry = self.entries.get((name, key))
+            if entry is None:
+                self._count(name, 'misses')
+                return False, None
+            self.entries.move_to_end((name, key))
+            self._count(name, 'hits')
+            return True, entry[0]
+
+    def put(self, name, key, value, max_entries=None):
+        size = sizeof(value)
+        with self.lock:
+            if size > self.max_bytes:
+                return  # 예산보다 큰 값은 저장하지 않음
+            old = self.entries.pop((name, key), None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self.entries[(name, key)] = (value, size)
+            self.total_bytes += size
+            if max_entries is not None:
+                own = [k for k in self.entries if k[0] == name]
+                for k in own[:max(len(own) - max_entries, 0)]:
+                    self._evict(k)
+            while self.total_bytes > self.max_bytes and self.entries:
+                self._evict(next(iter(self.entries)))
+
+    def _evict(self, key):
+        _, size = self.entries.pop(key)
+        self.total_bytes -= size
+        self._count(key[0], 'evictions')
+
+    def clear(self, name=None):
+        with self.lock:
+            for key in [k for k in self.entries if name is None or k[0] == name]:
+                self.total_bytes -= self.entries.pop(key)[1]
+
+    def stats(self):
+        # 함수별 항목 수/바이트/적중/실패/제거 표
+        with self.lock:
+            sizes = {}
+            for (name, _), (_, size) in self.entries.items():
+                entries, total = sizes.get(name, (0, 0))
+                sizes[name] = (entries + 1, total + size)
+            rows = []
+            for name in sorted(set(sizes) | set(self.counters)):
+                counters = self.counters.get(name, {'hits': 0, 'misses': 0, 'evictions': 0})
+                entries, total = sizes.get(name, (0, 0))
+                rows.append({'name': name, 'entries': entries, 'bytes': total, **counters})
+            return pd.DataFrame(rows, columns=['name', 'entries', 'bytes', 'hits', 'misses', 'evictions'])
+
+
+CACHE = CacheManager()
+
+
+def memoize(func=None, *, max_entries=None, manager=None):
+    # @memoize / @memoize(max_entries=8) — 인자 값으로 캐시 (밑줄 인자는 제외)
+    if func is None:
+        return functools.partial(memoize, max_entries=max_entries, manager=manager)
+    signature = inspect.signature(func)
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cache = manager or CACHE
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = tuple((arg, make_key(value)) for arg, value in bound.arguments.items() if not arg.startswith('_'))
+        hit, value = cache.get(name, key)
+        if hit:
+            return value
+        value = func(*args, **kwargs)
+        cache.put(name, key, value, max_entries)
+        return value
+
+    wrapper.clear = lambda: (manager or CACHE).clear(name)
+    return wrapper
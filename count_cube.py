@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+import crime_data
+
+# 사건 건수 큐브: (도단위, 지역) × 일 단위 건수를 미리 집계하고 월/년 롤업을 같이 보관.
+# 지역(시군구)은 도단위 안에 중첩되므로 (도단위, 지역) 쌍을 한 축으로 두고,
+# 도단위 합계는 지역 축을 묶어 미리 계산한다.
+LEVELS = ('province', 'district')
+GRAINS = ('day', 'month', 'year')
+
+
+class CountCube:
+    def __init__(self, df_crime):
+        self.days = pd.DatetimeIndex([])
+        self.districts = pd.MultiIndex.from_arrays([[], []], names=['도단위', '지역'])
+        self.district_day = np.zeros((0, 0), dtype=np.int32)
+        self.extend(df_crime)
+
+    def extend(self, df_crime):
+        # 새로 들어온 사건만 기존 큐브에 더한다 (CSV 재파싱 없이 배열 연산만)
+        # 새 지역/날짜가 있으면 축을 넓혀 기존 건수를 옮기고, 롤업은 일 단위 큐브에서 다시 계산
+        data = df_crime.dropna(subset=['date'])
+        days = data['date'].dt.normalize()
+        provinces = data['도단위'].map(crime_data.normalize_province) if '도단위' in data else pd.Series('미상', index=data.index)
+        districts = data['지역'].fillna('미상') if '지역' in data else pd.Series('미상', index=data.index)
+        pairs = pd.DataFrame({'도단위': provinces, '지역': districts})
+
+        if len(data):
+            self._grow(pd.MultiIndex.from_frame(pairs.drop_duplicates()), days.min(), days.max())
+            district_codes = self.districts.get_indexer(pd.MultiIndex.from_frame(pairs))
+            day_codes = (days - self.days[0]).dt.days.to_numpy()
+            np.add.at(self.district_day, (district_codes, day_codes), 1)
+        self._rollup()
+
+    def _grow(self, new_districts, first_day, last_day):
+        districts = self.districts.append(new_districts).unique().sort_values()
+        districts.names = ['도단위', '지역']
+        if len(self.days):
+            first_day, last_day = min(first_day, self.days[0]), max(last_day, self.days[-1])
+        days = pd.date_range(first_day, last_day, freq='D')
+        if len(districts) == len(self.districts) and len(days) == len(self.days):
+            return
+        grown = np.zeros((len(districts), len(days)), dtype=np.int32)
+        if len(self.days):
+            offset = (self.days[0] - days[0]).days
+            grown[districts.get_indexer(self.districts), offset:offset + len(self.days)] = self.district_day
+        self.districts, self.days, self.district_day = districts, days, grown
+
+    def _rollup(self):
+        self.district_province = np.asarray(self.districts.get_level_values('도단위'))
+        province_codes, self.provinces = pd.factorize(pd.Index(self.district_province), sort=True)
+        self.provinces = pd.Index(self.provinces, name='도단위')
+
+        # 도단위 롤업: 지역 행을 도단위별로 합산
+        self.province_day = np.zeros((len(self.provinces), len(self.days)), dtype=np.int32)
+        np.add.at(self.province_day, province_codes, self.district_day)
+
+        # 월/년 롤업: 일 축을 구간 경계에서 reduceat
+        self.months = self.days.to_period('M').unique()
+        self.years = pd.Index(self.days.year.unique(), name='year')
+        month_starts = self._boundaries(self.days.to_period('M'))
+        year_starts = self._boundaries(self.days.year)
+        self.rollups = {
+            ('district', 'day'): self.district_day,
+            ('province', 'day'): self.province_day,
+            ('district', 'month'): self._reduce(self.district_day, month_starts),
+            ('province', 'month'): self._reduce(self.province_day, month_starts),
+            ('district', 'year'): self._reduce(self.district_day, year_starts),
+            ('province', 'year'): self._reduce(self.province_day, year_starts),
+        }
+
+    @staticmethod
+    def _boundaries(keys):
+        keys = np.asarray(keys)
+        if len(keys) == 0:
+            return np.array([], dtype=int)
+        return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+    @staticmethod
+    def _reduce(array, starts):
+        if array.shape[1] == 0:
+            return np.zeros((array.shape[0], 0), dtype=array.dtype)
+        return np.add.reduceat(array, starts, axis=1)
+
+    def _labels(self, level):
+        return self.provinces if level == 'province' else self.districts
+
+    def _columns(self, grain):
+        if grain == 'day':
+            return self.days
+        if grain == 'month':
+            return pd.PeriodIndex(self.months, name='month')
+        return self.years
+
+    def _column_bounds(self, grain):
+        # 각 열(일/월/년)의 시작일과 마지막 날
+        if grain == 'day':
+            return self.days, self.days
+        if grain == 'month':
+            months = pd.PeriodIndex(self.months)
+            return months.start_time, months.end_time.normalize()
+        return pd.to_datetime([f"{y}-01-01" for y in self.years]), pd.to_datetime([f"{y}-12-31" for y in self.years])
+
+    def _column_mask(self, grain, year=None, date=None, start=None, end=None):
+        # 월/년 단위는 기간과 겹치는 구간 전체를 포함
+        col_start, col_end = self._column_bounds(grain)
+        mask = np.ones(len(col_start), dtype=bool)
+        if date is not None:
+            date = pd.Timestamp(date).normalize()
+            mask &= np.asarray((col_start <= date) & (col_end >= date))
+        if year is not None:
+            mask &= np.asarray(col_start.year == year)
+        if start is not None:
+            mask &= np.asarray(col_end >= pd.Timestamp(start).normalize())
+        if end is not None:
+            mask &= np.asarray(col_start <= pd.Timestamp(end).normalize())
+        return mask
+
+    def slice(self, level='province', grain='month', year=None, date=None, start=None, end=None, province=None):
+        # (level × grain) 건수 표. year/date/start/end 로 열을, province 로 행을 제한
+        if level not in LEVELS or grain not in GRAINS:
+            raise ValueError(f"level은 {LEVELS}, grain은 {GRAINS} 중 하나여야 합니다")
+        array = self.rollups[(level, grain)]
+        mask = self._column_mask(grain, year, date, start, end)
+        table = pd.DataFrame(array[:, mask], index=self._labels(level), columns=self._columns(grain)[mask])
+        if province is not None:
+            if level == 'province':
+                table = table.loc[[province]] if province in table.index else table.iloc[0:0]
+            else:
+                table = table[self.district_province == province]
+        return table
+
+    def totals(self, level='province', year=None, date=None, start=None, end=None, province=None):
+        # 기간 내 합계 (일 단위 큐브에서 열 마스크 합산)
+        return self.slice(level, 'day', year, date, start, end, province).sum(axis=1)
+
+    def total(self, year=None, date=None, start=None, end=None, province=None):
+        return int(self.totals('province', year, date, start, end, province).sum())
+
+    def region_counts(self, year=None, date=None, start=None, end=None):
+        # 17개 도단위 전체에 대한 건수 (데이터 없는 지역은 0)
+        totals = self.totals('province', year, date, start, end)
+        return {region: int(totals.get(region, 0)) for region in crime_data.REGIONS}
+
+
+def get_count_color(count, max_count):
+    if not count:
+        return 'green'
+    ratio = count / max(max_count, 1)
+    return 'yellow' if ratio < 0.34 else 'orange' if ratio < 0.67 else 'red'
@@ -0,0 +1,264 @@
+import os
+import hashlib
+import pandas as pd
+
+# Streamlit 밖(API 서버, CLI 도구)에서도 쓰는 공통 데이터 로직
+# 기본 경로는 환경 변수(CRIME_PATH, INDICATOR_PATH, PREDICTION_PATH)로 바꿀 수 있다
+CRIME_PATH = os.environ.get('CRIME_PATH', "./data/15~25년도 이상동기(도단위추가)_with_coords_openai.csv")
+INDICATOR_PATH = os.environ.get('INDICATOR_PATH', "./data/지표데이터(4대범죄추가계산).csv")
+PREDICTION_PATH = os.environ.get('PREDICTION_PATH', "./data/predict.csv")
+CSV_ENCODING = 'cp949'
+INDICATOR_LAST_YEAR = 2023  # 지표 데이터는 이 해까지만 사용 (이후 행은 정제 단계에서 제외)
+
+REGIONS = ['서울특별시', '경기도', '강원도', '경상남도', '경상북도', '광주광역시', '대구광역시', '대전광역시',
+           '부산광역시', '세종특별자치시', '울산광역시', '인천광역시', '전라남도', '전라북도', '제주도',
+           '충청남도', '충청북도']
+REGION_MAPPING = {
+    'Seoul': '서울특별시', 'Gyeonggi-do': '경기도', 'Gangwon-do': '강원도', 'Gyeongsangnam-do': '경상남도',
+    'Gyeongsangbuk-do': '경상북도', 'Gwangju': '광주광역시', 'Daegu': '대구광역시', 'Daejeon': '대전광역시',
+    'Busan': '부산광역시', 'Sejong': '세종특별자치시', 'Ulsan': '울산광역시', 'Incheon': '인천광역시',
+    'Jeollanam-do': '전라남도', 'Jeollabuk-do': '전라북도', 'Jeju': '제주도',
+    'Chungcheongnam-do': '충청남도', 'Chungcheongbuk-do': '충청북도'
+}
+
+# 원자료의 도단위 표기 차이 보정
+PROVINCE_ALIASES = {'대전시': '대전광역시'}
+
+
+def normalize_province(name):
+    return PROVINCE_ALIASES.get(name, name)
+
+
+def clean_crime(df_crime):
+    df_crime['date'] = pd.to_datetime(df_crime['날짜'], errors='coerce')
+    df_crime['위도'] = pd.to_numeric(df_crime['위도'], errors='coerce')
+    df_crime['경도'] = pd.to_numeric(df_crime['경도'], errors='coerce')
+    df_crime = df_crime.dropna(subset=['date', '위도', '경도'])
+    if 'full_address' not in df_crime.columns:
+        df_crime['full_address'] = "위도: " + df_crime['위도'].astype(str) + ", 경도: " + df_crime['경도'].astype(str)
+    return df_crime
+
+
+def clean_indicator(df_indicator):
+    df_indicator['date'] = pd.to_datetime(df_indicator['date'], errors='coerce')
+    df_indicator = df_indicator[df_indicator['date'].dt.year <= INDICATOR_LAST_YEAR].dropna(subset=['date'])
+    return df_indicator
+
+
+def clean_prediction(df_prediction):
+    df_prediction['date'] = pd.to_datetime(df_prediction['date'], errors='coerce')
+    df_prediction = df_prediction.dropna(subset=['date', '도단위', 'crime_probability'])
+    return df_prediction
+
+
+class Dataset:
+    # 데이터셋 레지스트리 항목: 이름/표시 이름/경로/선언된 스키마(필수 열 -> 종류, 선택 열)/정제 함수
+    def __init__(self, name, label, path, schema, clean, missing_message, optional=()):
+        self.name = name
+        self.label = label
+        self.path = path
+        self.schema = schema
+        self.optional = tuple(optional)
+        self.clean = clean
+        self.missing_message = missing_message
+
+    def missing_columns(self, columns):
+        return [column for column in self.schema if column not in columns]
+
+    def check_columns(self, columns):
+        missing = self.missing_columns(columns)
+        if missing:
+            raise ValueError(f"{self.label} 데이터 필수 열 없음: {', '.join(missing)}")
+
+    def exists(self, path=None):
+        return os.path.exists(path or self.path)
+
+    def version(self, path=None):
+        # 파일 크기/수정시각 기반 버전 (data_version)
+        return data_version(path or self.path)
+
+
+# 데이터셋 레지스트리 (이름 → Dataset). 앱은 보기에 필요한 데이터셋만 골라 읽는다
+DATASETS = {
+    'crime': Dataset('crime', '사건', CRIME_PATH,
+                     {'날짜': 'date', '지역': 'str', '도단위': 'str', '위도': 'float', '경도': 'float'},
+                     clean_crime, "범죄 데이터 파일 없음", optional=['full_address']),
+    'indicator': Dataset('indicator', '지표', INDICATOR_PATH, {'date': 'date'}, clean_indicator, "지표 데이터 파일 없음",
+                         optional=['금융스트레스'] + [f"{kind}:{region}" for kind in ('기후스트레스', '사회스트레스') for region in REGIONS]),
+    'prediction': Dataset('prediction', '예측', PREDICTION_PATH,
+                          {'date': 'date', '도단위': 'str', 'crime_probability': 'float'},
+                          clean_prediction, "예측 데이터 파일 없음", optional=['crime_occurred', 'crime_count']),
+}
+
+
+def read_dataset(name, path=None, chunksize=None):
+    # chunksize를 주면 정제된 청크를 하나씩 내보내는 제너레이터 (전체를 메모리에 올리지 않음)
+    dataset = DATASETS[name]
+    path = path or dataset.path
+    if not dataset.exists(path):
+        raise FileNotFoundError(f"{dataset.missing_message}: {path}")
+    if chunksize is None:
+        raw = pd.read_csv(path, encoding=CSV_ENCODING)
+        dataset.check_columns(raw.columns)
+        return dataset.clean(raw)
+    return _read_chunks(dataset, path, chunksize)
+
+
+def _read_chunks(dataset, path, chunksize):
+    for chunk in pd.read_csv(path, encoding=CSV_ENCODING, chunksize=chunksize):
+        dataset.check_columns(chunk.columns)
+        yield dataset.clean(chunk)
+
+
+def read_crime(crime_path):
+    return read_dataset('crime', crime_path)
+
+
+def read_indicator(indicator_path):
+    return read_dataset('indicator', indicator_path)
+
+
+def read_prediction(prediction_path):
+    return read_dataset('prediction', prediction_path)
+
+
+def unique_dates(df):
+    return sorted(df['date'].dt.normalize().unique())
+
+
+def load_data(crime_path=CRIME_PATH, indicator_path=INDICATOR_PATH, prediction_path=PREDICTION_PATH):
+    df_crime = read_crime(crime_path)
+    df_indicator = read_indicator(indicator_path)
+    df_prediction = read_prediction(prediction_path)
+    return df_crime, unique_dates(df_crime), df_indicator, unique_dates(df_indicator), df_prediction, unique_dates(df_prediction)
+
+
+def data_version(*paths):
+    # 파일 경로/크기/수정시각으로 데이터 버전 생성 (ETag, 캐시 키에 사용)
+    h = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        h.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def filter_period(df, year=None, date=None, start=None, end=None):
+    # 년도/날짜/기간 필터 (날짜 > 기간 > 년도 순으로 우선)
+    if date is not None:
+        return df[df['date'].dt.normalize() == pd.Timestamp(date).normalize()]
+    if start is not None or end is not None:
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= df['date'] >= pd.Timestamp(start).normalize()
+        if end is not None:
+            mask &= df['date'] < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+        return df[mask]
+    if year is not None:
+        return df[df['date'].dt.year == year]
+    return df
+
+
+def filter_view(df, view_type, selected_year=None, selected_date=None):
+    # create_map과 같은 보기 필터 (예측: 날짜가 있으면 그 날짜, 없으면 년도)
+    if view_type == "년도별":
+        return filter_period(df, year=selected_year)
+    if view_type == "일별":
+        return filter_period(df, date=selected_date)
+    if view_type == "예측":
+        return filter_period(df, date=selected_date) if selected_date is not None else filter_period(df, year=selected_year)
+    return df
+
+
+def exceeds_thresholds(climate, social, financial):
+    # 지표 값 -> 기준 초과 여부 (기후>13, 사회>=0.7, 금융>=2). Series/ndarray 모두 (NaN은 미초과)
+    return climate > 13, social >= 0.7, financial >= 2
+
+
+def risk_flags(data, region):
+    # 지표별 기준 초과 여부 (기후>13, 사회>=0.7, 금융>=2)
+    climate_col = f"기후스트레스:{region}"
+    social_col = f"사회스트레스:{region}"
+    missing = pd.Series(float('nan'), index=data.index)
+    flags = exceeds_thresholds(data[climate_col] if climate_col in data else missing,
+                               data[social_col] if social_col in data else missing,
+                               data['금융스트레스'] if '금융스트레스' in data else missing)
+    return tuple(flag.astype(float) for flag in flags)
+
+
+def region_scores(indicator_data, daily=False):
+    # 지도 위험 점수 (0~3): 일별은 첫 행의 점수, 그 외는 사회스트레스가 있는 행들의 점수 평균을 반올림
+    scores = {}
+    for region in REGIONS:
+        if indicator_data.empty:
+            scores[region] = 0
+            continue
+        climate, social, financial = risk_flags(indicator_data, region)
+        score = (climate + social + financial).clip(upper=3)
+        if daily:
+            scores[region] = int(score.iloc[0])
+            continue
+        social_col = f"사회스트레스:{region}"
+        scored = indicator_data[social_col].notna() if social_col in indicator_data else pd.Series(False, index=indicator_data.index)
+        scores[region] = int(round(float(score[scored].mean()))) if scored.any() else 0
+    return scores
+
+
+def create_risk_score_table(indicator_data, view_type, selected_year=None, selected_date=None, start=None, end=None):
+    if view_type == "년도별":
+        period_data = filter_period(indicator_data, year=selected_year)
+    elif view_type == "일별":
+        period_data = filter_period(indicator_data, date=selected_date)
+    elif view_type == "기간별":
+        period_data = filter_period(indicator_data, start=start, end=end)
+    else:
+        period_data = indicator_data
+
+    table_data = []
+    for region in REGIONS:
+        if period_data.empty:
+            table_data.append({'지역': region, '기후스트레스 점수': 0, '사회스트레스 점수': 0, '금융스트레스 점수': 0, '총 점수': 0})
+            continue
+        climate, social, financial = risk_flags(period_data, region)
+        if view_type == "일별":
+            climate_score, social_score, financial_score = climate.iloc[0], social.iloc[0], financial.iloc[0]
+        else:
+            climate_score, social_score, financial_score = climate.mean(), social.mean(), financial.mean()
+        total_score = min(climate_score + social_score + financial_score, 3)
+        table_data.append({
+            '지역': region,
+            '기후스트레스 점수': round(float(climate_score), 2),
+            '사회스트레스 점수': round(float(social_score), 2),
+            '금융스트레스 점수': round(float(financial_score), 2),
+            '총 점수': round(float(total_score), 2)
+        })
+    return pd.DataFrame(table_data)
+
+
+def region_probabilities(prediction_data, selected_year=None, selected_date=None, prediction_mode="년도별", start=None, end=None):
+    # 지역별 crime_probability (년도별/기간별: 평균, 일별: 해당 날짜 값), 데이터 없으면 None
+    if prediction_mode == "일별" and selected_date is not None:
+        period_data = filter_period(prediction_data, date=selected_date)
+    elif prediction_mode == "기간별":
+        period_data = filter_period(prediction_data, start=start, end=end)
+    elif selected_year:
+        period_data = filter_period(prediction_data, year=selected_year)
+    else:
+        period_data = prediction_data
+
+    grouped = period_data.groupby('도단위')['crime_probability']
+    values = grouped.first() if prediction_mode == "일별" else grouped.mean()
+    return {region: (float(values[region]) if region in values.index and pd.notna(values[region]) else None) for region in REGIONS}
+
+
+def create_prediction_table(prediction_data, selected_year=None, selected_date=None, prediction_mode="년도별", start=None, end=None):
+    probabilities = region_probabilities(prediction_data, selected_year, selected_date, prediction_mode, start, end)
+    return pd.DataFrame([
+        {'지역': region, '위험률': f"{prob:.3f}" if prob is not None else '데이터 없음'}
+        for region, prob in probabilities.items()
+    ])
+
+
+def get_prediction_color(prob):
+    if prob is None:
+        return 'gray'
+    return 'green' if prob < 0.3 else 'lime' if prob < 0.5 else 'yellow' if prob < 0.7 else 'orange' if prob < 0.85 else 'red'
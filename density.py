@@ -0,0 +1,100 @@
+import base64
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+# 격자 기반 커널 밀도 추정 (binned KDE)
+# 1) 사건 좌표를 고정 격자에 선형 binning (점 개수에 비례, 단순 누적)
+# 2) 가우시안 커널을 FFT로 합성곱 (격자 크기에만 비례, 점 개수와 무관)
+# 3) 결과를 투명 PNG 한 장으로 인코딩해 ImageOverlay로 전송
+KOREA_BOUNDS = ((33.0, 124.5), (38.7, 131.0))  # (남, 서), (북, 동)
+KM_PER_DEG_LAT = 111.0
+
+
+def linear_binning(lat, lon, bounds, shape):
+    # 각 점의 가중치를 주변 4개 격자점에 거리 비례로 나눠 누적
+    (south, west), (north, east) = bounds
+    rows, cols = shape
+    y = (np.asarray(lat, dtype=float) - south) / (north - south) * (rows - 1)
+    x = (np.asarray(lon, dtype=float) - west) / (east - west) * (cols - 1)
+    inside = (y >= 0) & (y <= rows - 1) & (x >= 0) & (x <= cols - 1)
+    y, x = y[inside], x[inside]
+    y0 = np.minimum(np.floor(y).astype(int), rows - 2)
+    x0 = np.minimum(np.floor(x).astype(int), cols - 2)
+    dy, dx = y - y0, x - x0
+    grid = np.zeros(shape, dtype=float)
+    np.add.at(grid, (y0, x0), (1 - dy) * (1 - dx))
+    np.add.at(grid, (y0 + 1, x0), dy * (1 - dx))
+    np.add.at(grid, (y0, x0 + 1), (1 - dy) * dx)
+    np.add.at(grid, (y0 + 1, x0 + 1), dy * dx)
+    return grid
+
+
+def scott_bandwidth_km(lat, lon):
+    # Scott 규칙 (2차원): σ · n^(-1/6), 위경도 표준편차를 km로 환산해 평균
+    n = len(lat)
+    if n < 2:
+        return 10.0
+    mean_lat = np.radians(np.mean(lat))
+    sigma_km = np.sqrt(np.std(lat) * KM_PER_DEG_LAT * np.std(lon) * KM_PER_DEG_LAT * np.cos(mean_lat))
+    return float(max(sigma_km * n ** (-1 / 6), 2.0))
+
+
+def gaussian_kernel(bandwidth_km, bounds, shape):
+    # 격자 단위로 환산한 분리형 가우시안 커널 (±3σ)
+    (south, west), (north, east) = bounds
+    rows, cols = shape
+    mid_lat = np.radians((south + north) / 2)
+    cell_km_y = (north - south) / (rows - 1) * KM_PER_DEG_LAT
+    cell_km_x = (east - west) / (cols - 1) * KM_PER_DEG_LAT * np.cos(mid_lat)
+    sigma_y, sigma_x = bandwidth_km / cell_km_y, bandwidth_km / cell_km_x
+    ry, rx = int(np.ceil(3 * sigma_y)), int(np.ceil(3 * sigma_x))
+    ky = np.exp(-0.5 * (np.arange(-ry, ry + 1) / sigma_y) ** 2)
+    kx = np.exp(-0.5 * (np.arange(-rx, rx + 1) / sigma_x) ** 2)
+    kernel = np.outer(ky, kx)
+    return kernel / kernel.sum()
+
+
+def fft_convolve(grid, kernel):
+    # 0 패딩으로 순환 합성곱 경계 효과를 막은 'same' 크기 FFT 합성곱
+    rows, cols = grid.shape
+    krows, kcols = kernel.shape
+    fft_shape = (rows + krows - 1, cols + kcols - 1)
+    result = np.fft.irfft2(np.fft.rfft2(grid, fft_shape) * np.fft.rfft2(kernel, fft_shape), fft_shape)
+    top, left = krows // 2, kcols // 2
+    return np.clip(result[top:top + rows, left:left + cols], 0, None)
+
+
+def binned_kde(lat, lon, bounds=KOREA_BOUNDS, shape=(256, 256), bandwidth_km=None):
+    if bandwidth_km is None:
+        bandwidth_km = scott_bandwidth_km(lat, lon)
+    grid = linear_binning(lat, lon, bounds, shape)
+    return fft_convolve(grid, gaussian_kernel(bandwidth_km, bounds, shape)), bandwidth_km
+
+
+# 투명 → 노랑 → 주황 → 빨강
+COLOR_STOPS = np.array([[0.0, 255, 255, 178, 0], [0.25, 254, 204, 92, 140], [0.5, 253, 141, 60, 180],
+                        [0.75, 240, 59, 32, 210], [1.0, 189, 0, 38, 230]])
+
+
+def density_to_png(density, min_fraction=0.02):
+    # 최대값 대비 정규화 후 색상표 적용, 위쪽이 북쪽이 되도록 행을 뒤집어 PNG(data URI)로 인코딩
+    peak = density.max()
+    scaled = density / peak if peak > 0 else density
+    rgba = np.stack([np.interp(scaled, COLOR_STOPS[:, 0], COLOR_STOPS[:, c]) for c in range(1, 5)], axis=-1)
+    rgba[scaled < min_fraction, 3] = 0
+    image = Image.fromarray(rgba[::-1].astype(np.uint8), mode='RGBA')
+    buffer = BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def density_overlay(lat, lon, bounds=KOREA_BOUNDS, shape=(256, 256), bandwidth_km=None):
+    # ImageOverlay에 바로 넘길 수 있는 {'image', 'bounds', 'bandwidth_km', 'points'}
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    if len(lat) == 0:
+        return None
+    density, bandwidth_km = binned_kde(lat, lon, bounds, shape, bandwidth_km)
+    return {'image': density_to_png(density), 'bounds': [list(bounds[0]), list(bounds[1])],
+            'bandwidth_km': round(bandwidth_km, 1), 'points': int(len(lat))}
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+# 예측 성능 평가: predict.csv의 crime_probability와 실제 crime_occurred를 비교
+# 지역 × 기간(년/월) 그룹 전체를 groupby 한 번으로 계산 (그룹별 루프 없음)
+#   - AUC: 그룹 내 순위합(Mann-Whitney U)으로 계산
+#   - Brier 점수, 보정(calibration) 구간, 색상 기준(0.3/0.5/0.7/0.85)별 혼동행렬
+THRESHOLDS = (0.3, 0.5, 0.7, 0.85)
+CALIBRATION_BINS = np.linspace(0, 1, 11)
+ALL = '전체'
+
+
+def expand_groups(df_prediction, period='year'):
+    # 각 행을 (지역, 기간), (지역, 전체), (전체, 기간), (전체, 전체) 그룹에 모두 포함시킨 긴 표
+    data = df_prediction.dropna(subset=['crime_probability', 'crime_occurred'])
+    base = pd.DataFrame({
+        'region': data['도단위'].to_numpy(),
+        'period': (data['date'].dt.year.astype(str) if period == 'year' else data['date'].dt.to_period('M').astype(str)).to_numpy(),
+        'p': data['crime_probability'].to_numpy(dtype=float),
+        'y': (data['crime_occurred'].to_numpy() > 0).astype(int),
+    })
+    return pd.concat([
+        base,
+        base.assign(period=ALL),
+        base.assign(region=ALL),
+        base.assign(region=ALL, period=ALL),
+    ], ignore_index=True)
+
+
+def summary_table(groups):
+    keys = ['region', 'period']
+    grouped = groups.groupby(keys, sort=True)
+    ranks = grouped['p'].rank(method='average')
+    stats = pd.DataFrame({
+        'n': grouped.size(),
+        'positives': grouped['y'].sum(),
+        'mean_probability': grouped['p'].mean(),
+        'observed_rate': grouped['y'].mean(),
+        'brier': ((groups['p'] - groups['y']) ** 2).groupby([groups['region'], groups['period']]).mean(),
+        'positive_rank_sum': ranks.where(groups['y'] == 1, 0).groupby([groups['region'], groups['period']]).sum(),
+    })
+    negatives = stats['n'] - stats['positives']
+    u = stats['positive_rank_sum'] - stats['positives'] * (stats['positives'] + 1) / 2
+    stats['auc'] = (u / (stats['positives'] * negatives)).where((stats['positives'] > 0) & (negatives > 0))
+    return stats.drop(columns='positive_rank_sum').reset_index()
+
+
+def calibration_table(groups):
+    bins = np.clip(np.digitize(groups['p'], CALIBRATION_BINS[1:-1]), 0, len(CALIBRATION_BINS) - 2)
+    grouped = groups.assign(bin=bins).groupby(['region', 'period', 'bin'])
+    table = pd.DataFrame({
+        'n': grouped.size(),
+        'mean_probability': grouped['p'].mean(),
+        'observed_rate': grouped['y'].mean(),
+    }).reset_index()
+    table['bin_low'] = CALIBRATION_BINS[table['bin']]
+    table['bin_high'] = CALIBRATION_BINS[table['bin'] + 1]
+    return table.drop(columns='bin')
+
+
+def confusion_table(groups):
+    # (행 × 기준값) 예측 행렬을 한 번에 만들고 그룹별로 합산
+    thresholds = np.asarray(THRESHOLDS)
+    predicted = groups['p'].to_numpy()[:, None] >= thresholds[None, :]
+    actual = groups['y'].to_numpy()[:, None] == 1
+    cells = {
+        'tp': predicted & actual,
+        'fp': predicted & ~actual,
+        'fn': ~predicted & actual,
+        'tn': ~predicted & ~actual,
+    }
+    frames = []
+    keys = [groups['region'], groups['period']]
+    for i, threshold in enumerate(thresholds):
+        counts = pd.DataFrame({name: cell[:, i].astype(int) for name, cell in cells.items()}).groupby(keys).sum()
+        frames.append(counts.assign(threshold=threshold).reset_index())
+    table = pd.concat(frames, ignore_index=True)
+    table['precision'] = table['tp'] / (table['tp'] + table['fp']).replace(0, np.nan)
+    table['recall'] = table['tp'] / (table['tp'] + table['fn']).replace(0, np.nan)
+    table['accuracy'] = (table['tp'] + table['tn']) / table[['tp', 'fp', 'fn', 'tn']].sum(axis=1)
+    return table
+
+
+def roc_curve(df_prediction, region=None, period=None, period_kind='year'):
+    # 누적합으로 만든 ROC 곡선 (기준값을 높은 확률부터 내려가며)
+    groups = expand_groups(df_prediction, period_kind)
+    mask = (groups['region'] == (region or ALL)) & (groups['period'] == (period or ALL))
+    selected = groups[mask].sort_values('p', ascending=False)
+    y = selected['y'].to_numpy()
+    if y.sum() == 0 or y.sum() == len(y):
+        return pd.DataFrame(columns=['fpr', 'tpr', 'threshold'])
+    p = selected['p'].to_numpy()
+    last_of_ties = np.r_[p[1:] != p[:-1], True]
+    tps = np.cumsum(y)[last_of_ties]
+    fps = np.cumsum(1 - y)[last_of_ties]
+    return pd.DataFrame({
+        'fpr': np.r_[0, fps / fps[-1]],
+        'tpr': np.r_[0, tps / tps[-1]],
+        'threshold': np.r_[np.inf, p[last_of_ties]],
+    })
+
+
+def evaluate(df_prediction, period='year'):
+    groups = expand_groups(df_prediction, period)
+    return {
+        'summary': summary_table(groups),
+        'calibration': calibration_table(groups),
+        'confusion': confusion_table(groups),
+    }
@@ -0,0 +1,100 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+
+import crime_data
+
+# 현재 보기(create_map과 같은 필터)의 원자료를 청크 단위로 CSV/Parquet에 기록.
+# 원본 CSV를 청크로 읽어 정제·필터링한 뒤 바로 쓰므로 전체 행을 메모리에 올리지 않는다.
+DATASET_LABELS = {name: dataset.label for name, dataset in crime_data.DATASETS.items()}
+FORMATS = ('csv', 'parquet')
+CHUNKSIZE = 100_000
+
+
+def parquet_available():
+    # pyarrow를 실제로 불러오지 않고 설치 여부만 확인
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def iter_view_chunks(dataset, view_type, selected_year=None, selected_date=None, path=None, chunksize=CHUNKSIZE):
+    # 정제 + 보기 필터를 거친 비어 있지 않은 청크만 내보내는 제너레이터
+    for chunk in crime_data.read_dataset(dataset, path, chunksize=chunksize):
+        chunk = crime_data.filter_view(chunk, view_type, selected_year, selected_date)
+        if not chunk.empty:
+            yield chunk
+
+
+def write_csv(chunks, out):
+    # out: 경로 또는 바이너리 파일 객체. 엑셀에서 바로 열리도록 utf-8-sig
+    rows = 0
+    with (open(out, 'wb') if isinstance(out, str) else contextlib.nullcontext(out)) as f:
+        text = io.TextIOWrapper(f, encoding='utf-8-sig', newline='', write_through=True)
+        try:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(text, index=False, header=(i == 0))
+                rows += len(chunk)
+        finally:
+            text.detach()
+    return rows
+
+
+def write_parquet(chunks, out):
+    # 첫 청크의 스키마로 ParquetWriter를 열고 청크마다 row group 하나씩 기록
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet 내보내기에는 pyarrow가 필요합니다 (pip install pyarrow)")
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema)
+            else:
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def export_view(out, dataset, fmt, view_type, selected_year=None, selected_date=None, path=None, chunksize=CHUNKSIZE):
+    if fmt not in FORMATS:
+        raise ValueError(f"형식은 {FORMATS} 중 하나여야 합니다")
+    chunks = iter_view_chunks(dataset, view_type, selected_year, selected_date, path, chunksize)
+    return write_parquet(chunks, out) if fmt == 'parquet' else write_csv(chunks, out)
+
+
+def export_filename(dataset, fmt, view_type, selected_year=None, selected_date=None):
+    if view_type == "일별" or (view_type == "예측" and selected_date is not None):
+        period = selected_date.strftime('%Y-%m-%d')
+    elif view_type in ("년도별", "예측"):
+        period = str(selected_year)
+    else:
+        period = 'all'
+    return f"{dataset}_{period}.{fmt}"
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="현재 보기의 원자료를 CSV/Parquet으로 내보내기")
+    parser.add_argument('--dataset', choices=list(DATASET_LABELS), default='crime')
+    parser.add_argument('--view', choices=['전체 데이터', '년도별', '일별', '예측'], default='전체 데이터')
+    parser.add_argument('--year', type=int)
+    parser.add_argument('--date', help="YYYY-MM-DD (일별, 예측 일별)")
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--path', help="원본 CSV 경로 (기본: 데이터셋 기본 경로)")
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    selected_date = pd.Timestamp(args.date) if args.date else None
+    output = args.output or export_filename(args.dataset, args.format, args.view, args.year, selected_date)
+    rows = export_view(output, args.dataset, args.format, args.view, args.year, selected_date, args.path, args.chunksize)
+    print(f"{output}: {rows}행")
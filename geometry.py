@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# 도 경계 GeoJSON을 geopandas 없이 순수 JSON(dict)으로 다룬다.
+# folium.GeoJson은 dict를 그대로 직렬화하므로 GIS 라이브러리가 필요 없음.
+# 공간 연산이 실제로 필요할 때만 to_geodataframe()에서 geopandas를 로드한다.
+GEOJSON_URL = "https://raw.githubusercontent.com/southkorea/southkorea-maps/master/gadm/json/skorea-provinces-geo.json"
+LOCAL_GEOJSON_PATH = "./data/geo/skorea-provinces-geo.json"
+COORD_PRECISION = 5  # 소수 5자리 ≈ 1m, 지도 표시에 충분
+
+# 시군구 경계: 전체 파일을 도 단위로 미리 쪼개 두고, 선택된 도의 파일만 읽는다.
+# 통계청 2013 시군구 코드 앞 2자리가 도 코드.
+DISTRICT_GEOJSON_URL = "https://raw.githubusercontent.com/southkorea/southkorea-maps/master/kostat/2013/json/skorea_municipalities_geo_simple.json"
+LOCAL_DISTRICT_DIR = "./data/geo/districts"
+PROVINCE_CODES = {
+    '11': '서울특별시', '21': '부산광역시', '22': '대구광역시', '23': '인천광역시', '24': '광주광역시',
+    '25': '대전광역시', '26': '울산광역시', '29': '세종특별자치시', '31': '경기도', '32': '강원도',
+    '33': '충청북도', '34': '충청남도', '35': '전라북도', '36': '전라남도', '37': '경상북도',
+    '38': '경상남도', '39': '제주도'
+}
+PROVINCE_TO_CODE = {name: code for code, name in PROVINCE_CODES.items()}
+
+
+def round_coords(coords, precision=COORD_PRECISION):
+    if isinstance(coords[0], (int, float)):
+        return [round(c, precision) for c in coords]
+    return [round_coords(c, precision) for c in coords]
+
+
+def compact_geojson(geo, keep=('NAME_1',)):
+    # 표시에 쓰는 속성만 남기고 좌표 정밀도를 줄인 FeatureCollection
+    features = []
+    for feature in geo.get('features', []):
+        geometry = feature.get('geometry') or {}
+        properties = feature.get('properties', {})
+        features.append({
+            'type': 'Feature',
+            'properties': {key: properties.get(key) for key in keep},
+            'geometry': {'type': geometry.get('type'), 'coordinates': round_coords(geometry['coordinates'])} if geometry.get('coordinates') else geometry,
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def save_geojson(geo, path=LOCAL_GEOJSON_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(geo, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def fetch_geojson(url=GEOJSON_URL, timeout=5):
+    import requests
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def load_province_geojson(path=LOCAL_GEOJSON_PATH, url=GEOJSON_URL, timeout=5):
+    # 로컬 번들 우선, 없으면 한 번 내려받아 압축 형태로 저장
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    geo = compact_geojson(fetch_geojson(url, timeout))
+    try:
+        save_geojson(geo, path)
+    except OSError:
+        pass
+    return geo
+
+
+def split_districts(geo, directory=LOCAL_DISTRICT_DIR):
+    # 전체 시군구 파일을 도 코드별 파일로 분할 저장
+    by_province = {}
+    for feature in compact_geojson(geo, keep=('code', 'name'))['features']:
+        code = str(feature['properties']['code'])[:2]
+        by_province.setdefault(code, []).append(feature)
+    for code, features in by_province.items():
+        save_geojson({'type': 'FeatureCollection', 'features': features}, os.path.join(directory, f"{code}.json"))
+    return sorted(by_province)
+
+
+def load_district_geojson(province, directory=LOCAL_DISTRICT_DIR, url=DISTRICT_GEOJSON_URL, timeout=10):
+    # 선택된 도의 시군구 경계만 로드 (분할 번들이 없으면 한 번 내려받아 분할)
+    # 오프라인 배포는 `python geometry.py --fetch`로 번들을 미리 만들어 둬야 한다
+    code = PROVINCE_TO_CODE.get(province)
+    if code is None:
+        return empty_geojson()
+    path = os.path.join(directory, f"{code}.json")
+    if not os.path.exists(path):
+        try:
+            district_geo = fetch_geojson(url, timeout)
+        except Exception as e:
+            raise OSError(f"시군구 경계 번들 없음({path})이고 내려받기 실패: {e} (python geometry.py --fetch로 미리 받아 두세요)") from e
+        split_districts(district_geo, directory)
+    if not os.path.exists(path):
+        return empty_geojson()
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def normalize_district_name(name):
+    return str(name).replace(' ', '')
+
+
+def match_districts(district, feature_names):
+    # 사건의 '지역'(예: '서울시 강남구', '부천시 오정구', '평택시')을 시군구 경계 이름에 대응
+    # 구 단위가 없으면 시 이름으로 시작하는 경계 전체에 대응
+    tokens = str(district).split()
+    normalized = {normalize_district_name(name): name for name in feature_names}
+    candidates = [''.join(tokens), ''.join(tokens[1:]), tokens[-1] if tokens else '']
+    for candidate in candidates:
+        if candidate and candidate in normalized:
+            return [normalized[candidate]]
+    for token in reversed(tokens):
+        prefixed = [name for key, name in normalized.items() if key.startswith(token)]
+        if prefixed:
+            return prefixed
+    return []
+
+
+def attach_district_counts(geo, district_counts):
+    # 시군구 경계에 건수 속성(count)을 붙인 새 FeatureCollection과, 한 경계로 정해지지 않은 건수
+    # (예: 구가 나뉜 시의 '수원시 행궁동')는 여러 구에 중복 집계하지 않고 따로 돌려준다
+    names = [feature['properties']['name'] for feature in geo['features']]
+    counts = dict.fromkeys(names, 0)
+    unassigned = 0
+    for district, count in district_counts.items():
+        matched = match_districts(district, names)
+        if len(matched) == 1:
+            counts[matched[0]] += int(count)
+        else:
+            unassigned += int(count)
+    features = [{**feature, 'properties': {**feature['properties'], 'count': counts[feature['properties']['name']]}}
+                for feature in geo['features']]
+    return {'type': 'FeatureCollection', 'features': features}, unassigned
+
+
+def geojson_bounds(geo):
+    # [[남, 서], [북, 동]] (folium fit_bounds 형식)
+    lons, lats = [], []
+
+    def walk(coords):
+        if isinstance(coords[0], (int, float)):
+            lons.append(coords[0])
+            lats.append(coords[1])
+        else:
+            for c in coords:
+                walk(c)
+
+    for feature in geo.get('features', []):
+        if (feature.get('geometry') or {}).get('coordinates'):
+            walk(feature['geometry']['coordinates'])
+    if not lons:
+        return None
+    return [[min(lats), min(lons)], [max(lats), max(lons)]]
+
+
+def empty_geojson():
+    return {'type': 'FeatureCollection', 'features': []}
+
+
+def to_geodataframe(geo):
+    # 공간 연산(면적, 포함 관계 등)이 필요할 때만 geopandas 로드
+    import geopandas as gpd
+    return gpd.GeoDataFrame.from_features(geo['features'], crs='EPSG:4326')
+
+
+BENCH_GEOPANDAS = """
+import time
+t = time.perf_counter()
+import geopandas as gpd
+from io import BytesIO
+with open({path!r}, 'rb') as f:
+    gpd.read_file(BytesIO(f.read()))
+print(time.perf_counter() - t)
+"""
+
+BENCH_JSON = """
+import time
+t = time.perf_counter()
+import geometry
+geometry.load_province_geojson({path!r})
+print(time.perf_counter() - t)
+"""
+
+
+def bench(path, repeat=3):
+    # 새 프로세스에서 import + 로드 시간을 측정 (콜드 스타트 기준)
+    results = {}
+    for name, code in [('geopandas', BENCH_GEOPANDAS), ('json', BENCH_JSON)]:
+        times = []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, '-c', code.format(path=path)], capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+            if out.returncode != 0:
+                times = None
+                break
+            times.append(float(out.stdout.strip()))
+        results[name] = min(times) if times else None
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="도 경계 GeoJSON 번들 생성 및 시작 시간 측정")
+    parser.add_argument('--source', help="원본 GeoJSON 파일 (없으면 URL에서 내려받음)")
+    parser.add_argument('--output', default=LOCAL_GEOJSON_PATH)
+    parser.add_argument('--bench', action='store_true', help="geopandas 경로와 JSON 경로의 로드 시간 비교")
+    parser.add_argument('--districts', action='store_true', help="시군구 경계를 도 단위 파일로 분할 저장")
+    parser.add_argument('--district-source', help="원본 시군구 GeoJSON 파일 (없으면 URL에서 내려받음)")
+    parser.add_argument('--fetch', action='store_true',
+                        help="도/시군구 경계를 모두 내려받아 data/geo에 번들 (배포 전 한 번, 이후 오프라인 실행 가능)")
+    args = parser.parse_args()
+
+    if args.districts or args.fetch:
+        if args.district_source:
+            with open(args.district_source, encoding='utf-8') as f:
+                district_geo = json.load(f)
+        else:
+            district_geo = fetch_geojson(DISTRICT_GEOJSON_URL, timeout=30)
+        codes = split_districts(district_geo)
+        print(f"시군구 번들: {LOCAL_DISTRICT_DIR} ({len(codes)}개 도)")
+
+    if args.source:
+        with open(args.source, encoding='utf-8') as f:
+            save_geojson(compact_geojson(json.load(f)), args.output)
+    elif args.fetch or not os.path.exists(args.output):
+        save_geojson(compact_geojson(fetch_geojson()), args.output)  # --fetch면 기존 번들도 새로 받은 것으로 교체
+    print(f"번들: {args.output} ({os.path.getsize(args.output) / 1024:.1f} KB)")
+
+    if args.bench:
+        for name, seconds in bench(args.output).items():
+            print(f"{name:>10}: {'실패' if seconds is None else f'{seconds * 1000:.0f} ms'}")
@@ -0,0 +1,260 @@
+import concurrent.futures
+import math
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+
+from density import KOREA_BOUNDS
+
+# 시공간 핫스팟 분석: 사건을 (기간 × 위도 격자 × 경도 격자) 건수 큐브로 만든 뒤
+#   - Getis-Ord Gi*: 주변 격자(±spatial_radius)와 이전 기간(time_lag개)을 합친 이웃 합의 z 점수
+#     정규 근사가 성립하지 않는 희소한 격자(이웃 사건 수/기대 건수 부족)는 검정하지 않고,
+#     검정한 격자 전체에 Benjamini–Hochberg FDR 보정을 적용한다 (사건 1건이 주변 격자를 모두 유의하게 만들지 않도록)
+#   - 시공간 스캔 통계: 정사각 공간 창 × 연속 기간 창(원기둥)의 시공간 순열 모형 로그우도비,
+#     유의성은 사건의 기간을 섞는 몬테카를로 반복(프로세스 병렬)으로 계산
+# 모든 창 합계는 축별 누적합으로 한 번에 계산하므로 기간/격자 수에 대해 선형이다.
+GRAINS = {'month': 'M', 'year': 'Y'}
+GI_BINS = [(2.576, 3, '99%'), (1.960, 2, '95%'), (1.645, 1, '90%')]  # (z, 등급, 신뢰수준)
+MIN_NEIGHBOR_COUNT = 3  # 이웃 합(자기 포함)이 이보다 적은 격자는 검정하지 않음
+MIN_EXPECTED = 1.0  # 이웃 기대 건수(평균 × 이웃 격자 수)가 이보다 작으면 검정하지 않음
+
+
+def grid_counts(lat, lon, dates, bounds=KOREA_BOUNDS, cell_deg=0.2, grain='month'):
+    # (cube[기간, 행, 열], 기간 PeriodIndex, 사건별 (기간, 행, 열) 인덱스)
+    (south, west), (north, east) = bounds
+    rows = int(np.ceil((north - south) / cell_deg))
+    cols = int(np.ceil((east - west) / cell_deg))
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    periods = pd.DatetimeIndex(dates).to_period(GRAINS[grain])
+    inside = (lat >= south) & (lat < north) & (lon >= west) & (lon < east) & ~pd.isna(periods)
+    lat, lon, periods = lat[inside], lon[inside], periods[inside]
+    if len(periods) == 0:
+        return np.zeros((0, rows, cols)), pd.PeriodIndex([], freq=GRAINS[grain]), np.zeros((0, 3), dtype=int)
+    period_index = pd.period_range(periods.min(), periods.max(), freq=GRAINS[grain])
+    cases = np.column_stack([
+        (periods - period_index[0]).map(lambda offset: offset.n).to_numpy(dtype=int),
+        np.minimum(((lat - south) / cell_deg).astype(int), rows - 1),
+        np.minimum(((lon - west) / cell_deg).astype(int), cols - 1),
+    ])
+    cube = np.zeros((len(period_index), rows, cols))
+    np.add.at(cube, (cases[:, 0], cases[:, 1], cases[:, 2]), 1)
+    return cube, period_index, cases
+
+
+def window_sum(a, axis, before, after):
+    # 각 위치에서 [i - before, i + after] 구간 합 (경계에서는 잘린 구간)
+    n = a.shape[axis]
+    cs = np.concatenate([np.zeros_like(np.take(a, [0], axis=axis)), np.cumsum(a, axis=axis)], axis=axis)
+    idx = np.arange(n)
+    upper = np.take(cs, np.minimum(idx + after + 1, n), axis=axis)
+    lower = np.take(cs, np.maximum(idx - before, 0), axis=axis)
+    return upper - lower
+
+
+def box_sum(cube, spatial_radius, time_before, time_after=0):
+    total = window_sum(cube, 0, time_before, time_after)
+    total = window_sum(total, 1, spatial_radius, spatial_radius)
+    return window_sum(total, 2, spatial_radius, spatial_radius)
+
+
+def study_mask(cube):
+    # 분석 영역: 한 번이라도 사건이 있었던 격자 (바다/무사건 격자가 평균을 끌어내리지 않도록)
+    return cube.sum(axis=0) > 0
+
+
+def getis_ord_gi_star(cube, mask=None, spatial_radius=1, time_lag=1):
+    # 이진 가중치(자기 자신 포함) Gi* z 점수, 분석 영역 밖은 NaN
+    if mask is None:
+        mask = study_mask(cube)
+    domain = np.broadcast_to(mask, cube.shape).astype(float)
+    x = cube * domain
+    n = domain.sum()
+    if n < 2:
+        return np.full(cube.shape, np.nan)
+    mean = x.sum() / n
+    std = np.sqrt(max((x ** 2).sum() / n - mean ** 2, 0))
+    weights = box_sum(domain, spatial_radius, time_lag)
+    neighbor_sum = box_sum(x, spatial_radius, time_lag)
+    denominator = std * np.sqrt(np.clip(n * weights - weights ** 2, 0, None) / (n - 1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (neighbor_sum - mean * weights) / denominator
+    return np.where(domain.astype(bool) & (denominator > 0), z, np.nan)
+
+
+def testable(cube, mask=None, spatial_radius=1, time_lag=1, min_count=MIN_NEIGHBOR_COUNT, min_expected=MIN_EXPECTED):
+    # Gi*를 검정할 격자: 분석 영역 안이면서 이웃 사건 수와 이웃 기대 건수가 기준 이상
+    if mask is None:
+        mask = study_mask(cube)
+    domain = np.broadcast_to(mask, cube.shape).astype(float)
+    n = domain.sum()
+    mean = (cube * domain).sum() / n if n else 0.0
+    expected = mean * box_sum(domain, spatial_radius, time_lag)
+    return domain.astype(bool) & (box_sum(cube * domain, spatial_radius, time_lag) >= min_count) & (expected >= min_expected)
+
+
+def gi_p_values(z):
+    # 양측 정규 p값
+    return np.frompyfunc(math.erfc, 1, 1)(np.abs(np.asarray(z, dtype=float)) / math.sqrt(2)).astype(float)
+
+
+def fdr_cutoff(p_values, alpha):
+    # Benjamini–Hochberg: p_(k) <= k/m·alpha를 만족하는 가장 큰 p_(k) (없으면 -1, 아무것도 기각하지 않음)
+    p_values = np.sort(p_values[np.isfinite(p_values)])
+    passed = np.nonzero(p_values <= np.arange(1, len(p_values) + 1) / max(len(p_values), 1) * alpha)[0]
+    return p_values[passed[-1]] if len(passed) else -1.0
+
+
+def gi_bin(z, tested=None):
+    # ArcGIS Gi_Bin(FDR 보정)과 같은 등급 (3/2/1 = 99/95/90% 핫스팟, 음수는 콜드스팟)
+    # tested 밖(NaN 포함)은 0, 신뢰수준마다 검정한 격자 전체로 FDR 기준 p값을 다시 구한다
+    z = np.asarray(z, dtype=float)
+    tested = np.isfinite(z) if tested is None else tested & np.isfinite(z)
+    p_values = np.full(z.shape, np.nan)
+    p_values[tested] = gi_p_values(z[tested])
+    bins = np.zeros(z.shape, dtype=int)
+    for threshold, level, _ in reversed(GI_BINS):
+        significant = tested & (p_values <= fdr_cutoff(p_values[tested], math.erfc(threshold / math.sqrt(2))))
+        bins[significant & (z > 0)] = level
+        bins[significant & (z < 0)] = -level
+    return bins
+
+
+def scan_llr(cube, mask, radii, lengths):
+    # 분석 영역 격자를 중심으로 한 모든 (반경, 기간 길이, 시작 기간, 중심) 원기둥의 로그우도비
+    # shape: (반경, 길이, 기간, 중심 수), 중심 순서는 np.argwhere(mask)
+    total = cube.sum()
+    zone_totals = cube.sum(axis=0)
+    period_totals = cube.sum(axis=(1, 2))
+    result = np.zeros((len(radii), len(lengths), cube.shape[0], int(mask.sum())))
+    if total == 0:
+        return result
+    for i, radius in enumerate(radii):
+        zone = window_sum(window_sum(zone_totals, 0, radius, radius), 1, radius, radius)[mask]
+        spatial = window_sum(window_sum(cube, 1, radius, radius), 2, radius, radius)[:, mask]
+        for j, length in enumerate(lengths):
+            observed = window_sum(spatial, 0, 0, length - 1)
+            expected = zone[None, :] * window_sum(period_totals, 0, 0, length - 1)[:, None] / total
+            with np.errstate(invalid='ignore', divide='ignore'):
+                llr = (observed * np.log(observed / expected)
+                       + (total - observed) * np.log((total - observed) / (total - expected)))
+            result[i, j] = np.where((observed > expected) & (expected > 0), np.nan_to_num(llr), 0)
+    return result
+
+
+def _replicate_max_llr(args):
+    # 몬테카를로 반복 묶음: 사건 위치는 두고 기간만 섞어 최대 로그우도비 분포를 만든다
+    cases, shape, mask, radii, lengths, seeds = args
+    maxima = []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        shuffled = cases.copy()
+        shuffled[:, 0] = rng.permutation(cases[:, 0])
+        cube = np.zeros(shape)
+        np.add.at(cube, (shuffled[:, 0], shuffled[:, 1], shuffled[:, 2]), 1)
+        maxima.append(scan_llr(cube, mask, radii, lengths).max())
+    return maxima
+
+
+def monte_carlo_maxima(cases, shape, mask, radii, lengths, replicates=99, n_jobs=None, seed=0):
+    seeds = np.random.SeedSequence(seed).generate_state(replicates)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or replicates < 2 * n_jobs:
+        return np.array(_replicate_max_llr((cases, shape, mask, radii, lengths, seeds)))
+    batches = [(cases, shape, mask, radii, lengths, batch) for batch in np.array_split(seeds, n_jobs)]
+    # spawn: Streamlit/서버 스레드가 있는 프로세스를 fork하지 않도록
+    with concurrent.futures.ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return np.concatenate([np.asarray(m) for m in pool.map(_replicate_max_llr, batches)])
+
+
+def space_time_scan(cube, cases, mask=None, radii=(0, 1, 2), lengths=(1, 3, 6, 12), top=5, replicates=99, n_jobs=None, seed=0):
+    # 겹치지 않는 상위 원기둥 [(반경, 길이, 시작 기간, 행, 열, 관측, 기대, llr, p)]
+    if mask is None:
+        mask = study_mask(cube)
+    llr = scan_llr(cube, mask, radii, lengths)
+    flat = llr.ravel()
+    candidates = np.argsort(flat)[::-1][:max(top * 200, 1000)]
+    candidates = candidates[flat[candidates] > 0]
+    maxima = monte_carlo_maxima(cases, cube.shape, mask, radii, lengths, replicates, n_jobs, seed) if replicates else None
+
+    total = cube.sum()
+    zone_totals = cube.sum(axis=0)
+    period_totals = cube.sum(axis=(1, 2))
+    centers = np.argwhere(mask)
+    picked = []
+    for index in candidates:
+        i, j, t, k = np.unravel_index(index, llr.shape)
+        r, c = centers[k]
+        radius, length = radii[i], lengths[j]
+        t_end = min(t + length, cube.shape[0])
+        box = (t, t_end, max(r - radius, 0), r + radius + 1, max(c - radius, 0), c + radius + 1)
+        if any(_overlaps(box, other['box']) for other in picked):
+            continue
+        observed = cube[box[0]:box[1], box[2]:box[3], box[4]:box[5]].sum()
+        expected = zone_totals[box[2]:box[3], box[4]:box[5]].sum() * period_totals[box[0]:box[1]].sum() / total
+        p_value = (1 + (maxima >= flat[index]).sum()) / (len(maxima) + 1) if maxima is not None else np.nan
+        picked.append({'box': box, 'radius': radius, 'length': length, 'observed': int(observed),
+                       'expected': float(expected), 'llr': float(flat[index]), 'p_value': float(p_value)})
+        if len(picked) == top:
+            break
+    return picked
+
+
+def _overlaps(a, b):
+    return all(a[k] < b[k + 1] and b[k] < a[k + 1] for k in (0, 2, 4))
+
+
+def detect_hotspots(df_crime, cell_deg=0.2, grain='year', spatial_radius=1, time_lag=1, replicates=99, n_jobs=None,
+                    bounds=KOREA_BOUNDS):
+    # 지도 레이어용 결과: Gi* 유의 격자 표와 스캔 군집 표 (격자 경계 좌표 포함)
+    # 유의 격자 중 그 기간 사건이 없는 격자(주변 사건 때문에 유의해진 빈 격자)는 표에서 뺀다
+    data = df_crime.dropna(subset=['date', '위도', '경도'])
+    cube, periods, cases = grid_counts(data['위도'], data['경도'], data['date'], bounds, cell_deg, grain)
+    (south, west), _ = bounds
+    hot_columns = ['period', 'start', 'end', 'south', 'west', 'north', 'east', 'count', 'z', 'bin']
+    if len(periods) == 0:
+        return {'cells': pd.DataFrame(columns=hot_columns), 'clusters': pd.DataFrame(), 'cell_deg': cell_deg, 'grain': grain}
+
+    mask = study_mask(cube)
+    z = getis_ord_gi_star(cube, mask, spatial_radius, time_lag)
+    bins = gi_bin(z, testable(cube, mask, spatial_radius, time_lag))
+    t, r, c = np.nonzero((bins > 0) & (cube > 0))
+    cells = pd.DataFrame({
+        'period': periods[t].astype(str),
+        'start': periods[t].start_time,
+        'end': periods[t].end_time.normalize(),
+        'south': south + r * cell_deg, 'west': west + c * cell_deg,
+        'north': south + (r + 1) * cell_deg, 'east': west + (c + 1) * cell_deg,
+        'count': cube[t, r, c].astype(int), 'z': z[t, r, c], 'bin': bins[t, r, c],
+    }, columns=hot_columns)
+
+    clusters = []
+    for cluster in space_time_scan(cube, cases, mask, replicates=replicates, n_jobs=n_jobs):
+        t0, t1, r0, r1, c0, c1 = cluster.pop('box')
+        clusters.append({
+            **cluster,
+            'start': periods[t0].start_time, 'end': periods[t1 - 1].end_time.normalize(),
+            'south': south + r0 * cell_deg, 'west': west + c0 * cell_deg,
+            'north': south + r1 * cell_deg, 'east': west + c1 * cell_deg,
+        })
+    return {'cells': cells, 'clusters': pd.DataFrame(clusters), 'cell_deg': cell_deg, 'grain': grain}
+
+
+def overlapping(table, start=None, end=None):
+    # 보기 기간과 겹치는 핫스팟/군집 행
+    if table.empty:
+        return table
+    mask = pd.Series(True, index=table.index)
+    if start is not None:
+        mask &= table['end'] >= pd.Timestamp(start).normalize()
+    if end is not None:
+        mask &= table['start'] <= pd.Timestamp(end).normalize()
+    return table[mask]
+
+
+def view_hotspots(result, start=None, end=None):
+    # 보기 기간의 핫스팟: 격자마다 z가 가장 큰 기간 하나만 남기고, 겹치는 스캔 군집은 그대로
+    cells = overlapping(result['cells'], start, end)
+    cells = cells.sort_values('z').drop_duplicates(['south', 'west'], keep='last')
+    return {'cells': cells, 'clusters': overlapping(result['clusters'], start, end)}
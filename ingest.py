@@ -0,0 +1,310 @@
+import argparse
+import io
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import count_cube
+import crime_data
+import loader
+
+# 추가 전용(append-only) 적재: 새 배치를 검증해 정상 행만 원본 CSV 끝에 덧붙이고,
+# 잘못된 행은 사유와 함께 격리 파일로 보낸다. 앱 쪽 IncrementalStore는 마지막으로 읽은
+# 바이트 위치 이후만 읽어 프레임·날짜 목록·건수 큐브를 갱신하므로 비용은 배치 크기에 비례한다.
+QUARANTINE_DIR = "./data/quarantine"
+FEED_DIR = "./data/feed"  # 실시간 모드: data/feed/<데이터셋>/*.csv 로 떨어지는 배치
+LINE_TERMINATOR = '\r\n'  # 원본 CSV와 동일
+KOREA_LAT = (33.0, 38.7)
+KOREA_LON = (124.5, 131.0)
+
+# 데이터셋별 필수 열
+REQUIRED_COLUMNS = {name: list(dataset.schema) for name, dataset in crime_data.DATASETS.items()}
+
+
+def numeric_columns(dataset, columns):
+    # 숫자여야 하는 열 (빈 값은 결측으로 허용): 지표는 date 외 전부, 예측은 발생 여부/건수
+    if dataset == 'indicator':
+        return [c for c in columns if c != 'date']
+    if dataset == 'prediction':
+        return [c for c in ('crime_occurred', 'crime_count') if c in columns]
+    return []
+
+
+def invalid_reasons(dataset, raw):
+    # 행별 격리 사유 ('' 이면 정상). raw는 문자열 그대로 읽은 배치
+    reasons = pd.Series('', index=raw.index)
+
+    def flag(mask, reason):
+        mask = mask & (reasons == '')
+        reasons[mask] = reason
+
+    missing = [c for c in REQUIRED_COLUMNS[dataset] if c not in raw.columns]
+    if missing:
+        reasons[:] = f"필수 열 없음: {', '.join(missing)}"
+        return reasons
+
+    if dataset == 'crime':
+        lat = pd.to_numeric(raw['위도'], errors='coerce')
+        lon = pd.to_numeric(raw['경도'], errors='coerce')
+        flag(pd.to_datetime(raw['날짜'], errors='coerce').isna(), '날짜 형식 오류')
+        flag(lat.isna() | lon.isna(), '좌표 형식 오류')
+        flag(~lat.between(*KOREA_LAT) | ~lon.between(*KOREA_LON), '좌표 범위 밖')
+        flag(~raw['도단위'].map(crime_data.normalize_province).isin(crime_data.REGIONS), '알 수 없는 도단위')
+    elif dataset == 'indicator':
+        dates = pd.to_datetime(raw['date'], errors='coerce')
+        flag(dates.isna(), '날짜 형식 오류')
+        flag(dates.dt.year > crime_data.INDICATOR_LAST_YEAR, f"{crime_data.INDICATOR_LAST_YEAR}년 이후 날짜")
+    else:
+        probability = pd.to_numeric(raw['crime_probability'], errors='coerce')
+        flag(pd.to_datetime(raw['date'], errors='coerce').isna(), '날짜 형식 오류')
+        flag(~raw['도단위'].isin(crime_data.REGIONS), '알 수 없는 도단위')
+        flag(~probability.between(0, 1), '확률 범위 오류')
+    # 숫자 열에 숫자가 아닌 값이 섞이면 열 전체가 object가 되어 점수 계산이 깨지므로 행 단위로 격리
+    for column in numeric_columns(dataset, raw.columns):
+        values = raw[column].astype(str).str.strip()
+        flag((values != '') & pd.to_numeric(values, errors='coerce').isna(), f"숫자 형식 오류: {column}")
+    return reasons
+
+
+def stored_columns(path):
+    with open(path, encoding=crime_data.CSV_ENCODING) as f:
+        return f.readline().rstrip('\r\n').split(',')
+
+
+def write_quarantine(dataset, rows, source, quarantine_dir=QUARANTINE_DIR):
+    if rows.empty:
+        return None
+    os.makedirs(quarantine_dir, exist_ok=True)
+    path = os.path.join(quarantine_dir, f"{dataset}.csv")
+    rows = rows.assign(원본=source, 격리시각=datetime.now().isoformat(timespec='seconds'))
+    rows.to_csv(path, mode='a', index=False, header=not os.path.exists(path), encoding='utf-8-sig')
+    return path
+
+
+def append_rows(path, rows):
+    # 원본 CSV 끝에 문자열 그대로 덧붙임 (마지막 줄바꿈이 없으면 먼저 추가)
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+        else:
+            needs_newline = False
+        text = rows.to_csv(index=False, header=False, lineterminator=LINE_TERMINATOR)
+        f.write(((LINE_TERMINATOR if needs_newline else '') + text).encode(crime_data.CSV_ENCODING))
+
+
+def ingest(dataset, batch, path=None, encoding=crime_data.CSV_ENCODING, quarantine_dir=QUARANTINE_DIR):
+    # batch: CSV 경로 또는 DataFrame. 반환: {'appended', 'quarantined', 'quarantine_path'}
+    path = path or crime_data.DATASETS[dataset].path
+    if isinstance(batch, str):
+        source = batch
+        raw = pd.read_csv(batch, encoding=encoding, dtype=str, keep_default_na=False)
+    else:
+        source = '<DataFrame>'
+        raw = batch.astype(str)
+    columns = stored_columns(path)
+    reasons = invalid_reasons(dataset, raw)
+    valid = raw[reasons == '']
+    quarantined = raw[reasons != ''].assign(사유=reasons[reasons != ''])
+
+    if not valid.empty:
+        append_rows(path, valid.reindex(columns=columns, fill_value=''))
+    return {
+        'appended': int(len(valid)),
+        'quarantined': int(len(quarantined)),
+        'quarantine_path': write_quarantine(dataset, quarantined, source, quarantine_dir),
+    }
+
+
+def audit(dataset, path=None, chunksize=100_000, quarantine_dir=QUARANTINE_DIR):
+    # 이미 저장된 파일에서 정제 단계가 조용히 버리던 행을 격리 파일로 보고 (원본은 그대로)
+    path = path or crime_data.DATASETS[dataset].path
+    count = 0
+    for raw in pd.read_csv(path, encoding=crime_data.CSV_ENCODING, dtype=str, keep_default_na=False, chunksize=chunksize):
+        reasons = invalid_reasons(dataset, raw)
+        rows = raw[reasons != ''].assign(사유=reasons[reasons != ''])
+        write_quarantine(dataset, rows, path, quarantine_dir)
+        count += len(rows)
+    return count
+
+
+class TailReader:
+    # CSV를 마지막으로 읽은 바이트 위치부터 읽는다 (완성된 줄까지만)
+    def __init__(self, dataset, path=None):
+        self.dataset = dataset
+        self.path = path or crime_data.DATASETS[dataset].path
+        self.clean = crime_data.DATASETS[dataset].clean
+        self.offset = 0
+        self.columns = None
+
+    def read(self):
+        # (정제된 새 행, 처음부터 다시 읽었는지, 다음 위치, 열 이름). 상태는 commit()에서만 바꾼다
+        # (제한 시간을 넘겨 버려진 읽기가 위치를 옮기지 않도록)
+        offset, columns = self.offset, self.columns
+        size = os.path.getsize(self.path)
+        reset = size < offset or columns is None
+        if reset:
+            offset = 0
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read(size - offset)
+        end = chunk.rfind(b'\n') + 1
+        if reset and end < len(chunk):
+            end = len(chunk)  # 처음 읽을 때는 줄바꿈 없는 마지막 줄도 포함
+        if end == 0:
+            return None, reset, offset, columns
+        if reset:
+            raw = pd.read_csv(io.BytesIO(chunk[:end]), encoding=crime_data.CSV_ENCODING)
+            crime_data.DATASETS[self.dataset].check_columns(raw.columns)
+            columns = list(raw.columns)
+        else:
+            raw = pd.read_csv(io.BytesIO(chunk[:end]), encoding=crime_data.CSV_ENCODING, header=None, names=columns)
+        return self.clean(raw), reset, offset + end, columns
+
+    def commit(self, offset, columns):
+        self.offset, self.columns = offset, columns
+
+
+class FeedWatcher:
+    # 피드 디렉터리에 떨어진 배치 파일을 적재하고 processed/ 로 옮긴다 (큐 대용)
+    # 쓰는 중인 파일을 읽지 않도록 settle_seconds 동안 바뀌지 않은 파일만 처리
+    def __init__(self, directory=FEED_DIR, paths=None, settle_seconds=1.0, quarantine_dir=QUARANTINE_DIR):
+        self.directory = directory
+        self.paths = paths or {}
+        self.settle_seconds = settle_seconds
+        self.quarantine_dir = quarantine_dir
+        self.lock = threading.Lock()
+        self.history = []
+
+    def pending(self):
+        now = time.time()
+        files = []
+        for dataset in crime_data.DATASETS:
+            folder = os.path.join(self.directory, dataset)
+            if not os.path.isdir(folder):
+                continue
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith('.csv') and now - entry.stat().st_mtime >= self.settle_seconds:
+                        files.append((entry.stat().st_mtime, dataset, entry.path))
+        return [(dataset, path) for _, dataset, path in sorted(files)]
+
+    def poll(self):
+        # 이번에 처리한 배치 [(데이터셋, 파일 이름, ingest 결과)]
+        processed = []
+        with self.lock:
+            for dataset, path in self.pending():
+                # 읽을 수 없는 파일은 failed/ 로 옮겨 다음 갱신 때 같은 오류가 반복되지 않게 한다
+                try:
+                    result = ingest(dataset, path, self.paths.get(dataset), quarantine_dir=self.quarantine_dir)
+                    done_dir = os.path.join(os.path.dirname(path), 'processed')
+                except Exception as e:
+                    result = {'appended': 0, 'quarantined': 0, 'quarantine_path': None, 'error': str(e)}
+                    done_dir = os.path.join(os.path.dirname(path), 'failed')
+                os.makedirs(done_dir, exist_ok=True)
+                shutil.move(path, os.path.join(done_dir, os.path.basename(path)))
+                processed.append((dataset, os.path.basename(path), result))
+            self.history = (processed + self.history)[:50]
+        return processed
+
+
+class IncrementalStore:
+    # 세 데이터셋 프레임과 날짜 목록, 사건 건수 큐브를 추가분만으로 갱신 (스레드 안전)
+    # 데이터셋은 activate()로 요청된 것만 읽는다 (load=True면 셋 모두). 읽지 않은 데이터셋의 프레임은 None
+    def __init__(self, crime_path=crime_data.CRIME_PATH, indicator_path=crime_data.INDICATOR_PATH,
+                 prediction_path=crime_data.PREDICTION_PATH, load=True):
+        self.readers = {
+            'crime': TailReader('crime', crime_path),
+            'indicator': TailReader('indicator', indicator_path),
+            'prediction': TailReader('prediction', prediction_path),
+        }
+        self.frames = {}
+        self.dates = {}
+        self.cube = None
+        self.version = 0
+        self.errors = {}
+        self.active = set()
+        self.lock = threading.Lock()
+        if load:
+            self.activate(self.readers)
+            self.refresh()
+
+    def activate(self, names):
+        # 이후 refresh에서 읽을 데이터셋 추가 (한 번 활성화하면 계속 갱신)
+        with self.lock:
+            self.active.update(names)
+
+    def is_loaded(self, name):
+        return self.frames.get(name) is not None
+
+    @property
+    def loaded(self):
+        return bool(self.active) and all(self.is_loaded(name) for name in self.active)
+
+    def refresh(self, progress=None, timeout=None):
+        # 활성 데이터셋 파일을 동시에 읽고 끝나는 순서대로 반영. 반환: 새로 덧붙은 행 수 (데이터셋별)
+        # 실패하거나 timeout 초를 넘긴 데이터셋은 이전 상태를 유지하고 self.errors에 사유를 남긴다
+        # progress(name, rows, error)는 호출한 스레드에서 데이터셋마다 한 번 불린다
+        added = {}
+        with self.lock:
+            self.errors = {}
+            futures = {loader.submit(reader.read): name for name, reader in self.readers.items() if name in self.active}
+            for future, error in loader.as_completed(futures, timeout):
+                name = futures[future]
+                if error:
+                    self.errors[name] = error
+                    if progress:
+                        progress(name, None, error)
+                    continue
+                new, reset, offset, columns = future.result()
+                self.readers[name].commit(offset, columns)
+                if progress:
+                    progress(name, 0 if new is None else len(new), None)
+                if reset:
+                    self.frames[name] = new
+                    self.dates[name] = crime_data.unique_dates(new)
+                    if name == 'crime':
+                        self.cube = count_cube.CountCube(new)
+                elif new is not None and not new.empty:
+                    known = set(self.dates[name])
+                    new_dates = [date for date in new['date'].dt.normalize().unique() if date not in known]
+                    self.frames[name] = pd.concat([self.frames[name], new], ignore_index=True)
+                    self.dates[name] = sorted(self.dates[name] + new_dates)
+                    if name == 'crime':
+                        self.cube.extend(new)
+                else:
+                    continue
+                added[name] = len(new)
+            if added:
+                self.version += 1
+        return added
+
+    def data(self):
+        # crime_data.load_data와 같은 6-튜플 (읽지 않은 데이터셋은 None)
+        return (self.frames.get('crime'), self.dates.get('crime'), self.frames.get('indicator'), self.dates.get('indicator'),
+                self.frames.get('prediction'), self.dates.get('prediction'))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="새 사건/지표/예측 배치를 검증 후 원본 CSV에 추가")
+    parser.add_argument('dataset', choices=list(crime_data.DATASETS))
+    parser.add_argument('batch', nargs='?', help="추가할 CSV 배치 파일")
+    parser.add_argument('--path', help="저장된 원본 CSV (기본: 데이터셋 기본 경로)")
+    parser.add_argument('--encoding', default=crime_data.CSV_ENCODING, help="배치 파일 인코딩")
+    parser.add_argument('--quarantine-dir', default=QUARANTINE_DIR)
+    parser.add_argument('--audit', action='store_true', help="저장된 파일의 불량 행을 격리 파일로 보고")
+    args = parser.parse_args()
+
+    if args.audit:
+        print(f"불량 행: {audit(args.dataset, args.path, quarantine_dir=args.quarantine_dir)}건")
+    elif args.batch:
+        result = ingest(args.dataset, args.batch, args.path, args.encoding, args.quarantine_dir)
+        print(f"추가 {result['appended']}행, 격리 {result['quarantined']}행" +
+              (f" ({result['quarantine_path']})" if result['quarantine_path'] else ''))
+    else:
+        parser.error("batch 파일 또는 --audit가 필요합니다")
@@ -3,15 +3,15 @@ import pandas as pd
 import folium
 from streamlit_folium import folium_static
 import os
-import geopandas as gpd
-import requests
-from io import BytesIO
+import cache_manager
+import crime_data
+import geometry
 from folium.plugins import MarkerCluster
 import numpy as np
 
 st.set_page_config(page_title="이상동기 범죄 경보 맵", page_icon="🚨", layout="wide", initial_sidebar_state="expanded")
 
-@st.cache_data
+@cache_manager.memoize
 def load_data(crime_path, indicator_path, prediction_path):
     # 최적화: 필요한 열만 로드, 결측치 처리 간소화
     if not os.path.exists(crime_path):
@@ -44,13 +44,10 @@ def load_data(crime_path, indicator_path, prediction_path):
     
     return df_crime, crime_dates, df_indicator, indicator_dates, df_prediction, prediction_dates
 
-@st.cache_data(hash_funcs={gpd.GeoDataFrame: lambda x: str(x)})
+@cache_manager.memoize
 def load_geojson():
-    # 최적화: GeoJSON을 로컬 파일로 변경하거나 URL 캐싱
-    geojson_url = "https://raw.githubusercontent.com/southkorea/southkorea-maps/master/gadm/json/skorea-provinces-geo.json"
-    response = requests.get(geojson_url, timeout=5)
-    geo_data = gpd.read_file(BytesIO(response.content))
-    return geo_data
+    # 최적화: geopandas 없이 로컬 번들 GeoJSON(dict)을 그대로 사용
+    return geometry.load_province_geojson()
 
 def calculate_risk_score(row, region):
     score = 0
@@ -62,7 +59,7 @@ def calculate_risk_score(row, region):
         score += 1
     return min(score, 3)
 
-@st.cache_data
+@cache_manager.memoize
 def create_risk_score_table(indicator_data, view_type, selected_year=None, selected_date=None):
     regions = ['서울특별시', '경기도', '강원도', '경상남도', '경상북도', '광주광역시', '대구광역시', '대전광역시', 
                '부산광역시', '세종특별자치시', '울산광역시', '인천광역시', '전라남도', '전라북도', '제주도', 
@@ -114,7 +111,7 @@ def create_risk_score_table(indicator_data, view_type, selected_year=None, selec
     
     return pd.DataFrame(table_data)
 
-@st.cache_data
+@cache_manager.memoize
 def create_prediction_table(prediction_data, selected_year=None, selected_date=None, prediction_mode="년도별"):
     regions = ['서울특별시', '경기도', '강원도', '경상남도', '경상북도', '광주광역시', '대구광역시', '대전광역시', 
                '부산광역시', '세종특별자치시', '울산광역시', '인천광역시', '전라남도', '전라북도', '제주도', 
@@ -273,10 +270,10 @@ def create_map(view_type, selected_year=None, selected_date=None, df_crime=None,
 
 st.title("이상동기 범죄 경보 맵")
 
-# 경로: Streamlit 배포용
-crime_path = "./data/15~25년도 이상동기(도단위추가)_with_coords_openai.csv"
-indicator_path = "./data/지표데이터(4대범죄추가계산).csv"
-prediction_path = "./data/crime_predictions_2024_2025_binary_risk.csv"
+# 경로: 데이터셋 레지스트리 (Streamlit 배포용)
+crime_path = crime_data.DATASETS['crime'].path
+indicator_path = crime_data.DATASETS['indicator'].path
+prediction_path = crime_data.DATASETS['prediction'].path
 
 df_crime, crime_dates, df_indicator, indicator_dates, df_prediction, prediction_dates = load_data(crime_path, indicator_path, prediction_path)
 geo_data = load_geojson()
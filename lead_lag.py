@@ -0,0 +1,133 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import crime_data
+
+# 지표 -> 사건 선행 관계: 지표(t)와 사건 수(t + lag)의 피어슨 상관을 lag 0~MAX_LAG일에 대해 계산
+# - 지표 × 지역 쌍 전체를 (쌍, 일) 배열로 쌓아 FFT 교차상관 한 번에 계산 (쌍·시차별 반복 없음)
+# - 결측 지표는 마스크로 빼고 시차마다 겹치는 날만으로 계산 (pairwise complete, pandas corr와 같음)
+#   합 Σx, Σy, Σx², Σy², Σxy, n을 각각 교차상관으로 구해 r = (nΣxy - ΣxΣy) / √((nΣx² - (Σx)²)(nΣy² - (Σy)²))
+# - 지역 열이 없는 지표(금융스트레스, neg_emotion_lag1 등 전국 값)는 모든 지역에 같은 값을 쓴다
+MAX_LAG = 60
+MIN_OVERLAP = 30  # 겹치는 날이 이보다 적으면 NaN
+Z_95 = 1.96
+
+
+def metric_names(df_indicator):
+    # 지표 이름 ('기후스트레스:서울특별시' -> '기후스트레스'), 열 순서대로
+    names = []
+    for column in df_indicator.columns:
+        name = column.split(':')[0]
+        if column != 'date' and name not in names and pd.api.types.is_numeric_dtype(df_indicator[column]):
+            names.append(name)
+    return names
+
+
+def indicator_cube(df_indicator, days, metrics):
+    # (지표, 지역, 일) 배열, 없는 날/값은 NaN
+    data = df_indicator.assign(day=df_indicator['date'].dt.normalize()).drop_duplicates('day').set_index('day').reindex(days)
+    cube = np.full((len(metrics), len(crime_data.REGIONS), len(days)), np.nan)
+    for m, metric in enumerate(metrics):
+        for r, region in enumerate(crime_data.REGIONS):
+            column = f"{metric}:{region}" if f"{metric}:{region}" in data else metric
+            if column in data:
+                cube[m, r] = data[column].to_numpy(dtype=float)
+    return cube
+
+
+def daily_counts(df_crime, days, window=1):
+    # (지역, 일) 사건 수. window > 1이면 그날부터 window일 동안의 합 (끝부분은 NaN)
+    counts = np.zeros((len(crime_data.REGIONS), len(days)))
+    if df_crime is not None and not df_crime.empty:
+        region_index = {region: i for i, region in enumerate(crime_data.REGIONS)}
+        rows = df_crime['도단위'].map(crime_data.normalize_province).map(region_index)
+        cols = pd.DatetimeIndex(days).get_indexer(df_crime['date'].dt.normalize())
+        valid = rows.notna().to_numpy() & (cols >= 0)
+        np.add.at(counts, (rows[valid].astype(int).to_numpy(), cols[valid]), 1)
+    if window > 1:
+        cumulative = np.concatenate([np.zeros((len(counts), 1)), counts.cumsum(axis=1)], axis=1)
+        summed = np.full(counts.shape, np.nan)
+        summed[:, :len(days) - window + 1] = cumulative[:, window:] - cumulative[:, :-window]
+        counts = summed
+    return counts
+
+
+def lagged_sums(a, b, max_lag):
+    # Σ_t a[:, t] · b[:, t + k] (k = 0..max_lag) — 0으로 채워 순환 없이 FFT 교차상관
+    size = 1 << (2 * a.shape[1] - 1).bit_length()
+    spectrum = np.conj(np.fft.rfft(a, size, axis=1)) * np.fft.rfft(b, size, axis=1)
+    return np.fft.irfft(spectrum, size, axis=1)[:, :max_lag + 1]
+
+
+def _valid_mean(values, valid):
+    return np.where(valid, values, 0.0).sum(axis=1, keepdims=True) / np.maximum(valid.sum(axis=1, keepdims=True), 1)
+
+
+def cross_correlation(df_indicator, df_crime, max_lag=MAX_LAG, window=1):
+    # 반환: {'metrics', 'regions', 'lags', 'r': (지표, 지역, lag) 상관계수, 'n': 겹치는 날 수, 'window'}
+    metrics = metric_names(df_indicator)
+    dates = df_indicator['date'].dropna()
+    days = pd.date_range(dates.min().normalize(), dates.max().normalize(), freq='D')
+    x = indicator_cube(df_indicator, days, metrics).reshape(-1, len(days))  # (쌍, 일)
+    y = np.tile(daily_counts(df_crime, days, window), (len(metrics), 1))
+    x_valid, y_valid = np.isfinite(x), np.isfinite(y)
+    # 평균을 빼 두면 합의 차이(nΣx² - (Σx)²)에서 자릿수 손실이 줄어든다
+    x = np.where(x_valid, x - _valid_mean(x, x_valid), 0.0)
+    y = np.where(y_valid, y - _valid_mean(y, y_valid), 0.0)
+    x_mask, y_mask = x_valid.astype(float), y_valid.astype(float)
+
+    n = np.rint(lagged_sums(x_mask, y_mask, max_lag))
+    sum_x, sum_y = lagged_sums(x, y_mask, max_lag), lagged_sums(x_mask, y, max_lag)
+    sum_xx, sum_yy = lagged_sums(x * x, y_mask, max_lag), lagged_sums(x_mask, y * y, max_lag)
+    sum_xy = lagged_sums(x, y, max_lag)
+    variance = (n * sum_xx - sum_x ** 2) * (n * sum_yy - sum_y ** 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = (n * sum_xy - sum_x * sum_y) / np.sqrt(variance)
+    r[(n < MIN_OVERLAP) | ~(variance > 1e-9 * np.maximum(n, 1) ** 4)] = np.nan
+    shape = (len(metrics), len(crime_data.REGIONS), max_lag + 1)
+    return {'metrics': metrics, 'regions': list(crime_data.REGIONS), 'lags': np.arange(max_lag + 1),
+            'r': np.clip(r, -1, 1).reshape(shape), 'n': n.astype(int).reshape(shape), 'window': window}
+
+
+def strongest_lags(result):
+    # 지표 × 지역별 |r|이 가장 큰 시차와 상관계수, 95% 유의 여부 (|r| > 1.96/√n, 시차 여러 개를 본 보정은 없음)
+    r, n = result['r'], result['n']
+    filled = np.where(np.isnan(r), -1, np.abs(r))
+    best = filled.argmax(axis=2)
+    best_r = np.take_along_axis(r, best[..., None], axis=2)[..., 0]
+    best_n = np.take_along_axis(n, best[..., None], axis=2)[..., 0]
+    metric_grid, region_grid = np.meshgrid(result['metrics'], result['regions'], indexing='ij')
+    table = pd.DataFrame({
+        'metric': metric_grid.ravel(), 'region': region_grid.ravel(), 'lag': best.ravel(),
+        'r': best_r.ravel(), 'n': best_n.ravel(),
+    })
+    with np.errstate(invalid='ignore', divide='ignore'):
+        table['significant'] = table['r'].abs() > Z_95 / np.sqrt(table['n'])
+    return table
+
+
+def lag_profile(result, metric):
+    # 한 지표의 지역 × 시차 상관 (긴 형식: region, lag, r)
+    m = result['metrics'].index(metric)
+    region_grid, lag_grid = np.meshgrid(result['regions'], result['lags'], indexing='ij')
+    return pd.DataFrame({'region': region_grid.ravel(), 'lag': lag_grid.ravel(), 'r': result['r'][m].ravel()})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="지표별·지역별 사건 수와의 시차 상관 (지표가 몇 일 앞서는지)")
+    parser.add_argument('--max-lag', type=int, default=MAX_LAG)
+    parser.add_argument('--window', type=int, default=1, help="사건 수 합산 기간 (일)")
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    df_indicator = crime_data.read_indicator(crime_data.INDICATOR_PATH)
+    df_crime = crime_data.read_crime(crime_data.CRIME_PATH)
+    started = time.perf_counter()
+    result = cross_correlation(df_indicator, df_crime, args.max_lag, args.window)
+    elapsed = time.perf_counter() - started
+    table = strongest_lags(result).dropna(subset=['r'])
+    print(table.reindex(table['r'].abs().sort_values(ascending=False).index).head(args.top).round(3).to_string(index=False))
+    print(f"{len(result['metrics'])}개 지표 × {len(result['regions'])}개 지역 × {args.max_lag + 1}개 시차: {elapsed:.3f}초")
@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+from tornado.websocket import websocket_connect
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+# 동시 세션 부하 테스트: 로컬 Streamlit 서버에 N개의 가상 브라우저 세션을 붙여
+# 사이드바 조작(보기 유형/년도/날짜/예측 모드)을 반복하고 재실행 지연, 서버 CPU/메모리를 측정
+#   python load_test.py --app real.py --sessions 1,2,4,8 --steps 10
+
+# 실제 사용 패턴 가중치: 날짜/보기 유형 변경이 가장 잦음
+ACTION_WEIGHTS = {'보기 유형': 3, '년도': 2, '예측 년도': 2, '날짜': 3, '예측 날짜': 3, '예측 모드': 1, '코로플렛 기준': 1}
+FINISHED = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_WITH_COMPILE_ERROR}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(app_path, port, timeout=60):
+    command = [sys.executable, '-m', 'streamlit', 'run', app_path, '--server.headless', 'true',
+               '--server.port', str(port), '--browser.gatherUsageStats', 'false', '--server.fileWatcherType', 'none']
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.3)
+    server.terminate()
+    raise RuntimeError(f"Streamlit 서버 시작 실패: {app_path}")
+
+
+def process_usage(pid):
+    # /proc 기준 누적 CPU 시간(초)과 현재 RSS(MB)
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    with open(f'/proc/{pid}/statm') as f:
+        rss_mb = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    return cpu_seconds, rss_mb
+
+
+def sample_usage(pid, stop, samples, interval=0.2):
+    last_wall, (last_cpu, _) = time.perf_counter(), process_usage(pid)
+    while not stop.wait(interval):
+        try:
+            cpu, rss = process_usage(pid)
+        except OSError:
+            return
+        wall = time.perf_counter()
+        samples.append({'cpu_percent': 100 * (cpu - last_cpu) / max(wall - last_wall, 1e-9), 'rss_mb': rss})
+        last_wall, last_cpu = wall, cpu
+
+
+class Session:
+    # 브라우저 한 탭을 흉내내는 웹소켓 세션
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.widgets = {}
+        self.values = {}
+        self.message_cache = {}
+
+    async def connect(self):
+        self.ws = await websocket_connect(self.url, subprotocols=['streamlit'])
+
+    async def rerun(self):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.page_script_hash = ''
+        for widget_id, index in self.values.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            state.int_value = index
+        self.ws.write_message(msg.SerializeToString(), binary=True)
+
+        started = time.perf_counter()
+        widgets, errors = {}, []
+        while True:
+            payload = await asyncio.wait_for(self.ws.read_message(), self.timeout)
+            if payload is None:
+                raise ConnectionError("서버 연결 종료")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(payload)
+            if fwd.WhichOneof('type') == 'ref_hash':
+                fwd = self.message_cache.get(fwd.ref_hash, fwd)
+            elif fwd.hash:
+                self.message_cache[fwd.hash] = fwd
+
+            kind = fwd.WhichOneof('type')
+            if kind == 'delta' and fwd.delta.WhichOneof('type') == 'new_element':
+                element = fwd.delta.new_element
+                element_type = element.WhichOneof('type')
+                if element_type in ('selectbox', 'radio'):
+                    widget = getattr(element, element_type)
+                    widgets[widget.label] = (widget.id, len(widget.options), widget.default)
+                elif element_type == 'exception':
+                    errors.append(element.exception.message)
+                elif element_type == 'alert' and element.alert.format == Alert.ERROR:
+                    errors.append(element.alert.body)
+            elif kind == 'script_finished' and fwd.script_finished in FINISHED:
+                break
+
+        elapsed = time.perf_counter() - started
+        self.widgets = widgets
+        self.values = {wid: self.values.get(wid, default) for wid, _, default in widgets.values()}
+        return elapsed, errors
+
+    def random_action(self, rng):
+        candidates = [label for label in self.widgets if label in ACTION_WEIGHTS and self.widgets[label][1] > 1]
+        if not candidates:
+            return None
+        label = rng.choices(candidates, weights=[ACTION_WEIGHTS[c] for c in candidates])[0]
+        widget_id, option_count, _ = self.widgets[label]
+        self.values[widget_id] = rng.randrange(option_count)
+        return label
+
+    def close(self):
+        self.ws.close()
+
+
+async def run_session(url, steps, timeout, seed):
+    rng = random.Random(seed)
+    latencies, errors = [], []
+    session = Session(url, timeout)
+    try:
+        await session.connect()
+        elapsed, run_errors = await session.rerun()
+        latencies.append(('초기 로드', elapsed))
+        errors += run_errors
+        for _ in range(steps):
+            label = session.random_action(rng)
+            if label is None:
+                errors.append("조작할 사이드바 위젯 없음")
+                break
+            elapsed, run_errors = await session.rerun()
+            latencies.append((label, elapsed))
+            errors += run_errors
+        session.close()
+    except Exception as e:
+        errors.append(f"{type(e).__name__}: {e}")
+    return {'latencies': latencies, 'errors': errors}
+
+
+def run_level(url, pid, sessions, steps, timeout, seed):
+    samples, stop = [], threading.Event()
+    sampler = threading.Thread(target=sample_usage, args=(pid, stop, samples), daemon=True) if pid else None
+    cpu_started = process_usage(pid)[0] if pid else None
+
+    async def run_all():
+        return await asyncio.gather(*[run_session(url, steps, timeout, seed + i) for i in range(sessions)])
+
+    started = time.perf_counter()
+    if sampler:
+        sampler.start()
+    results = asyncio.run(run_all())
+    elapsed = time.perf_counter() - started
+    stop.set()
+    if sampler:
+        sampler.join()
+
+    reruns = np.array([t for r in results for label, t in r['latencies'] if label != '초기 로드'])
+    initial = np.array([t for r in results for label, t in r['latencies'] if label == '초기 로드'])
+    errors = [e for r in results for e in r['errors']]
+    percentile = lambda values, q: round(float(np.percentile(values, q)) * 1000, 1) if len(values) else None
+    cpu_used = process_usage(pid)[0] - cpu_started if pid else None
+    return {
+        'sessions': sessions,
+        'reruns': int(len(reruns)),
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:3],
+        'initial_p50_ms': percentile(initial, 50),
+        'rerun_p50_ms': percentile(reruns, 50),
+        'rerun_p90_ms': percentile(reruns, 90),
+        'rerun_p99_ms': percentile(reruns, 99),
+        'rerun_max_ms': percentile(reruns, 100),
+        'reruns_per_sec': round(len(reruns) / elapsed, 2),
+        'cpu_percent_avg': round(100 * cpu_used / elapsed, 1) if pid else None,
+        'cpu_percent_peak': round(max((s['cpu_percent'] for s in samples), default=0), 1) if pid else None,
+        'rss_mb_peak': round(max((s['rss_mb'] for s in samples), default=process_usage(pid)[1]), 1) if pid else None,
+    }
+
+
+def print_report(app_path, levels):
+    print(f"\n앱: {app_path}")
+    header = f"{'세션':>4} {'재실행':>6} {'오류':>4} {'초기p50':>9} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'재실행/s':>8} {'CPU%':>6} {'CPU%peak':>8} {'RSS MB':>8}"
+    print(header)
+    print('-' * len(header))
+    fmt = lambda v: '-' if v is None else v
+    for r in levels:
+        print(f"{r['sessions']:>4} {r['reruns']:>6} {r['errors']:>4} {fmt(r['initial_p50_ms']):>9} {fmt(r['rerun_p50_ms']):>8} "
+              f"{fmt(r['rerun_p90_ms']):>8} {fmt(r['rerun_p99_ms']):>8} {fmt(r['rerun_max_ms']):>8} {fmt(r['reruns_per_sec']):>8} "
+              f"{fmt(r['cpu_percent_avg']):>6} {fmt(r['cpu_percent_peak']):>8} {fmt(r['rss_mb_peak']):>8}")
+        for message in r['error_samples']:
+            print(f"     오류: {message[:160]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streamlit 앱 동시 세션 부하 테스트")
+    parser.add_argument('--app', action='append', help="대상 스크립트 (여러 번 지정 가능, 기본 real.py)")
+    parser.add_argument('--url', help="이미 실행 중인 서버 주소 (예: http://127.0.0.1:8501), 지정 시 --app 무시")
+    parser.add_argument('--pid', type=int, help="--url 사용 시 CPU/메모리를 측정할 서버 프로세스 PID")
+    parser.add_argument('--sessions', default='1,2,4,8', help="동시 세션 수 단계 (쉼표 구분)")
+    parser.add_argument('--steps', type=int, default=10, help="세션당 사이드바 조작 횟수")
+    parser.add_argument('--timeout', type=float, default=120, help="재실행 1회 제한 시간(초)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+    levels_arg = [int(n) for n in args.sessions.split(',')]
+
+    report = {}
+    if args.url:
+        ws_url = args.url.rstrip('/').replace('http', 'ws', 1) + '/_stcore/stream'
+        report[args.url] = [run_level(ws_url, args.pid, n, args.steps, args.timeout, args.seed) for n in levels_arg]
+        print_report(args.url, report[args.url])
+    else:
+        for app_path in args.app or ['real.py']:
+            port = free_port()
+            server = start_server(app_path, port)
+            try:
+                ws_url = f"ws://127.0.0.1:{port}/_stcore/stream"
+                report[app_path] = [run_level(ws_url, server.pid, n, args.steps, args.timeout, args.seed) for n in levels_arg]
+            finally:
+                server.terminate()
+                server.wait()
+            print_report(app_path, report[app_path])
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
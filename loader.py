@@ -0,0 +1,35 @@
+import concurrent.futures
+import os
+
+# 시작 시 데이터/경계 로드를 병렬로 돌리는 공용 스레드 풀.
+# 제한 시간을 넘긴 작업은 취소하지 않고 뒤에서 끝나게 두며(캐시가 채워짐) 호출 측은 대체값을 쓴다.
+POOL = concurrent.futures.ThreadPoolExecutor(max_workers=int(os.environ.get('LOADER_WORKERS', 8)), thread_name_prefix='loader')
+TimeoutError = concurrent.futures.TimeoutError
+
+
+def submit(func, *args, **kwargs):
+    return POOL.submit(func, *args, **kwargs)
+
+
+def result(future, timeout=None, fallback=None):
+    # (값, 오류 메시지). 제한 시간 초과나 예외면 fallback() 값과 사유를 돌려준다
+    try:
+        return future.result(timeout=timeout), None
+    except concurrent.futures.TimeoutError:
+        error = f"{timeout:g}초 안에 끝나지 않음"
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    return (fallback() if fallback is not None else None), error
+
+
+def as_completed(futures, timeout=None):
+    # 끝난 순서대로 (future, 오류 메시지), 제한 시간 안에 못 끝난 future는 '시간 초과'로 내보냄
+    pending = set(futures)
+    try:
+        for future in concurrent.futures.as_completed(futures, timeout=timeout):
+            pending.discard(future)
+            exception = future.exception()
+            yield future, (str(exception) or type(exception).__name__) if exception else None
+    except concurrent.futures.TimeoutError:
+        for future in pending:
+            yield future, f"{timeout:g}초 안에 끝나지 않음"
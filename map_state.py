@@ -0,0 +1,78 @@
+import math
+from collections import OrderedDict
+
+import folium
+from branca.element import Element
+from streamlit_folium import st_folium
+
+# 브라우저에 지도 인스턴스 하나를 유지하고 사이드바 변경 시 레이어만 교체한다.
+# - 기본 지도(타일/고정 옵션)는 재실행마다 같은 스크립트를 만들어 컴포넌트가 다시 마운트되지 않음
+# - 동적 레이어는 FeatureGroup 단위로 feature_group_to_add에 넘기고, 문자열이 바뀐 경우에만 프런트엔드가 교체
+# - 요소 id를 결정적으로 다시 매겨 내용이 같으면 문자열도 같게 만든다 (folium 기본 id는 매번 난수)
+# - center/zoom은 값이 바뀐 경우에만 적용되므로 같은 보기에서는 사용자가 옮긴 위치/확대가 유지됨
+DEFAULT_CENTER = (36.5, 127.5)
+DEFAULT_ZOOM = 7
+TILE_SIZE = 256
+
+
+def base_map(tiles='CartoDB Positron'):
+    return folium.Map(location=list(DEFAULT_CENTER), zoom_start=DEFAULT_ZOOM, tiles=tiles)
+
+
+def _descendants(element, seen):
+    # 자식 요소 + 팝업 HTML처럼 속성으로만 매달린 요소까지 (같은 객체는 한 번만)
+    if id(element) in seen:
+        return
+    seen.add(id(element))
+    yield element
+    attached = [value for name, value in vars(element).items() if name != '_parent' and isinstance(value, Element)]
+    for child in list(element._children.values()) + attached:
+        yield from _descendants(child, seen)
+
+
+def stable_ids(layer, prefix):
+    elements = list(_descendants(layer, set()))
+    old_names = {id(element): element.get_name() for element in elements}
+    for i, element in enumerate(elements):
+        element._id = f"{prefix}x{i}"
+    # 일부 템플릿(팝업 등)은 _children의 키를 변수명으로 쓰므로 기본 이름 키도 새 이름으로
+    for element in elements:
+        element._children = OrderedDict(
+            (child.get_name() if key == old_names.get(id(child)) else key, child)
+            for key, child in element._children.items())
+    return layer
+
+
+def bounds_view(bounds, width=1000, height=600, max_zoom=12):
+    # fit_bounds 대신 쓸 중심/확대 수준 ([[south, west], [north, east]] -> ((lat, lon), zoom))
+    (south, west), (north, east) = bounds
+    center = ((south + north) / 2, (west + east) / 2)
+    lon_zoom = math.log2(width * 360 / (TILE_SIZE * max(east - west, 1e-6)))
+    lat_rad = [math.log(math.tan(math.pi / 4 + math.radians(lat) / 2)) for lat in (south, north)]
+    lat_zoom = math.log2(height * math.pi / (TILE_SIZE * max(lat_rad[1] - lat_rad[0], 1e-6)))
+    return center, max(1, min(int(min(lon_zoom, lat_zoom)), max_zoom))
+
+
+def viewport_bounds(value):
+    # st_folium이 돌려준 'bounds' -> [[south, west], [north, east]] (아직 없으면 None)
+    bounds = (value or {}).get('bounds') or {}
+    south_west, north_east = bounds.get('_southWest') or {}, bounds.get('_northEast') or {}
+    if None in (south_west.get('lat'), south_west.get('lng'), north_east.get('lat'), north_east.get('lng')):
+        return None
+    return [[south_west['lat'], south_west['lng']], [north_east['lat'], north_east['lng']]]
+
+
+def clicked_point(value):
+    # st_folium이 돌려준 'last_clicked' -> (lat, lon) (클릭 전이면 None)
+    clicked = (value or {}).get('last_clicked') or {}
+    if clicked.get('lat') is None or clicked.get('lng') is None:
+        return None
+    return clicked['lat'], clicked['lng']
+
+
+def render(m, layers, key, center=None, zoom=None, width=1000, height=600, returned_objects=()):
+    # returned_objects=['bounds']이면 이동/확대가 끝날 때마다, 'last_clicked'면 클릭할 때마다 재실행
+    groups = [stable_ids(layer, f"l{i}") for i, layer in enumerate(layers)]
+    return st_folium(m, key=key, width=width, height=height, feature_group_to_add=groups,
+                     layer_control=folium.LayerControl(), center=center, zoom=zoom,
+                     returned_objects=list(returned_objects))
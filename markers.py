@@ -0,0 +1,61 @@
+import folium
+import pandas as pd
+from folium.plugins import BeautifyIcon, MarkerCluster
+
+# 같은 좌표(지오코딩된 시군구 중심점 등)에 겹친 사건을 건수 가중 마커 하나로 합친다.
+# 클러스터 아이콘은 마커 개수가 아니라 options.weight(사건 수) 합계를 표시한다.
+COORD_PRECISION = 5  # 소수 5자리 ≈ 1m (사실상 같은 좌표만 합침)
+POPUP_DATES = 10
+
+WEIGHTED_CLUSTER_JS = """
+function(cluster) {
+    var total = 0;
+    cluster.getAllChildMarkers().forEach(function(marker) { total += marker.options.weight || 1; });
+    var size = total < 10 ? 'small' : total < 100 ? 'medium' : 'large';
+    return L.divIcon({html: '<div><span>' + total + '</span></div>',
+                      className: 'marker-cluster marker-cluster-' + size, iconSize: new L.Point(40, 40)});
+}
+"""
+
+
+def collapse_points(df, precision=COORD_PRECISION):
+    # 좌표별 한 행: 위도, 경도, count, dates(정렬된 날짜 목록), address(대표 주소)
+    data = df.dropna(subset=['위도', '경도'])
+    if data.empty:
+        return pd.DataFrame(columns=['위도', '경도', 'count', 'dates', 'address'])
+    keys = [data['위도'].round(precision).rename('위도'), data['경도'].round(precision).rename('경도')]
+    grouped = data.groupby(keys, sort=False)
+    points = pd.DataFrame({
+        'count': grouped.size(),
+        'dates': grouped['date'].agg(lambda dates: sorted(dates.dt.strftime('%Y-%m-%d'))),
+        'address': grouped['full_address'].first(),
+    }).reset_index()
+    return points.sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def weighted_cluster():
+    return MarkerCluster(icon_create_function=WEIGHTED_CLUSTER_JS)
+
+
+def point_popup(point):
+    dates = point.dates[:POPUP_DATES]
+    more = f"<br>외 {point.count - len(dates)}건" if point.count > len(dates) else ''
+    if point.count == 1:
+        return f"날짜: {dates[0]}<br>지역: {point.address}"
+    return f"지역: {point.address}<br>사건 {point.count}건<br>날짜: {', '.join(dates)}{more}"
+
+
+def add_points(points, cluster, color):
+    # 1건은 기존 아이콘, 여러 건은 건수를 표시한 아이콘
+    for point in points.itertuples(index=False):
+        if point.count == 1:
+            icon = folium.Icon(color=color, icon='exclamation-sign', prefix='glyphicon')
+        else:
+            icon = BeautifyIcon(icon_shape='marker', number=int(point.count), border_color=color,
+                                text_color=color, background_color='white')
+        folium.Marker(
+            location=[float(point.위도), float(point.경도)],
+            icon=icon,
+            popup=point_popup(point),
+            weight=int(point.count),
+        ).add_to(cluster)
@@ -0,0 +1,155 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+import pandas as pd
+
+# 요청한 실행(rerun) 한 번만 프로파일링 (기본 꺼짐, 꺼져 있으면 요청 여부 확인 외 비용 없음)
+# - cProfile: 스크립트 스레드의 함수별 호출 수/자체 시간/누적 시간 -> .prof (snakeviz 등), 상위 N개 요약 .txt
+# - 샘플링: 별도 스레드가 SAMPLE_INTERVAL마다 스크립트 스레드의 호출 스택을 읽어
+#   접힌 스택(folded, "a;b;c 횟수") 형식 .folded로 저장 (flamegraph.pl, speedscope, inferno에서 바로 열림)
+# - 한 번에 하나만 캡처 (Python 3.12+ cProfile은 프로세스 전체에서 하나만 활성화 가능)
+# - cProfile 훅(3.11 이하)은 스레드별이라 끄기는 소유 스레드에서만 한다. st.stop()/재실행 예외로 finish가
+#   불리지 않은 캡처는 같은 세션의 다음 실행 맨 앞에서 discard로 정리하고, 소유 스레드가 이미 끝났으면
+#   (Streamlit 스크립트 스레드는 할 일이 없으면 종료) 다른 세션의 start가 버리고 새로 시작한다
+PROFILE_DIR = os.environ.get('PROFILE_DIR', "./data/profiles")
+QUERY_PARAM = 'profile'
+SAMPLE_INTERVAL = 0.005  # 초
+MAX_SECONDS = 300  # 샘플링 상한 (finish/discard 없이 소유 스레드가 계속 살아 있는 경우 대비)
+TOP_N = 30
+SUMMARY_COLUMNS = ['function', 'calls', 'self_s', 'cumulative_s']
+
+_lock = threading.Lock()
+_active = None
+
+
+def requested(query_params, session_state):
+    # ?profile=1 또는 관리자 토글('profile_next')로 이번 실행 프로파일 요청 여부
+    return query_params.get(QUERY_PARAM) in ('1', 'true') or bool(session_state.get('profile_next'))
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ',')
+
+
+def folded_stack(frame, root=None):
+    # 프레임 -> 바깥부터 안쪽 순서의 "a;b;c" (root 파일 프레임이 있으면 그 위 Streamlit 실행기 프레임은 생략)
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    if root is not None:
+        starts = [i for i, code in enumerate(codes) if os.path.abspath(code.co_filename) == root]
+        if starts:
+            codes = codes[starts[0]:]
+    return ';'.join(frame_label(code) for code in codes)
+
+
+def top_functions(stats, limit=TOP_N, sort='cumulative'):
+    # pstats.Stats -> 상위 limit개 함수 DataFrame (누적 또는 자체 시간순)
+    rows = []
+    for (filename, line, name), (_, calls, self_time, cumulative, _) in stats.stats.items():
+        rows.append({'function': f"{name} ({os.path.basename(filename)}:{line})", 'calls': calls,
+                     'self_s': round(self_time, 4), 'cumulative_s': round(cumulative, 4)})
+    table = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+    key = 'cumulative_s' if sort == 'cumulative' else 'self_s'
+    return table.sort_values(key, ascending=False, kind='stable').head(limit).reset_index(drop=True)
+
+
+class RerunProfiler:
+    def __init__(self, label='rerun', directory=PROFILE_DIR, interval=SAMPLE_INTERVAL, root=None):
+        self.label = label
+        self.directory = directory
+        self.interval = interval
+        self.root = os.path.abspath(root) if root else None
+        self.samples = Counter()
+        self.profile = cProfile.Profile()
+        self.owner = threading.current_thread()
+        self.thread_id = threading.get_ident()
+        self.stop_event = threading.Event()
+        self.sampler = threading.Thread(target=self._sample, daemon=True)
+        self.started = None
+
+    def _sample(self):
+        deadline = time.monotonic() + MAX_SECONDS
+        while not self.stop_event.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:  # 스크립트 스레드 종료 (st.stop() 등으로 finish 없이 끝난 실행)
+                return
+            self.samples[folded_stack(frame, self.root)] += 1
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.sampler.start()
+        self.profile.enable()
+        return self
+
+    def stop(self):
+        self.profile.disable()
+        self.stop_event.set()
+        self.sampler.join()
+        return time.perf_counter() - self.started
+
+    def cancel(self):
+        # 저장하지 않고 정리. 다른 스레드에서는 3.12+(sys.monitoring, 프로세스 전체 훅)일 때만 끈다
+        # (3.11 이하는 소유 스레드의 훅이라 다른 스레드에서 끌 수 없고, 소유 스레드가 끝나면 함께 사라짐)
+        if threading.get_ident() == self.thread_id or sys.version_info >= (3, 12):
+            self.profile.disable()
+        self.stop_event.set()
+
+    def save(self, elapsed):
+        # 반환: {'name': 파일 이름, 'paths': {'prof'|'folded'|'txt': 경로}, 'elapsed': 초, 'samples': 샘플 수, 'summary': 상위 함수 DataFrame}
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.label}")
+        paths = {'prof': base + '.prof', 'folded': base + '.folded', 'txt': base + '.txt'}
+        self.profile.dump_stats(paths['prof'])
+        with open(paths['folded'], 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        stats = pstats.Stats(self.profile)
+        summary = top_functions(stats)
+        with open(paths['txt'], 'w', encoding='utf-8') as f:
+            f.write(f"{self.label}: {elapsed:.3f}초, 샘플 {sum(self.samples.values())}개 ({self.interval * 1000:.0f}ms 간격)\n\n")
+            f.write(f"누적 시간 상위 {TOP_N}\n{summary.to_string(index=False)}\n\n")
+            f.write(f"자체 시간 상위 {TOP_N}\n{top_functions(stats, sort='self').to_string(index=False)}\n")
+        return {'name': os.path.basename(base), 'paths': paths, 'elapsed': elapsed, 'samples': sum(self.samples.values()), 'summary': summary}
+
+
+def start(label='rerun', directory=PROFILE_DIR, root=None):
+    # 이 스레드의 캡처 시작. 다른 스레드의 실행을 측정 중이면 None
+    # (소유 스레드가 끝났거나 이 스레드의 것인, 마치지 못한 이전 캡처는 버림)
+    global _active
+    with _lock:
+        if _active is not None:
+            if _active.owner.is_alive() and _active.thread_id != threading.get_ident():
+                return None
+            _active.cancel()
+        _active = RerunProfiler(label, directory, root=root).start()
+        return _active
+
+
+def discard(capture):
+    # finish 없이 남은 캡처(st.stop(), 재실행 예외)를 저장하지 않고 정리. 같은 세션의 다음 실행 맨 앞에서 부른다
+    global _active
+    if capture is None:
+        return
+    with _lock:
+        if capture.thread_id == threading.get_ident() or not capture.owner.is_alive():
+            capture.cancel()
+            if _active is capture:
+                _active = None
+
+
+def finish(capture):
+    # start의 반환값으로 캡처를 끝내고 파일 저장. 반환: RerunProfiler.save 결과
+    global _active
+    elapsed = capture.stop()
+    with _lock:
+        if _active is capture:
+            _active = None
+    return capture.save(elapsed)
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+import crime_data
+
+# 임의 기간(start~end) 집계를 위한 지역별 누적합 배열 (로드 시 한 번 구축)
+# 일 축(데이터 첫날~마지막 날) × 지역으로 일별 합계를 만든 뒤 일 축으로 누적해 두면
+# 기간 합계는 P[end + 1] - P[start] 두 번의 조회로 끝난다 (프레임을 다시 거르지 않음).
+# - 지표: 행 수, 지표별 기준 초과 수(기후/사회/금융), 총 점수 합, 사회스트레스가 있는 행 수/점수 합
+# - 예측: crime_probability 합과 값이 있는 행 수
+# - 사건: 도단위별 건수
+# 결과는 crime_data.create_risk_score_table / region_probabilities('기간별'), CountCube.region_counts와 같다.
+COUNT_METRICS = ('rows', 'climate', 'social', 'financial', 'score', 'scored_rows', 'scored_score', 'incidents', 'probability_rows')
+
+
+class RangeSums:
+    def __init__(self, df_indicator=None, df_prediction=None, df_crime=None):
+        frames = [df for df in (df_indicator, df_prediction, df_crime) if df is not None and not df.empty]
+        dates = pd.concat([df['date'].dropna() for df in frames]) if frames else pd.Series([], dtype='datetime64[ns]')
+        self.first = dates.min().normalize() if len(dates) else pd.Timestamp('1970-01-01')
+        self.n_days = (dates.max().normalize() - self.first).days + 1 if len(dates) else 0
+        self.region_index = {region: i for i, region in enumerate(crime_data.REGIONS)}
+        daily = {name: self._zeros(np.int64) for name in COUNT_METRICS}
+        daily['probability'] = self._zeros(np.float64)
+        if df_indicator is not None and not df_indicator.empty:
+            self._add_indicator(daily, df_indicator)
+        if df_prediction is not None and not df_prediction.empty:
+            self._add_prediction(daily, df_prediction)
+        if df_crime is not None and not df_crime.empty:
+            self._add_crime(daily, df_crime)
+        # 맨 앞에 0 행을 둔 누적합: 일 i~j 합계 = prefix[j + 1] - prefix[i]
+        self.prefix = {name: np.concatenate([np.zeros((1,) + values.shape[1:], values.dtype), values.cumsum(axis=0)])
+                       for name, values in daily.items()}
+
+    def _zeros(self, dtype):
+        return np.zeros((self.n_days, len(crime_data.REGIONS)), dtype=dtype)
+
+    def _day_codes(self, dates):
+        return (dates.dt.normalize() - self.first).dt.days.to_numpy()
+
+    def _add_indicator(self, daily, df_indicator):
+        data = df_indicator.dropna(subset=['date'])
+        days = self._day_codes(data['date'])
+        daily['rows'] += np.bincount(days, minlength=self.n_days)[:, None]
+        for region, r in self.region_index.items():
+            climate, social, financial = (flag.to_numpy(dtype=np.int64) for flag in crime_data.risk_flags(data, region))
+            score = np.minimum(climate + social + financial, 3)
+            social_col = f"사회스트레스:{region}"
+            scored = data[social_col].notna().to_numpy() if social_col in data else np.zeros(len(data), dtype=bool)
+            for name, values in (('climate', climate), ('social', social), ('financial', financial), ('score', score),
+                                 ('scored_rows', scored.astype(np.int64)), ('scored_score', score * scored)):
+                daily[name][:, r] = np.bincount(days, weights=values, minlength=self.n_days)
+
+    def _add_prediction(self, daily, df_prediction):
+        data = df_prediction.dropna(subset=['date', 'crime_probability'])
+        regions = data['도단위'].map(self.region_index)
+        data = data[regions.notna()]
+        days, cols = self._day_codes(data['date']), regions[regions.notna()].astype(int).to_numpy()
+        np.add.at(daily['probability'], (days, cols), data['crime_probability'].to_numpy(dtype=float))
+        np.add.at(daily['probability_rows'], (days, cols), 1)
+
+    def _add_crime(self, daily, df_crime):
+        data = df_crime.dropna(subset=['date'])
+        if '도단위' not in data:
+            return
+        regions = data['도단위'].map(crime_data.normalize_province).map(self.region_index)
+        valid = regions.notna().to_numpy()
+        np.add.at(daily['incidents'], (self._day_codes(data['date'])[valid], regions[valid].astype(int).to_numpy()), 1)
+
+    def span(self, start=None, end=None):
+        # 기간 [start, end] (양 끝 포함, None이면 데이터 처음/끝) -> 누적합 배열 위치 (lo, hi)
+        # 날짜는 먼저 데이터 범위 앞뒤 하루로 잘라 둔다 (먼 날짜끼리 빼면 Timedelta 범위를 넘음)
+        earliest, latest = self.first - pd.Timedelta(days=1), self.first + pd.Timedelta(days=self.n_days)
+        lo = 0 if start is None else (min(max(pd.Timestamp(start).normalize(), earliest), latest) - self.first).days
+        hi = self.n_days if end is None else (min(max(pd.Timestamp(end).normalize(), earliest), latest) - self.first).days + 1
+        lo, hi = min(max(lo, 0), self.n_days), min(max(hi, 0), self.n_days)
+        return lo, max(hi, lo)
+
+    def totals(self, name, start=None, end=None):
+        # 지표 이름 -> 지역별 기간 합계 (REGIONS 순서 배열)
+        lo, hi = self.span(start, end)
+        return self.prefix[name][hi] - self.prefix[name][lo]
+
+    def risk_table(self, start=None, end=None):
+        # crime_data.create_risk_score_table(..., "기간별", start=, end=)와 같은 표
+        rows = self.totals('rows', start, end)
+        means = {name: self.totals(name, start, end) / np.maximum(rows, 1) for name in ('climate', 'social', 'financial')}
+        return pd.DataFrame([{
+            '지역': region,
+            '기후스트레스 점수': round(float(means['climate'][r]), 2),
+            '사회스트레스 점수': round(float(means['social'][r]), 2),
+            '금융스트레스 점수': round(float(means['financial'][r]), 2),
+            '총 점수': round(float(min(means['climate'][r] + means['social'][r] + means['financial'][r], 3)), 2),
+        } for r, region in enumerate(crime_data.REGIONS)])
+
+    def map_scores(self, start=None, end=None):
+        # 지도 위험 점수: 사회스트레스가 있는 행의 일별 점수 평균을 반올림 (real.py 전체/년도별 지도와 같은 규칙)
+        rows, total = self.totals('scored_rows', start, end), self.totals('scored_score', start, end)
+        return {region: round(total[r] / rows[r]) if rows[r] else 0 for r, region in enumerate(crime_data.REGIONS)}
+
+    def probabilities(self, start=None, end=None):
+        # crime_data.region_probabilities(..., "기간별", start=, end=)와 같은 지역별 평균 (값 없으면 None)
+        rows, total = self.totals('probability_rows', start, end), self.totals('probability', start, end)
+        return {region: float(total[r] / rows[r]) if rows[r] else None for r, region in enumerate(crime_data.REGIONS)}
+
+    def incident_counts(self, start=None, end=None):
+        totals = self.totals('incidents', start, end)
+        return {region: int(totals[r]) for r, region in enumerate(crime_data.REGIONS)}
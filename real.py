@@ -1,220 +1,236 @@
 import streamlit as st
+import streamlit.components.v1 as components
+import altair as alt
 import pandas as pd
 import folium
-from streamlit_folium import folium_static
+import alerts
+import cache_manager
+import geometry
+import count_cube
+import crime_data
+import density
+import evaluation
+import hotspots
+import lead_lag
+import export
+import ingest
+import loader
+import map_state
+import markers
+import profiler
+import range_sums
+import scenario
+import spatial_index
 import os
-import geopandas as gpd
-import requests
-from io import BytesIO
-from folium.plugins import MarkerCluster
+import tempfile
 import time
 
 st.set_page_config(page_title="이상동기 범죄 경보 맵", page_icon="🚨", layout="wide", initial_sidebar_state="expanded")
 
-@st.cache_data
-def load_data(crime_path, indicator_path, prediction_path, _cache_buster=None):
-    if not os.path.exists(crime_path):
-        st.error("범죄 데이터 파일 없음")
-        st.stop()
-    df_crime = pd.read_csv(crime_path, encoding='cp949')
-    df_crime['date'] = pd.to_datetime(df_crime['날짜'], errors='coerce')
-    df_crime['위도'] = pd.to_numeric(df_crime['위도'], errors='coerce')
-    df_crime['경도'] = pd.to_numeric(df_crime['경도'], errors='coerce')
-    df_crime = df_crime.dropna(subset=['date', '위도', '경도'])
-    if 'full_address' not in df_crime.columns:
-        df_crime['full_address'] = df_crime.apply(lambda row: f"위도: {row['위도']}, 경도: {row['경도']}", axis=1)
-    crime_dates = sorted(df_crime['date'].dt.normalize().unique())
-    
-    if not os.path.exists(indicator_path):
-        st.error("지표 데이터 파일 없음")
-        st.stop()
-    df_indicator = pd.read_csv(indicator_path, encoding='cp949')
-    df_indicator['date'] = pd.to_datetime(df_indicator['date'], errors='coerce')
-    df_indicator = df_indicator[df_indicator['date'].dt.year <= 2023].dropna(subset=['date'])
-    indicator_dates = sorted(df_indicator['date'].dt.normalize().unique())
-    
-    if not os.path.exists(prediction_path):
-        st.error("예측 데이터 파일 없음")
-        st.stop()
-    df_prediction = pd.read_csv(prediction_path, encoding='cp949')
-    df_prediction['date'] = pd.to_datetime(df_prediction['date'], errors='coerce')
-    df_prediction = df_prediction.dropna(subset=['date', '도단위', 'crime_probability'])
-    prediction_dates = sorted(df_prediction['date'].dt.normalize().unique())
-    
-    return df_crime, crime_dates, df_indicator, indicator_dates, df_prediction, prediction_dates
-
-@st.cache_data
-def load_geojson(_cache_buster=None):
-    geojson_url = "https://raw.githubusercontent.com/southkorea/southkorea-maps/master/gadm/json/skorea-provinces-geo.json"
-    response = requests.get(geojson_url)
-    geo_data = gpd.read_file(BytesIO(response.content))
-    return geo_data
-
-def calculate_risk_score(row, region):
-    score = 0
-    if f"기후스트레스:{region}" in row and pd.notna(row[f"기후스트레스:{region}"]) and row[f"기후스트레스:{region}"] > 13:
-        score += 1
-    if f"사회스트레스:{region}" in row and pd.notna(row[f"사회스트레스:{region}"]) and row[f"사회스트레스:{region}"] >= 0.7:
-        score += 1
-    if '금융스트레스' in row and pd.notna(row['금융스트레스']) and row['금융스트레스'] >= 2:
-        score += 1
-    return min(score, 3)
-
-def create_risk_score_table(indicator_data, view_type, selected_year=None, selected_date=None):
-    regions = ['서울특별시', '경기도', '강원도', '경상남도', '경상북도', '광주광역시', '대구광역시', '대전광역시', 
-               '부산광역시', '세종특별자치시', '울산광역시', '인천광역시', '전라남도', '전라북도', '제주도', 
-               '충청남도', '충청북도']
-    table_data = []
-    
-    for region in regions:
-        region_data = indicator_data
-        if view_type == "년도별":
-            region_data = region_data[region_data['date'].dt.year == selected_year]
-        elif view_type == "일별":
-            region_data = region_data[region_data['date'].dt.normalize() == selected_date.normalize()]
-        
-        if region_data.empty:
-            table_data.append({
-                '지역': region,
-                '기후스트레스 점수': 0,
-                '사회스트레스 점수': 0,
-                '금융스트레스 점수': 0,
-                '총 점수': 0
-            })
-            continue
-        
-        climate_score = 0
-        social_score = 0
-        financial_score = 0
-        
-        if view_type in ["전체 데이터", "년도별"]:
-            climate_scores = [1 if pd.notna(row.get(f"기후스트레스:{region}")) and row[f"기후스트레스:{region}"] > 13 else 0 
-                             for _, row in region_data.iterrows()]
-            social_scores = [1 if pd.notna(row.get(f"사회스트레스:{region}")) and row[f"사회스트레스:{region}"] >= 0.7 else 0 
-                            for _, row in region_data.iterrows()]
-            financial_scores = [1 if pd.notna(row.get('금융스트레스')) and row['금융스트레스'] >= 2 else 0 
-                               for _, row in region_data.iterrows()]
-            
-            climate_score = sum(climate_scores) / len(climate_scores) if climate_scores else 0
-            social_score = sum(social_scores) / len(social_scores) if social_scores else 0
-            financial_score = sum(financial_scores) / len(financial_scores) if financial_scores else 0
-        else:  # 일별
-            row = region_data.iloc[0]
-            climate_score = 1 if pd.notna(row.get(f"기후스트레스:{region}")) and row[f"기후스트레스:{region}"] > 13 else 0
-            social_score = 1 if pd.notna(row.get(f"사회스트레스:{region}")) and row[f"사회스트레스:{region}"] >= 0.7 else 0
-            financial_score = 1 if pd.notna(row.get('금융스트레스')) and row['금융스트레스'] >= 2 else 0
-        
-        total_score = min(climate_score + social_score + financial_score, 3)
-        table_data.append({
-            '지역': region,
-            '기후스트레스 점수': round(climate_score, 2),
-            '사회스트레스 점수': round(social_score, 2),
-            '금융스트레스 점수': round(financial_score, 2),
-            '총 점수': round(total_score, 2)
-        })
-    
-    return pd.DataFrame(table_data)
+# ?profile=1 또는 사이드바 '프로파일' 버튼으로 이번 실행 한 번만 프로파일링 (요청이 없으면 확인 외 비용 없음)
+# 지난 실행이 st.stop()/재실행 예외로 finish 전에 끝났으면 그 캡처를 이 세션의 스크립트 스레드에서 정리
+profiler.discard(st.session_state.pop('profile_capture', None))
+profile_capture = None
+if profiler.requested(st.query_params, st.session_state):
+    st.query_params.pop(profiler.QUERY_PARAM, None)
+    st.session_state['profile_next'] = False
+    profile_capture = profiler.start('real', root=__file__)
+    if profile_capture is None:
+        st.toast("다른 실행을 프로파일링 중이라 이번 실행은 건너뜀")
+    else:
+        st.session_state['profile_capture'] = profile_capture
 
-def create_prediction_table(prediction_data, selected_year=None, selected_date=None, prediction_mode="년도별"):
-    regions = ['서울특별시', '경기도', '강원도', '경상남도', '경상북도', '광주광역시', '대구광역시', '대전광역시', 
-               '부산광역시', '세종특별자치시', '울산광역시', '인천광역시', '전라남도', '전라북도', '제주도', 
-               '충청남도', '충청북도']
-    table_data = []
-    
-    for region in regions:
-        region_data = prediction_data[prediction_data['도단위'] == region]
-        if selected_year and prediction_mode == "년도별":
-            region_data = region_data[region_data['date'].dt.year == selected_year]
-        elif selected_date and prediction_mode == "일별":
-            region_data = region_data[region_data['date'].dt.normalize() == selected_date.normalize()]
-        
-        if region_data.empty:
-            table_data.append({'지역': region, '위험률': '데이터 없음'})
-            continue
-        
-        prob = region_data['crime_probability'].mean() if prediction_mode == "년도별" else region_data['crime_probability'].iloc[0]
-        table_data.append({'지역': region, '위험률': f"{prob:.3f}" if pd.notna(prob) else '데이터 없음'})
-    
-    return pd.DataFrame(table_data)
+@st.cache_resource
+def load_store(crime_path, indicator_path, prediction_path):
+    # 세션 간 공유 저장소: 데이터셋은 보기가 처음 필요로 할 때 전체를 읽고, 이후에는 CSV 끝에 추가된 행만 읽어 갱신
+    # (읽기는 스크립트에서 진행 상황을 보여 주며 refresh로 수행)
+    return ingest.IncrementalStore(crime_path, indicator_path, prediction_path, load=False)
+
+def required_datasets(view_type, live_mode):
+    # 보기에 필요한 데이터셋만 로드 (예측 보기: 예측, 그 외: 사건+지표, 실시간 모드: 사건 추가)
+    names = ['prediction'] if view_type == "예측" else ['crime', 'indicator']
+    if live_mode and 'crime' not in names:
+        names.append('crime')
+    return names
+
+@st.cache_resource
+def load_feed_watcher(crime_path, indicator_path, prediction_path):
+    # data/feed/<데이터셋>/ 에 떨어진 배치를 적재 (세션 간 하나만 사용)
+    return ingest.FeedWatcher(paths={'crime': crime_path, 'indicator': indicator_path, 'prediction': prediction_path})
 
-def get_prediction_color(prob):
-    if prob is None:
-        return 'gray'
-    return 'green' if prob < 0.3 else 'lime' if prob < 0.5 else 'yellow' if prob < 0.7 else 'orange' if prob < 0.85 else 'red'
+@st.cache_resource
+def load_alert_engine():
+    # 경보 상태/로그는 data/alerts/ 에 저장 (세션 간 하나만 사용)
+    return alerts.AlertEngine()
 
-def create_map(view_type, selected_year=None, selected_date=None, df_crime=None, df_indicator=None, df_prediction=None, geo_data=None):
+def notify_alerts(events):
+    # 새 단계 전환을 토스트로 알림 (많으면 최근 3건 + 요약)
+    for event in events[-3:]:
+        st.toast("🚨 " + alerts.format_event(event))
+    if len(events) > 3:
+        st.toast(f"새 경보 전환 {len(events)}건 (최근 경보 참고)")
+
+@cache_manager.memoize(max_entries=8)
+def live_map_html(_df_crime, version, window_days):
+    # 최근 사건만 그린 가벼운 지도 (데이터 버전이 같으면 같은 HTML을 재사용)
+    latest = _df_crime['date'].max()
+    recent = _df_crime[_df_crime['date'] >= latest.normalize() - pd.Timedelta(days=window_days - 1)]
     m = folium.Map(location=[36.5, 127.5], zoom_start=7, tiles='CartoDB Positron')
+    marker_cluster = markers.weighted_cluster().add_to(m)
+    markers.add_points(markers.collapse_points(recent), marker_cluster, 'red')
+    return m.get_root().render()
+
+def live_panel(data_store, feed_watcher, window_days):
+    # 실시간 모드 조각: 피드 적재 → 추가분 갱신 → 최근 사건 지도/표만 다시 그림 (기본 코로플렛은 그대로)
+    processed = feed_watcher.poll()
+    data_store.refresh()
+    notify_alerts(load_alert_engine().evaluate(data_store.frames))
+    df_live = data_store.frames.get('crime')
+    if df_live is None or df_live.empty:
+        # 사건이 아직 없으면 (빈 파일, 첫 배치 전) 최근 날짜를 정할 수 없으므로 자리 표시만
+        st.markdown(f"#### 실시간 사건 (최근 {window_days}일)")
+        col1, col2 = st.columns(2)
+        col1.metric("이번 갱신 적재", sum(result['appended'] for _, _, result in processed))
+        col2.metric("마지막 확인", time.strftime('%H:%M:%S'))
+        st.info("아직 적재된 사건이 없습니다. 피드에 배치가 들어오면 표시됩니다.")
+    else:
+        latest = df_live['date'].max().normalize()
+        window_start = latest - pd.Timedelta(days=window_days - 1)
+        live_counts = data_store.cube.region_counts(start=window_start, end=latest)
+
+        st.markdown(f"#### 실시간 사건 (최근 {window_days}일, {window_start.strftime('%Y-%m-%d')} ~ {latest.strftime('%Y-%m-%d')})")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("최근 사건 수", sum(live_counts.values()))
+        col2.metric("이번 갱신 적재", sum(result['appended'] for _, _, result in processed))
+        col3.metric("마지막 확인", time.strftime('%H:%M:%S'))
+        components.html(live_map_html(df_live, data_store.version, window_days), height=400)
+        live_table = pd.DataFrame([{'지역': region, '범죄 건수': count} for region, count in live_counts.items() if count])
+        st.dataframe(live_table, use_container_width=True, hide_index=True)
+    if feed_watcher.history:
+        st.caption("최근 적재: " + ", ".join(f"{name} ({export.DATASET_LABELS[dataset]} " + (
+                                               f"실패: {result['error']}" if 'error' in result else f"{result['appended']}행"
+                                               + (f", 격리 {result['quarantined']}행" if result['quarantined'] else '')) + ")"
+                                           for dataset, name, result in feed_watcher.history[:5]))
+
+@cache_manager.memoize(max_entries=4)
+def load_spatial_index(_df_crime, version):
+    return spatial_index.GridIndex(_df_crime['위도'].to_numpy(), _df_crime['경도'].to_numpy())
+
+@cache_manager.memoize
+def load_geojson():
+    return geometry.load_province_geojson()
+
+@cache_manager.memoize
+def load_district_geojson(province):
+    # 선택된 도의 시군구 경계만 필요할 때 로드 (도별로 캐시)
+    return geometry.load_district_geojson(province)
+
+@cache_manager.memoize
+def load_density_overlay(df_crime, view_type, selected_year=None, selected_date=None, bandwidth_km=10.0):
+    # 보기별 밀도 히트맵: 격자 binning + FFT 커널 합성곱 결과를 PNG 한 장으로 캐시
+    if view_type == "년도별":
+        points = df_crime[df_crime['date'].dt.year == selected_year]
+    elif view_type == "일별":
+        points = df_crime[df_crime['date'].dt.normalize() == selected_date.normalize()]
+    else:
+        points = df_crime
+    return density.density_overlay(points['위도'], points['경도'], bandwidth_km=bandwidth_km)
+
+@cache_manager.memoize
+def load_hotspots(_df_crime, version, grain='year'):
+    # 시공간 핫스팟 (Gi* + 스캔 군집): 전체 기간을 한 번에 계산해 데이터 버전별 캐시
+    return hotspots.detect_hotspots(_df_crime, grain=grain)
+
+@cache_manager.memoize
+def load_evaluation(_df_prediction, version, period='year'):
+    # 예측 평가 지표 (지역 × 기간 전체를 한 번에 계산, 예측 데이터 버전별 캐시)
+    return evaluation.evaluate(_df_prediction, period)
+
+@cache_manager.memoize
+def load_roc_curve(_df_prediction, version, region=None, period=None):
+    return evaluation.roc_curve(_df_prediction, region, period)
+
+@cache_manager.memoize(max_entries=4)
+def load_range_sums(_df_indicator, _df_prediction, _df_crime, version):
+    # 임의 기간 집계용 지역별 누적합 (로드된 데이터셋만, 데이터 버전별 캐시)
+    return range_sums.RangeSums(_df_indicator, _df_prediction, _df_crime)
+
+@cache_manager.memoize(max_entries=4)
+def load_lead_lag(_df_indicator, _df_crime, version, max_lag, window):
+    # 지표 × 지역 × 시차 상관 (FFT 한 번), 데이터 버전별 캐시
+    return lead_lag.cross_correlation(_df_indicator, _df_crime, max_lag, window)
+
+@cache_manager.memoize(max_entries=8)
+def load_scenario(_df_indicator, _df_crime, version, indicator, change, regions, horizon, trials):
+    return scenario.simulate(_df_indicator, _df_crime, indicator, change, list(regions), horizon, trials)
+
+def create_map(view_type, selected_year=None, selected_date=None, df_crime=None, df_indicator=None, df_prediction=None, geo_data=None, region_counts=None, district_geo=None, density_layer=None, hotspot_layer=None, viewport_rows=None, search_area=None):
+    # 기본 지도는 고정, 동적 레이어는 layers로 따로 반환 (map_state.render가 레이어만 교체)
+    m = map_state.base_map()
+    layers = []
     crime_group = folium.FeatureGroup(name="범죄 마커", show=(view_type != "예측"))
     risk_group = folium.FeatureGroup(name="위험 코로플렛", show=True)
-    marker_cluster = MarkerCluster().add_to(crime_group)
+    marker_cluster = markers.weighted_cluster().add_to(crime_group)
     
     if view_type == "전체 데이터":
-        crime_data = df_crime
+        crime_view = df_crime
         indicator_data = df_indicator
         title = "전체 데이터 맵"
     elif view_type == "년도별":
-        crime_data = df_crime[df_crime['date'].dt.year == selected_year]
+        crime_view = df_crime[df_crime['date'].dt.year == selected_year]
         indicator_data = df_indicator[df_indicator['date'].dt.year == selected_year]
         title = f"{selected_year}년 맵"
     elif view_type == "일별":
         selected_date_only = selected_date.normalize()
-        crime_data = df_crime[df_crime['date'].dt.normalize() == selected_date_only]
+        crime_view = df_crime[df_crime['date'].dt.normalize() == selected_date_only]
         indicator_data = df_indicator[df_indicator['date'].dt.normalize() == selected_date_only]
         title = f"{selected_date_only.strftime('%Y-%m-%d')} 맵"
     else:  # 예측 모드
-        crime_data = pd.DataFrame()
+        crime_view = pd.DataFrame()
         if selected_date:
             indicator_data = df_prediction[df_prediction['date'].dt.normalize() == selected_date.normalize()]
         else:
             indicator_data = df_prediction[df_prediction['date'].dt.year == selected_year]
         title = f"{selected_year}년 예측 맵" if selected_year else f"{selected_date.strftime('%Y-%m-%d')} 예측 맵"
     
-    if view_type != "예측" and not crime_data.empty:
-        crime_data_limited = crime_data.head(2000)
-        point_count = len(crime_data)
+    if view_type != "예측" and not crime_view.empty:
+        # 같은 좌표의 사건은 건수 가중 마커 하나로 합쳐 표시 (건수 많은 위치부터 2000곳)
+        points = markers.collapse_points(crime_view)
+        point_count = len(crime_view)
         marker_color = 'green' if point_count < 100 else 'orange' if point_count < 500 else 'red'
-        for _, row in crime_data_limited.iterrows():
-            if pd.notna(row['위도']) and pd.notna(row['경도']):
-                folium.Marker(
-                    location=[float(row['위도']), float(row['경도'])],
-                    icon=folium.Icon(color=marker_color, icon='exclamation-sign', prefix='glyphicon'),
-                    popup=f"날짜: {row['date'].strftime('%Y-%m-%d')}<br>지역: {row['full_address']}"
-                ).add_to(marker_cluster)
-        if point_count > 2000:
-            st.info(f"범죄 데이터 {point_count}건 중 2000건만 표시")
+        if viewport_rows is not None:
+            # 화면 범위(+여유) 안의 위치만 전송
+            total_locations = len(points)
+            visible = crime_view.index.isin(df_crime.index[viewport_rows])
+            points = markers.collapse_points(crime_view[visible])
+            st.caption(f"화면 범위 마커: {len(points)} / {total_locations}개 위치")
+        markers.add_points(points.head(2000), marker_cluster, marker_color)
+        if len(points) > 2000:
+            st.info(f"범죄 데이터 {point_count}건 ({len(points)}개 위치) 중 2000개 위치만 표시")
     
-    regions = ['서울특별시', '경기도', '강원도', '경상남도', '경상북도', '광주광역시', '대구광역시', '대전광역시', 
-               '부산광역시', '세종특별자치시', '울산광역시', '인천광역시', '전라남도', '전라북도', '제주도', 
-               '충청남도', '충청북도']
-    region_mapping = {
-        'Seoul': '서울특별시', 'Gyeonggi-do': '경기도', 'Gangwon-do': '강원도', 'Gyeongsangnam-do': '경상남도', 
-        'Gyeongsangbuk-do': '경상북도', 'Gwangju': '광주광역시', 'Daegu': '대구광역시', 'Daejeon': '대전광역시', 
-        'Busan': '부산광역시', 'Sejong': '세종특별자치시', 'Ulsan': '울산광역시', 'Incheon': '인천광역시', 
-        'Jeollanam-do': '전라남도', 'Jeollabuk-do': '전라북도', 'Jeju': '제주도', 
-        'Chungcheongnam-do': '충청남도', 'Chungcheongbuk-do': '충청북도'
-    }
+    # 지역 점수/확률은 조회 API와 같은 crime_view 구현으로 계산 (indicator_data는 이미 보기 기간으로 걸러짐)
+    region_mapping = crime_data.REGION_MAPPING
+    scores = {region: 0 for region in crime_data.REGIONS}
+    probabilities = {region: None for region in crime_data.REGIONS}
+    if view_type == "예측":
+        probabilities = crime_data.region_probabilities(indicator_data, prediction_mode="일별" if selected_date else "년도별",
+                                                               selected_date=selected_date)
+    else:
+        scores = crime_data.region_scores(indicator_data, daily=not (view_type in ["전체 데이터", "년도별"] and not selected_date))
     
-    scores = {region: 0 for region in regions}
-    probabilities = {region: None for region in regions}
-    
-    if not indicator_data.empty:
-        if view_type == "예측":
-            for region in regions:
-                region_data = indicator_data[indicator_data['도단위'] == region]
-                if not region_data.empty:
-                    probabilities[region] = region_data['crime_probability'].iloc[0] if selected_date else region_data['crime_probability'].mean()
-        else:
-            for region in regions:
-                if view_type in ["전체 데이터", "년도별"] and not selected_date:
-                    region_scores = [calculate_risk_score(row, region) for _, row in indicator_data.iterrows() if pd.notna(row.get(f"사회스트레스:{region}", None))]
-                    scores[region] = round(sum(region_scores) / len(region_scores)) if region_scores else 0
-                elif indicator_data.shape[0] > 0:
-                    scores[region] = calculate_risk_score(indicator_data.iloc[0], region)
+    # 건수 기준 코로플렛: 건수 큐브에서 받은 지역별 건수를 최댓값 대비 비율로 색칠
+    use_counts = region_counts is not None and view_type != "예측"
+    max_count = max(region_counts.values(), default=0) if use_counts else 0
     
     def style_function(feature):
         region = region_mapping.get(feature['properties']['NAME_1'], feature['properties']['NAME_1'])
         prob = probabilities.get(region, None)
-        color = get_prediction_color(prob) if view_type == "예측" else {0: 'green', 1: 'yellow', 2: 'orange', 3: 'red'}.get(scores.get(region, 0), 'green')
+        if view_type == "예측":
+            color = crime_data.get_prediction_color(prob)
+        elif use_counts:
+            color = count_cube.get_count_color(region_counts.get(region, 0), max_count)
+        else:
+            color = {0: 'green', 1: 'yellow', 2: 'orange', 3: 'red'}.get(scores.get(region, 0), 'green')
         return {'fillColor': color, 'color': 'black', 'weight': 1, 'fillOpacity': 0.3}
     
     def tooltip_function(feature):
@@ -223,15 +239,62 @@ def create_map(view_type, selected_year=None, selected_date=None, df_crime=None,
             prob = probabilities.get(region, None)
             prob_str = f"{prob:.3f}" if prob is not None else '없음'
             return folium.GeoJsonTooltip(fields=['NAME_1'], aliases=['지역'], extra_html=f'<br>위험률: {prob_str}')
+        if use_counts:
+            return folium.GeoJsonTooltip(fields=['NAME_1'], aliases=['지역'], extra_html=f'<br>범죄 건수: {region_counts.get(region, 0)}')
         return folium.GeoJsonTooltip(fields=['NAME_1'], aliases=['지역'], extra_html=f'<br>위험 점수: {scores.get(region, 0)}')
     
     folium.GeoJson(geo_data, style_function=style_function, tooltip=tooltip_function).add_to(risk_group)
-    crime_group.add_to(m)
-    risk_group.add_to(m)
-    folium.LayerControl().add_to(m)
+    layers += [crime_group, risk_group]
+    
+    if density_layer is not None:
+        density_group = folium.FeatureGroup(name="밀도 히트맵", show=True)
+        folium.raster_layers.ImageOverlay(image=density_layer['image'], bounds=density_layer['bounds'], opacity=0.7,
+                                          interactive=False, zindex=400).add_to(density_group)
+        layers.append(density_group)
+    
+    # 핫스팟: Gi* 유의 격자(90/95/99%)와 스캔 통계 군집(점선)
+    if hotspot_layer is not None:
+        hotspot_group = folium.FeatureGroup(name="핫스팟", show=True)
+        hotspot_colors = {3: '#bd0026', 2: '#f03b20', 1: '#fd8d3c'}
+        confidence = {level: label for _, level, label in hotspots.GI_BINS}
+        for cell in hotspot_layer['cells'].itertuples():
+            folium.Rectangle(
+                bounds=[[cell.south, cell.west], [cell.north, cell.east]],
+                color=hotspot_colors[cell.bin], weight=1, fill=True, fill_opacity=0.45,
+                tooltip=f"핫스팟 {confidence[cell.bin]} (Gi* z={cell.z:.2f})<br>기간: {cell.period}, 건수: {cell.count}"
+            ).add_to(hotspot_group)
+        for cluster in hotspot_layer['clusters'].itertuples():
+            folium.Rectangle(
+                bounds=[[cluster.south, cluster.west], [cluster.north, cluster.east]],
+                color='purple', weight=2, dash_array='6', fill=False,
+                tooltip=(f"시공간 군집: {cluster.start.strftime('%Y-%m-%d')} ~ {cluster.end.strftime('%Y-%m-%d')}<br>"
+                         f"관측 {cluster.observed}건 / 기대 {cluster.expected:.2f}건, p={cluster.p_value:.2f}")
+            ).add_to(hotspot_group)
+        layers.append(hotspot_group)
+    
+    # 반경 검색: 클릭한 지점과 검색 반경
+    if search_area is not None:
+        search_group = folium.FeatureGroup(name="반경 검색", show=True)
+        (search_lat, search_lon), search_km = search_area
+        folium.Circle(location=[search_lat, search_lon], radius=search_km * 1000, color='blue', weight=2,
+                      fill=True, fill_opacity=0.08, tooltip=f"반경 {search_km}km").add_to(search_group)
+        folium.CircleMarker(location=[search_lat, search_lon], radius=4, color='blue', fill=True, fill_opacity=1).add_to(search_group)
+        layers.append(search_group)
+    
+    # 시군구 드릴다운: 선택된 도의 시군구 경계만 건수 코로플렛으로 추가
+    if district_geo is not None and district_geo['features']:
+        district_group = folium.FeatureGroup(name="시군구 건수", show=True)
+        max_district_count = max(feature['properties']['count'] for feature in district_geo['features'])
+        folium.GeoJson(
+            district_geo,
+            style_function=lambda feature: {'fillColor': count_cube.get_count_color(feature['properties']['count'], max_district_count),
+                                            'color': 'black', 'weight': 1, 'fillOpacity': 0.5},
+            tooltip=folium.GeoJsonTooltip(fields=['name', 'count'], aliases=['시군구', '범죄 건수'])
+        ).add_to(district_group)
+        layers.append(district_group)
     
     legend_html = '''
-        <div style="position: fixed; bottom: 50px; right: 50px; z-index:9999; background-color:white; padding:10px; border:2px solid grey;">
+        <div style="background-color:white; padding:10px; border:2px solid grey;">
             <p><strong>범례%s</strong></p>
             <p><strong>위험 코로플렛</strong></p>
             %s
@@ -248,7 +311,12 @@ def create_map(view_type, selected_year=None, selected_date=None, df_crime=None,
         <p><span style="color:yellow;">■</span> 주의 (0.5~0.7)</p>
         <p><span style="color:orange;">■</span> 경보 (0.7~0.85)</p>
         <p><span style="color:red;">■</span> 위험 (≥0.85)</p>
-        ''' if view_type == "예측" else '''
+        ''' if view_type == "예측" else f'''
+        <p><span style="color:green;">■</span> 0건</p>
+        <p><span style="color:yellow;">■</span> 최다 대비 &lt;34% (최다 {max_count}건)</p>
+        <p><span style="color:orange;">■</span> 최다 대비 &lt;67%</p>
+        <p><span style="color:red;">■</span> 최다 대비 ≥67%</p>
+        ''' if use_counts else '''
         <p><span style="color:green;">■</span> 0점: 안전</p>
         <p><span style="color:yellow;">■</span> 1점: 주의</p>
         <p><span style="color:orange;">■</span> 2점: 경고</p>
@@ -256,36 +324,81 @@ def create_map(view_type, selected_year=None, selected_date=None, df_crime=None,
         ''',
         ': 표시되지 않음' if view_type == "예측" else ''
     )
-    m.get_root().html.add_child(folium.Element(legend_html))
+    view = {'layers': layers, 'legend': legend_html, 'center': map_state.DEFAULT_CENTER, 'zoom': map_state.DEFAULT_ZOOM}
     
-    if not crime_data.empty:
-        avg_lat = crime_data['위도'].mean()
-        avg_lon = crime_data['경도'].mean()
+    if not crime_view.empty:
+        avg_lat = crime_view['위도'].mean()
+        avg_lon = crime_view['경도'].mean()
         if pd.notna(avg_lat) and pd.notna(avg_lon):
-            m.location = [avg_lat, avg_lon]
-            m.zoom_start = 8
+            view['center'] = (float(avg_lat), float(avg_lon))
+            view['zoom'] = 8
+    if district_geo is not None and district_geo['features']:
+        bounds = geometry.geojson_bounds(district_geo)
+        if bounds:
+            view['center'], view['zoom'] = map_state.bounds_view(bounds)
     
-    return m, title
+    return m, view, title
 
 st.title("이상동기 범죄 경보 맵")
 
-# 경로만 Streamlit 배포용으로 변경
-crime_path = "./data/15~25년도 이상동기(도단위추가)_with_coords_openai.csv"
-indicator_path = "./data/지표데이터(4대범죄추가계산).csv"
-prediction_path = "./data/predict.csv"
-
-# 캐시 갱신 강제
-cache_buster = str(time.time())
-
-df_crime, crime_dates, df_indicator, indicator_dates, df_prediction, prediction_dates = load_data(crime_path, indicator_path, prediction_path, cache_buster)
-geo_data = load_geojson(cache_buster)
+# 경로는 데이터셋 레지스트리에서 (환경 변수로 변경 가능)
+crime_path = crime_data.DATASETS['crime'].path
+indicator_path = crime_data.DATASETS['indicator'].path
+prediction_path = crime_data.DATASETS['prediction'].path
+LOAD_TIMEOUT = 60  # 데이터셋별 로드 제한 시간 (초)
+GEOJSON_TIMEOUT = 10
 
 with st.sidebar:
     st.title('🚨 대시보드')
     view_type = st.selectbox('보기 유형', ['전체 데이터', '년도별', '일별', '예측'])
-    
+
+# 시작 단계: 경계 GeoJSON과 이 보기에 필요한 CSV를 동시에 로드 (콜드 스타트 = 가장 느린 소스 시간)
+# 실시간 모드 토글은 아래 사이드바에서 그려지므로 지난 실행의 값을 세션 상태에서 읽는다
+geo_future = loader.submit(load_geojson)
+data_store = load_store(crime_path, indicator_path, prediction_path)
+needed_datasets = required_datasets(view_type, st.session_state.get('live_mode', False))
+for name in needed_datasets:
+    if not crime_data.DATASETS[name].exists():
+        st.error(crime_data.DATASETS[name].missing_message)
+        st.stop()
+data_store.activate(needed_datasets)
+cold_datasets = [name for name in needed_datasets if not data_store.is_loaded(name)]
+if cold_datasets:
+    with st.status("데이터 로드 중...", expanded=True) as load_status:
+        def report_progress(name, rows, error):
+            if name not in cold_datasets:
+                return
+            label = export.DATASET_LABELS[name]
+            st.write(f"{label} 데이터: {rows}행" if error is None else f"{label} 데이터 로드 실패: {error}")
+        new_rows = data_store.refresh(progress=report_progress, timeout=LOAD_TIMEOUT)
+        if not all(data_store.is_loaded(name) for name in cold_datasets):
+            load_status.update(label="데이터 로드 실패", state='error')
+            st.stop()
+        load_status.update(label="데이터 로드 완료", state='complete', expanded=False)
+    new_rows = {name: count for name, count in new_rows.items() if name not in cold_datasets}
+else:
+    new_rows = data_store.refresh(timeout=LOAD_TIMEOUT)
+if new_rows:
+    st.toast("새 데이터 반영: " + ", ".join(f"{export.DATASET_LABELS[name]} {count}행" for name, count in new_rows.items()))
+for name, error in data_store.errors.items():
+    if name not in cold_datasets:
+        st.warning(f"{export.DATASET_LABELS[name]} 데이터 갱신 실패, 이전 데이터 사용: {error}")
+df_crime, crime_dates, df_indicator, indicator_dates, df_prediction, prediction_dates = data_store.data()
+crime_cube = data_store.cube
+# 지난 평가 이후 추가된 예측/지표 행만 경보 평가 (로드된 데이터셋만)
+notify_alerts(load_alert_engine().evaluate(data_store.frames))
+geo_data, geo_error = loader.result(geo_future, timeout=GEOJSON_TIMEOUT, fallback=geometry.empty_geojson)
+if geo_error:
+    st.warning(f"지도 경계 로드 실패, 경계 없이 표시: {geo_error}")
+
+with st.sidebar:
     selected_year = None
     selected_date = None
+    choropleth_basis = '위험 점수'
+    show_hotspots = False
+    show_density = False
+    viewport_only = False
+    radius_search = False
     
     if view_type in ['년도별', '일별']:
         crime_years = [y for y in sorted(df_crime['date'].dt.year.unique()) if y <= 2023]
@@ -298,7 +411,25 @@ with st.sidebar:
             else:
                 st.warning(f"{selected_year}년 데이터 없음")
                 view_type = "년도별"
-    elif view_type == '예측':
+    live_mode = st.toggle('실시간 모드', value=False, key='live_mode')
+    if live_mode:
+        live_interval = st.slider('갱신 주기 (초)', min_value=5, max_value=120, value=15)
+        live_window = st.slider('실시간 표시 기간 (일)', min_value=1, max_value=90, value=7)
+    drill_province = '전체 도'
+    if view_type != '예측':
+        choropleth_basis = st.radio('코로플렛 기준', ['위험 점수', '범죄 건수'])
+        drill_province = st.selectbox('시군구 보기', ['전체 도'] + crime_data.REGIONS)
+        show_density = st.checkbox('밀도 히트맵', value=False)
+        if show_density:
+            density_bandwidth = st.slider('히트맵 반경 (km)', min_value=2, max_value=50, value=10)
+        show_hotspots = st.checkbox('핫스팟 분석', value=False)
+        viewport_only = st.checkbox('보이는 범위만 마커 전송', value=True)
+        radius_search = st.checkbox('반경 검색 (지도 클릭)', value=False)
+        if radius_search:
+            search_radius = st.slider('검색 반경 (km)', min_value=1, max_value=50, value=5)
+        if show_hotspots:
+            hotspot_grain = st.radio('핫스팟 기간 단위', ['년', '월'], horizontal=True)
+    if view_type == '예측':
         prediction_years = sorted(df_prediction['date'].dt.year.unique())
         selected_year = st.selectbox('예측 년도', prediction_years, index=len(prediction_years)-1)
         prediction_mode = st.radio('예측 모드', ['년도별', '일별'])
@@ -311,24 +442,274 @@ with st.sidebar:
                 st.warning(f"{selected_year}년 예측 데이터 없음")
                 prediction_mode = "년도별"
 
+if view_type == "년도별":
+    count_period = {'year': selected_year}
+elif view_type == "일별":
+    count_period = {'date': selected_date}
+else:
+    count_period = {'end': pd.Timestamp('2023-12-31')}
+region_counts = crime_cube.region_counts(**count_period) if crime_cube is not None else {}
+
+density_layer = load_density_overlay(df_crime, view_type, selected_year, selected_date, float(density_bandwidth)) if show_density else None
+
+hotspot_layer = None
+if show_hotspots:
+    with st.spinner("핫스팟 계산 중..."):
+        hotspot_result = load_hotspots(df_crime, data_store.version, 'month' if hotspot_grain == '월' else 'year')
+    if hotspot_result['cells'].empty:
+        st.sidebar.caption("유의한 Gi* 격자 없음 (이웃 사건 수/기대 건수가 적은 격자는 검정하지 않음, 월 단위라면 '년'으로 바꿔 보세요)")
+    if view_type == "년도별":
+        hotspot_layer = hotspots.view_hotspots(hotspot_result, f"{selected_year}-01-01", f"{selected_year}-12-31")
+    elif view_type == "일별":
+        hotspot_layer = hotspots.view_hotspots(hotspot_result, selected_date, selected_date)
+    else:
+        hotspot_layer = hotspots.view_hotspots(hotspot_result, end=pd.Timestamp('2023-12-31'))
+
+district_geo = None
+if view_type != "예측" and drill_province != '전체 도':
+    try:
+        district_totals = crime_cube.totals('district', province=drill_province, **count_period)
+        district_counts = {district: count for (_, district), count in district_totals.items()}
+        district_geo, unassigned_count = geometry.attach_district_counts(load_district_geojson(drill_province), district_counts)
+        if unassigned_count:
+            st.caption(f"{drill_province}: 시군구 경계로 특정되지 않은 {unassigned_count}건은 시군구 코로플렛에서 제외")
+    except Exception as e:
+        st.warning(f"시군구 경계 로드 실패: {e}")
+
+# 지도가 마지막으로 보고한 화면 범위로 마커를 제한 (첫 실행은 범위가 없으므로 전체)
+viewport_rows = None
+viewport = map_state.viewport_bounds(st.session_state.get('combined_map')) if viewport_only else None
+if viewport is not None:
+    viewport_rows = load_spatial_index(df_crime, data_store.version).query_box(*spatial_index.pad_bounds(viewport))
+search_point = map_state.clicked_point(st.session_state.get('combined_map')) if radius_search else None
+map_returns = (['bounds'] if viewport_only else []) + (['last_clicked'] if radius_search else [])
+
 st.markdown("#### 통합 맵")
-combined_map, combined_title = create_map(view_type, selected_year, selected_date, df_crime, df_indicator, df_prediction, geo_data)
-folium_static(combined_map, width=1000, height=600)
+combined_map, combined_view, combined_title = create_map(view_type, selected_year, selected_date, df_crime, df_indicator, df_prediction, geo_data,
+                                                         region_counts=region_counts if choropleth_basis == '범죄 건수' else None,
+                                                         district_geo=district_geo, density_layer=density_layer, hotspot_layer=hotspot_layer,
+                                                         viewport_rows=viewport_rows,
+                                                         search_area=(search_point, search_radius) if search_point else None)
+# 지도 인스턴스는 유지하고 레이어만 교체 (범례는 지도 밖에 표시)
+map_col, legend_col = st.columns([4, 1])
+with map_col:
+    map_state.render(combined_map, combined_view['layers'], key='combined_map',
+                     center=combined_view['center'], zoom=combined_view['zoom'], width=None,
+                     returned_objects=map_returns)
+with legend_col:
+    st.markdown(combined_view['legend'], unsafe_allow_html=True)
+
+if radius_search:
+    if search_point is None:
+        st.caption("지도에서 위치를 클릭하면 반경 안의 사건을 거리순으로 보여줍니다")
+    else:
+        # 데이터 로드 때 만든 격자 인덱스로 반경 검색 후 현재 보기(년도/일) 필터 적용
+        _, nearby_rows, nearby_km = load_spatial_index(df_crime, data_store.version).query_radius(*search_point, search_radius)
+        nearby = df_crime.iloc[nearby_rows].assign(거리_km=nearby_km.round(2))
+        nearby = crime_data.filter_view(nearby, view_type, selected_year, selected_date)
+        st.markdown(f"##### 반경 {search_radius}km 내 사건 ({search_point[0]:.4f}, {search_point[1]:.4f}): {len(nearby)}건")
+        st.dataframe(nearby[['거리_km', '날짜', '도단위', 'full_address']].rename(columns={'거리_km': '거리 (km)', 'full_address': '주소'}),
+                     use_container_width=True, hide_index=True)
+
+if live_mode:
+    # 조각만 주기적으로 다시 실행 (전체 페이지 재실행 없음)
+    st.fragment(run_every=live_interval)(live_panel)(data_store, load_feed_watcher(crime_path, indicator_path, prediction_path), live_window)
+
+active_alerts = load_alert_engine().active()
+with st.expander(f"최근 경보 (현재 {len(active_alerts)}개 지역 경보 중)", expanded=False):
+    if active_alerts:
+        st.caption("현재: " + ", ".join(f"{region} {alerts.SOURCE_LABELS[source]} {level}" for source, region, level in active_alerts))
+    recent_alerts = load_alert_engine().recent()
+    if recent_alerts.empty:
+        st.caption("기록된 경보 전환 없음")
+    else:
+        recent_alerts['source'] = recent_alerts['source'].map(alerts.SOURCE_LABELS)
+        st.dataframe(recent_alerts.rename(columns={'detected_at': '감지 시각', 'date': '날짜', 'region': '지역', 'source': '기준',
+                                                   'level': '단계', 'direction': '전환', 'value': '값'}),
+                     use_container_width=True, hide_index=True)
 
 st.markdown("#### 지역별 위험 점수/예측 확률")
 if view_type != "예측":
-    risk_table = create_risk_score_table(df_indicator, view_type, selected_year, selected_date)
-    st.dataframe(risk_table, use_container_width=True)
+    risk_tab, lead_lag_tab = st.tabs(['위험 점수', '선행 지표 (시차 상관)'])
+    with risk_tab:
+        risk_table = crime_data.create_risk_score_table(df_indicator, view_type, selected_year, selected_date)
+        st.dataframe(risk_table, use_container_width=True)
+    with lead_lag_tab:
+        # 지표(t)와 사건 수(t + 시차)의 상관: 전체 기간 지표 × 지역 × 시차 0~60일을 한 번에 계산
+        col1, col2 = st.columns(2)
+        lag_window = col1.select_slider('사건 수 합산 기간 (일)', options=[1, 7, 14, 30], value=7)
+        lag_max = col2.select_slider('최대 시차 (일)', options=[14, 30, 60], value=lead_lag.MAX_LAG)
+        lag_result = load_lead_lag(df_indicator, df_crime, data_store.version, lag_max, lag_window)
+        strongest = lead_lag.strongest_lags(lag_result)
+        st.caption(f"칸 색: 시차 0~{lag_max}일 중 |r|이 가장 큰 상관계수 (양수: 지표가 높을수록 그 뒤 {lag_window}일 사건이 많음). "
+                   f"테두리: 95% 유의 (|r| > 1.96/√n, 여러 시차를 본 보정 없음)")
+        heatmap = alt.Chart(strongest.dropna(subset=['r'])).mark_rect(strokeWidth=2).encode(
+            x=alt.X('region:N', title='지역', sort=crime_data.REGIONS),
+            y=alt.Y('metric:N', title='지표', sort=lag_result['metrics']),
+            color=alt.Color('r:Q', title='r', scale=alt.Scale(scheme='redblue', domain=[-0.3, 0.3], reverse=True, clamp=True)),
+            stroke=alt.condition('datum.significant', alt.value('black'), alt.value(None)),
+            tooltip=['metric', 'region', 'lag', alt.Tooltip('r:Q', format='.3f'), 'n', 'significant'])
+        st.altair_chart(heatmap, use_container_width=True)
+        lag_metric = st.selectbox('지표별 시차 상관', lag_result['metrics'])
+        profile = alt.Chart(lead_lag.lag_profile(lag_result, lag_metric).dropna(subset=['r'])).mark_rect().encode(
+            x=alt.X('lag:O', title='시차 (일)'),
+            y=alt.Y('region:N', title='지역', sort=crime_data.REGIONS),
+            color=alt.Color('r:Q', title='r', scale=alt.Scale(scheme='redblue', domain=[-0.3, 0.3], reverse=True, clamp=True)),
+            tooltip=['region', 'lag', alt.Tooltip('r:Q', format='.3f')])
+        st.altair_chart(profile, use_container_width=True)
 else:
-    prediction_table = create_prediction_table(df_prediction, selected_year, selected_date, prediction_mode)
-    st.dataframe(prediction_table, use_container_width=True)
+    probability_tab, evaluation_tab = st.tabs(['위험률', '예측 평가'])
+    with probability_tab:
+        prediction_table = crime_data.create_prediction_table(df_prediction, selected_year, selected_date, prediction_mode)
+        st.dataframe(prediction_table, use_container_width=True)
+    with evaluation_tab:
+        if 'crime_occurred' not in df_prediction.columns:
+            st.warning("예측 데이터에 crime_occurred 열이 없어 평가할 수 없음")
+        else:
+            prediction_version = crime_data.DATASETS['prediction'].version()
+            eval_unit = st.radio('평가 단위', ['년도별', '월별'], horizontal=True)
+            eval_region = st.selectbox('평가 지역', [evaluation.ALL] + crime_data.REGIONS)
+            yearly = load_evaluation(df_prediction, prediction_version, 'year')
+            summary = yearly['summary'] if eval_unit == '년도별' else load_evaluation(df_prediction, prediction_version, 'month')['summary']
+            year_scope = str(selected_year)
+
+            overall = yearly['summary']
+            overall = overall[(overall['region'] == eval_region) & (overall['period'] == year_scope)]
+            if not overall.empty:
+                row = overall.iloc[0]
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric(f"AUC ({year_scope})", f"{row['auc']:.3f}" if pd.notna(row['auc']) else '계산 불가')
+                col2.metric("Brier 점수", f"{row['brier']:.3f}")
+                col3.metric("평균 예측 확률", f"{row['mean_probability']:.3f}")
+                col4.metric("실제 발생률", f"{row['observed_rate']:.3f}")
+
+            st.markdown(f"##### 지역별 성능 ({year_scope})")
+            by_region = yearly['summary']
+            by_region = by_region[by_region['period'] == year_scope].drop(columns='period')
+            st.dataframe(by_region.rename(columns={'region': '지역'}).round(3), use_container_width=True, hide_index=True)
+
+            st.markdown(f"##### 기간별 성능 ({eval_region})")
+            by_period = summary[(summary['region'] == eval_region) & (summary['period'] != evaluation.ALL)].drop(columns='region')
+            st.dataframe(by_period.rename(columns={'period': '기간'}).round(3), use_container_width=True, hide_index=True)
+
+            st.markdown(f"##### 기준값별 혼동행렬 ({eval_region}, {year_scope})")
+            matrix = yearly['confusion']
+            matrix = matrix[(matrix['region'] == eval_region) & (matrix['period'] == year_scope)].drop(columns=['region', 'period'])
+            st.dataframe(matrix.round(3), use_container_width=True, hide_index=True)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("##### 보정 곡선")
+                bins = yearly['calibration']
+                bins = bins[(bins['region'] == eval_region) & (bins['period'] == year_scope)]
+                st.line_chart(bins.set_index('mean_probability')[['observed_rate']])
+            with col2:
+                st.markdown("##### ROC 곡선")
+                roc = load_roc_curve(df_prediction, prediction_version, eval_region, year_scope)
+                if roc.empty:
+                    st.write("발생/미발생이 모두 있어야 ROC를 그릴 수 있음")
+                else:
+                    st.line_chart(roc.set_index('fpr')[['tpr']])
 
 if view_type != "예측":
-    crime_count = len(df_crime[df_crime['date'].dt.year <= 2023]) if view_type == "전체 데이터" else len(df_crime[df_crime['date'].dt.year == selected_year]) if view_type == "년도별" else len(df_crime[df_crime['date'].dt.normalize() == selected_date.normalize()])
+    crime_count = sum(region_counts.values())
     st.write(f"범죄 건수: {crime_count}")
+    st.markdown("#### 지역별 범죄 건수")
+    count_table = pd.DataFrame([{'지역': region, '범죄 건수': count} for region, count in region_counts.items()])
+    st.dataframe(count_table, use_container_width=True)
+    with st.expander('월별 건수 (도단위 / 지역)', expanded=False):
+        count_level = st.radio('집계 단위', ['도단위', '지역'], horizontal=True)
+        count_year = selected_year if view_type != "전체 데이터" else None
+        monthly = crime_cube.slice('province' if count_level == '도단위' else 'district', 'month', year=count_year,
+                                   end=None if count_year else pd.Timestamp('2023-12-31'))
+        monthly.columns = [str(month) for month in monthly.columns]
+        st.dataframe(monthly, use_container_width=True)
 else:
     st.write("예측 모드: crime_probability 기반 코로플렛 및 표 표시")
 
+if view_type != "예측":
+    with st.expander('기간 집계', expanded=False):
+        # 임의 기간의 지역별 위험 점수/범죄 건수 (누적합 두 번 조회, 기간을 바꿔도 프레임을 다시 거르지 않음)
+        range_engine = load_range_sums(df_indicator, df_prediction, df_crime, data_store.version)
+        range_first = range_engine.first.date()
+        range_last = (range_engine.first + pd.Timedelta(days=max(range_engine.n_days - 1, 0))).date()
+        range_presets = {'최근 90일': 90, '최근 30일': 30, '최근 1년': 365, '직접 선택': None}
+        range_preset = st.radio('기간', list(range_presets), horizontal=True)
+        range_days = range_presets[range_preset] or 90
+        range_anchor = min(df_indicator['date'].max().date(), range_last)  # 지표가 있는 마지막 날 기준
+        range_default = (max(range_first, range_anchor - pd.Timedelta(days=range_days - 1)), range_anchor)
+        range_value = st.date_input('시작일 ~ 종료일', value=range_default, min_value=range_first, max_value=range_last,
+                                    disabled=range_presets[range_preset] is not None)
+        if len(range_value) < 2:
+            st.caption("종료일을 선택하세요")
+        else:
+            range_start, range_end = (pd.Timestamp(value) for value in range_value)
+            range_table = range_engine.risk_table(range_start, range_end)
+            range_table['지도 점수'] = range_table['지역'].map(range_engine.map_scores(range_start, range_end))
+            range_table['범죄 건수'] = range_table['지역'].map(range_engine.incident_counts(range_start, range_end))
+            if df_prediction is not None:
+                range_probabilities = range_engine.probabilities(range_start, range_end)
+                range_table['예측 위험률'] = range_table['지역'].map(
+                    lambda region: f"{range_probabilities[region]:.3f}" if range_probabilities[region] is not None else '데이터 없음')
+            st.caption(f"{range_start:%Y-%m-%d} ~ {range_end:%Y-%m-%d} ({(range_end - range_start).days + 1}일): "
+                       f"범죄 {int(range_table['범죄 건수'].sum())}건")
+            st.dataframe(range_table, use_container_width=True, hide_index=True)
+
+    with st.expander('시나리오 시뮬레이션', expanded=False):
+        # 지표 변화 가정 → 지역별 위험 점수/기대 사건 수 분포 (같은 계절 과거 구간 부트스트랩, 몬테카를로)
+        with st.form('scenario_form'):
+            col1, col2, col3 = st.columns(3)
+            scenario_indicator = col1.selectbox('지표', scenario.INDICATORS, index=1)
+            scenario_change = col2.slider('변화율 (%)', min_value=-50, max_value=100, value=10, step=5)
+            scenario_horizon = col3.select_slider('기간 (일)', options=[30, 90, 180, 365], value=90)
+            scenario_targets = st.multiselect('대상 지역 (묶음 가능)', list(scenario.REGION_GROUPS) + crime_data.REGIONS, default=['경상도'])
+            scenario_trials = st.select_slider('시행 횟수', options=[1000, 2000, 5000, 10000], value=10000)
+            scenario_run = st.form_submit_button('시뮬레이션 실행')
+        if scenario_run and not scenario_targets:
+            st.warning("대상 지역을 하나 이상 선택하세요")
+        elif scenario_run:
+            scenario_regions = tuple(scenario.resolve_regions(scenario_targets))
+            with st.spinner("시뮬레이션 중..."):
+                scenario_result = load_scenario(df_indicator, df_crime, data_store.version, scenario_indicator,
+                                                scenario_change / 100, scenario_regions, scenario_horizon, scenario_trials)
+            st.caption(f"{scenario_result['start']:%Y-%m-%d}부터 {scenario_horizon}일, {scenario_trials}회 시행: "
+                       f"{', '.join(scenario_regions)} {scenario_indicator} {scenario_change:+d}% (기준 = 변화 없음, 같은 난수)")
+            scenario_table = scenario_result['summary'].rename(columns={
+                'region': '지역', 'baseline_score': '기준 평균 점수', 'scenario_score': '시나리오 평균 점수',
+                'score_p05': '점수 5%', 'score_p95': '점수 95%', 'baseline_risk_days': '기준 3점 일수',
+                'scenario_risk_days': '시나리오 3점 일수', 'baseline_incidents': '기준 기대 사건',
+                'scenario_incidents': '시나리오 기대 사건', 'incidents_p05': '사건 5%', 'incidents_p50': '사건 중앙값',
+                'incidents_p95': '사건 95%', 'prob_more_incidents': '사건 증가 확률'})
+            st.dataframe(scenario_table.round(3), use_container_width=True, hide_index=True)
+            st.bar_chart(scenario_table.set_index('지역')[['기준 기대 사건', '시나리오 기대 사건']])
+
+with st.expander('데이터 내보내기', expanded=False):
+    # 지도와 같은 보기 필터로 원자료를 청크 단위로 기록 (버튼을 누를 때만 생성)
+    export_paths = {'crime': crime_path, 'indicator': indicator_path, 'prediction': prediction_path}
+    export_dataset = st.radio('내보낼 데이터', ['prediction'] if view_type == "예측" else ['crime', 'indicator'],
+                              format_func=export.DATASET_LABELS.get, horizontal=True)
+    export_format = st.radio('파일 형식', list(export.FORMATS) if export.parquet_available() else ['csv'],
+                             format_func=str.upper, horizontal=True)
+    export_name = export.export_filename(export_dataset, export_format, view_type, selected_year, selected_date)
+    # 파일은 임시 파일로 바로 기록하고 세션 상태에는 (이름, 경로, 행 수)만 둔다 (내용을 메모리에 보관하지 않음)
+    if st.button('내보내기 파일 만들기'):
+        previous = st.session_state.pop('export_file', None)
+        if previous and os.path.exists(previous[1]):
+            os.remove(previous[1])
+        fd, export_path = tempfile.mkstemp(prefix='export-', suffix=f".{export_format}")
+        with os.fdopen(fd, 'wb') as f:
+            export_rows = export.export_view(f, export_dataset, export_format, view_type, selected_year, selected_date,
+                                             path=export_paths[export_dataset])
+        st.session_state['export_file'] = (export_name, export_path, export_rows)
+    export_file = st.session_state.get('export_file')
+    if export_file and export_file[0] == export_name and os.path.exists(export_file[1]):
+        _, export_path, export_rows = export_file
+        if export_rows:
+            with open(export_path, 'rb') as f:
+                st.download_button(f"{export_name} 다운로드 ({export_rows}행)", f, file_name=export_name)
+        else:
+            st.write("현재 보기에 내보낼 데이터 없음")
+
 with st.expander('대시보드 설명', expanded=False):
     st.write('''
         **통합 맵**: 범죄 마커와 지역별 위험도를 지도에 표시. 우측 상단에서 레이어를 조정할 수 있습니다.
@@ -353,4 +734,28 @@ with st.expander('대시보드 설명', expanded=False):
         **보기 유형**:
         - 전체 데이터/년도별/일별: 2015~2023년 실제 데이터.
         - 예측: 2024~2025년 범죄 확률 (년도별: 평균, 일별: 특정 날짜).
-    ''')
\ No newline at end of file
+    ''')
+
+with st.sidebar.expander('캐시 상태', expanded=False):
+    # 프로세스 공유 캐시의 메모리 사용량과 적중/실패/제거 통계
+    cache_stats = cache_manager.CACHE.stats()
+    st.caption(f"{cache_manager.CACHE.total_bytes / 2 ** 20:.1f} MB / {cache_manager.CACHE.max_bytes / 2 ** 20:.0f} MB")
+    st.dataframe(cache_stats, use_container_width=True, hide_index=True)
+
+if profile_capture is not None:
+    # 지도 직렬화(st_folium)까지 끝난 뒤 저장. st.stop()으로 끝난 실행은 저장되지 않음 (다음 실행에서 discard)
+    st.session_state.pop('profile_capture', None)
+    st.session_state['profile_result'] = profiler.finish(profile_capture)
+
+with st.sidebar.expander('프로파일', expanded=profile_capture is not None):
+    # 다음 실행 한 번의 cProfile 통계와 샘플링 스택(flame graph용)을 PROFILE_DIR에 저장
+    st.button('다음 실행 프로파일', on_click=lambda: st.session_state.update(profile_next=True))
+    profile_result = st.session_state.get('profile_result')
+    if profile_result is None:
+        st.caption(f"URL에 ?{profiler.QUERY_PARAM}=1을 붙여도 됩니다. 저장 위치: {profiler.PROFILE_DIR}")
+    else:
+        st.caption(f"{profile_result['elapsed']:.2f}초, 샘플 {profile_result['samples']}개: {profile_result['paths']['txt']}")
+        st.dataframe(profile_result['summary'].head(10), use_container_width=True, hide_index=True)
+        with open(profile_result['paths']['folded'], 'rb') as folded:
+            st.download_button('flame graph 스택 (.folded)', folded.read(),
+                               file_name=profile_result['name'] + '.folded')
\ No newline at end of file
@@ -0,0 +1,201 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import crime_data
+
+# 지표 시나리오 몬테카를로 시뮬레이션
+# - 같은 계절(시작일 ±SEASON_DAYS)의 과거 지표 구간을 블록 부트스트랩으로 뽑아 '다음 기간'의 표본으로 쓰고
+# - 선택한 지표/지역에 변화율(시행별 불확실성 포함)을 곱한 뒤 위험 점수(crime_data.exceeds_thresholds)를 다시 계산
+# - 지역 × 일별 점수별 사건 발생률(과거 사건으로 추정)로 기대 사건 수와 포아송 표본을 구한다
+# - 기준 시나리오(변화 없음)와 같은 난수를 써서 차이만 비교되도록 한다
+INDICATORS = ('기후스트레스', '사회스트레스', '금융스트레스')
+REGION_GROUPS = {
+    '경상도': ['경상남도', '경상북도'], '전라도': ['전라남도', '전라북도'], '충청도': ['충청남도', '충청북도'],
+    '수도권': ['서울특별시', '경기도', '인천광역시'],
+}
+SEASON_DAYS = 30
+PRIOR_DAYS = 365  # 점수별 발생률을 지역 평균 발생률 쪽으로 당기는 가상 관측 일수
+CHUNK_TRIALS = 1000
+QUANTILES = (0.05, 0.5, 0.95)
+
+
+def indicator_arrays(df_indicator):
+    # 일별 지표 배열: 날짜, 기후 (D, R), 사회 (D, R), 금융 (D,) — 없는 열은 NaN
+    data = df_indicator.sort_values('date').drop_duplicates('date')
+    missing = np.full(len(data), np.nan)
+
+    def column(name):
+        return data[name].to_numpy(dtype=float) if name in data else missing
+
+    climate = np.column_stack([column(f"기후스트레스:{region}") for region in crime_data.REGIONS])
+    social = np.column_stack([column(f"사회스트레스:{region}") for region in crime_data.REGIONS])
+    return data['date'].dt.normalize().to_numpy(), climate, social, column('금융스트레스')
+
+
+def daily_scores(climate, social, financial):
+    # 지표 배열 -> 일별 총 점수 (0~3, int8). financial은 climate보다 지역 축 하나가 적다
+    flags = crime_data.exceeds_thresholds(climate, social, financial[..., None])
+    return (flags[0].astype(np.int8) + flags[1] + flags[2]).astype(np.int8)
+
+
+def fit_rate_model(dates, scores, df_crime):
+    # 지역 × 점수(0~3)별 하루 사건 발생률. 관측이 적은 점수는 지역 평균 발생률로 수축
+    region_index = {region: i for i, region in enumerate(crime_data.REGIONS)}
+    counts = np.zeros(scores.shape)
+    if df_crime is not None and not df_crime.empty:
+        day_index = pd.Index(dates)
+        rows = day_index.get_indexer(df_crime['date'].dt.normalize())
+        cols = df_crime['도단위'].map(crime_data.normalize_province).map(region_index)
+        valid = (rows >= 0) & cols.notna().to_numpy()
+        np.add.at(counts, (rows[valid], cols[valid].astype(int).to_numpy()), 1)
+    rates = np.zeros((len(crime_data.REGIONS), 4))
+    for r in range(len(crime_data.REGIONS)):
+        base = counts[:, r].sum() / max(len(dates), 1)
+        for score in range(4):
+            days = scores[:, r] == score
+            rates[r, score] = (counts[days, r].sum() + PRIOR_DAYS * base) / (days.sum() + PRIOR_DAYS)
+    return rates
+
+
+def poisson_quantile(u, lam):
+    # 균등 난수 u의 포아송 분위수 (역CDF). 기준/시나리오가 같은 u를 쓰면 λ 차이만 결과에 반영된다
+    pmf = np.exp(-lam)
+    cdf = pmf.copy()
+    counts = np.zeros(lam.shape, dtype=np.float32)
+    k = 0
+    while True:
+        below = u > cdf
+        if not below.any() or k > 1000:
+            return counts
+        counts += below
+        k += 1
+        pmf = pmf * lam / k
+        cdf = cdf + pmf
+
+
+def block_starts(dates, start, horizon):
+    # start와 같은 계절(연중 일자 ±SEASON_DAYS)에 시작하는 과거 구간 시작 위치 (없으면 모든 위치)
+    last = len(dates) - horizon
+    if last < 0:
+        raise ValueError(f"지표 이력이 {horizon}일보다 짧음")
+    positions = np.arange(last + 1)
+    day_of_year = pd.DatetimeIndex(dates[positions]).dayofyear.to_numpy()
+    distance = np.abs(day_of_year - pd.Timestamp(start).dayofyear)
+    seasonal = positions[np.minimum(distance, 365 - distance) <= SEASON_DAYS]
+    return seasonal if len(seasonal) else positions
+
+
+def multipliers(indicator, change, regions):
+    # 지표별 지역 배율 (R,) — 선택 지역에만 1 + change
+    factors = {name: np.ones(len(crime_data.REGIONS)) for name in INDICATORS}
+    mask = np.isin(crime_data.REGIONS, regions)
+    factors[indicator] = np.where(mask, 1 + change, 1.0)
+    return factors
+
+
+def simulate(df_indicator, df_crime, indicator, change, regions, horizon=90, trials=10_000,
+             uncertainty=0.5, start=None, seed=0):
+    # 반환: {'summary': 지역별 요약 DataFrame, 'scores'/'incidents': 시나리오 시행별 (trials, R) 배열, ...}
+    # change: 변화율 (0.1 = +10%), uncertainty: 시행·지역별 변화율의 상대 표준편차 (0.5 -> 10% ± 5%)
+    if indicator not in INDICATORS:
+        raise ValueError(f"지표는 {INDICATORS} 중 하나여야 합니다")
+    dates, climate, social, financial = indicator_arrays(df_indicator)
+    history_scores = daily_scores(climate, social, financial)
+    rates = fit_rate_model(dates, history_scores, df_crime)
+    start = pd.Timestamp(start) if start is not None else pd.Timestamp(dates[-1]) + pd.Timedelta(days=1)
+    starts = block_starts(dates, start, horizon)
+    factors = multipliers(indicator, change, regions)
+    region_axis = np.arange(len(crime_data.REGIONS))
+
+    rng = np.random.default_rng(seed)
+    n_regions = len(crime_data.REGIONS)
+    keys = ('scores', 'risk_days', 'expected', 'incidents')
+    results = {name: {key: np.empty((trials, n_regions), dtype=np.float32) for key in keys} for name in ('baseline', 'scenario')}
+    for first in range(0, trials, CHUNK_TRIALS):
+        n = min(CHUNK_TRIALS, trials - first)
+        window = rng.choice(starts, size=n)[:, None] + np.arange(horizon)  # (n, H)
+        noise = 1 + uncertainty * rng.standard_normal((n, n_regions))  # 변화율 불확실성 (시행·지역별)
+        uniform = rng.random((n, n_regions))
+        # 금융스트레스는 전국 단일 지표라 (n, H, 1)로 두고 지역 축은 브로드캐스트
+        values = {'기후스트레스': climate[window], '사회스트레스': social[window], '금융스트레스': financial[window][..., None]}
+        for name in ('baseline', 'scenario'):
+            if name == 'scenario':
+                scale = {key: 1 + (factor - 1) * noise for key, factor in factors.items()}  # (n, R)
+                values = {key: value * scale[key][:, None, :] for key, value in values.items()}
+            flags = crime_data.exceeds_thresholds(values['기후스트레스'], values['사회스트레스'], values['금융스트레스'])
+            scores = flags[0].astype(np.int8) + flags[1] + flags[2]
+            expected = rates[region_axis, scores].sum(axis=1)  # (n, R)
+            out = results[name]
+            out['scores'][first:first + n] = scores.mean(axis=1)
+            out['risk_days'][first:first + n] = (scores == 3).sum(axis=1)
+            out['expected'][first:first + n] = expected
+            out['incidents'][first:first + n] = poisson_quantile(uniform, expected)
+
+    return {
+        'summary': summarize(results),
+        'scores': results['scenario']['scores'],
+        'incidents': results['scenario']['incidents'],
+        'baseline_incidents': results['baseline']['incidents'],
+        'start': start,
+        'horizon': horizon,
+        'trials': trials,
+    }
+
+
+def summarize(results):
+    baseline, scenario = results['baseline'], results['scenario']
+    low, mid, high = QUANTILES
+    return pd.DataFrame({
+        'region': crime_data.REGIONS,
+        'baseline_score': baseline['scores'].mean(axis=0),
+        'scenario_score': scenario['scores'].mean(axis=0),
+        'score_p05': np.quantile(scenario['scores'], low, axis=0),
+        'score_p95': np.quantile(scenario['scores'], high, axis=0),
+        'baseline_risk_days': baseline['risk_days'].mean(axis=0),
+        'scenario_risk_days': scenario['risk_days'].mean(axis=0),
+        'baseline_incidents': baseline['expected'].mean(axis=0),
+        'scenario_incidents': scenario['expected'].mean(axis=0),
+        'incidents_p05': np.quantile(scenario['incidents'], low, axis=0),
+        'incidents_p50': np.quantile(scenario['incidents'], mid, axis=0),
+        'incidents_p95': np.quantile(scenario['incidents'], high, axis=0),
+        'prob_more_incidents': (scenario['incidents'] > baseline['incidents']).mean(axis=0),
+    })
+
+
+def resolve_regions(names):
+    # 지역 이름 또는 묶음 이름(경상도 등) -> 지역 목록
+    regions = []
+    for name in names:
+        for region in REGION_GROUPS.get(name, [name]):
+            if region not in crime_data.REGIONS:
+                raise ValueError(f"알 수 없는 지역: {region}")
+            if region not in regions:
+                regions.append(region)
+    return regions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="지표 변화 시나리오의 지역별 위험 점수/사건 수 분포 (몬테카를로)")
+    parser.add_argument('--indicator', choices=INDICATORS, default='사회스트레스')
+    parser.add_argument('--change', type=float, default=10, help="변화율 (%%)")
+    parser.add_argument('--regions', nargs='+', default=['경상도'], help="지역 또는 묶음 (" + ", ".join(REGION_GROUPS) + ")")
+    parser.add_argument('--horizon', type=int, default=90, help="기간 (일)")
+    parser.add_argument('--trials', type=int, default=10_000)
+    parser.add_argument('--uncertainty', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    df_indicator = crime_data.read_indicator(crime_data.INDICATOR_PATH)
+    df_crime = crime_data.read_crime(crime_data.CRIME_PATH)
+    loaded = time.perf_counter()
+    result = simulate(df_indicator, df_crime, args.indicator, args.change / 100, resolve_regions(args.regions),
+                      args.horizon, args.trials, args.uncertainty, seed=args.seed)
+    finished = time.perf_counter()
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(result['summary'].round(3).to_string(index=False))
+    print(f"{result['trials']}회 × {result['horizon']}일 (시작 {result['start']:%Y-%m-%d}): "
+          f"로드 {loaded - started:.2f}초, 시뮬레이션 {finished - loaded:.2f}초")
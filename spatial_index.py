@@ -0,0 +1,93 @@
+import numpy as np
+
+# 위도/경도 고정 격자 인덱스 (로드 시 한 번 구축)
+# 점을 (행, 열) 격자 코드로 정렬해 두면 한 격자 행의 열 구간이 연속 구간이 되므로
+# 사각형 질의는 격자 행마다 슬라이스 하나 + 경계 격자 정밀 필터로 끝난다.
+# 반경 검색은 반경을 감싸는 사각형 후보에 하버사인 거리를 계산해 거른다 (여러 중심점을 한 번에).
+CELL_DEG = 0.05  # 약 5km
+VIEWPORT_MARGIN = 0.25  # 화면 범위 사방으로 폭/높이의 25%씩 여유
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = np.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _expand_ranges(lo, hi):
+    # 구간 [lo, hi)들을 이어 붙인 정수 배열 (파이썬 반복 없이)
+    lengths = np.maximum(hi - lo, 0)
+    offsets = np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+def pad_bounds(bounds, margin=VIEWPORT_MARGIN):
+    # [[south, west], [north, east]] -> 여유를 더한 (south, west, north, east)
+    (south, west), (north, east) = bounds
+    lat_pad, lon_pad = (north - south) * margin, (east - west) * margin
+    return south - lat_pad, west - lon_pad, north + lat_pad, east + lon_pad
+
+
+class GridIndex:
+    def __init__(self, lat, lon, cell_deg=CELL_DEG):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        rows = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        self.cell_deg = cell_deg
+        self.size = len(lat)
+        if len(rows) == 0:
+            self.n_rows = self.n_cols = 0
+            self.lat0 = self.lon0 = 0.0
+            self.rows, self.lat, self.lon = rows, lat[rows], lon[rows]
+            self.starts = np.zeros(1, dtype=np.int64)
+            return
+        self.lat0, self.lon0 = lat[rows].min(), lon[rows].min()
+        cell_row = ((lat[rows] - self.lat0) // cell_deg).astype(np.int64)
+        cell_col = ((lon[rows] - self.lon0) // cell_deg).astype(np.int64)
+        self.n_rows, self.n_cols = int(cell_row.max()) + 1, int(cell_col.max()) + 1
+        codes = cell_row * self.n_cols + cell_col
+        order = np.argsort(codes, kind='stable')
+        self.rows = rows[order]
+        self.lat, self.lon = lat[self.rows], lon[self.rows]
+        self.starts = np.searchsorted(codes[order], np.arange(self.n_rows * self.n_cols + 1))
+
+    def _cell_range(self, low, high, origin, count):
+        first = np.floor((np.asarray(low) - origin) / self.cell_deg).astype(np.int64)
+        last = np.floor((np.asarray(high) - origin) / self.cell_deg).astype(np.int64)
+        return np.maximum(first, 0), np.minimum(last, count - 1)
+
+    def candidates(self, south, west, north, east):
+        # 사각형(들)과 겹치는 격자의 점 -> (사각형 번호, 정렬 배열 위치), 정밀 필터 전
+        south, west, north, east = (np.atleast_1d(np.asarray(v, dtype=float)) for v in (south, west, north, east))
+        empty = np.empty(0, dtype=np.int64)
+        if self.n_rows == 0:
+            return empty, empty
+        row_first, row_last = self._cell_range(south, north, self.lat0, self.n_rows)
+        col_first, col_last = self._cell_range(west, east, self.lon0, self.n_cols)
+        row_counts = np.where(col_first <= col_last, np.maximum(row_last - row_first + 1, 0), 0)
+        # (사각형, 격자 행) 쌍마다 열 구간 하나가 정렬 배열의 연속 구간
+        box = np.repeat(np.arange(len(south)), row_counts)
+        cell_rows = (row_first[box] + _expand_ranges(np.zeros_like(row_counts), row_counts)) * self.n_cols
+        lo, hi = self.starts[cell_rows + col_first[box]], self.starts[cell_rows + col_last[box] + 1]
+        return np.repeat(box, hi - lo), _expand_ranges(lo, hi)
+
+    def query_box(self, south, west, north, east):
+        # 사각형 안 점의 원래 행 위치 (오름차순)
+        _, found = self.candidates(south, west, north, east)
+        inside = ((self.lat[found] >= south) & (self.lat[found] <= north)
+                  & (self.lon[found] >= west) & (self.lon[found] <= east))
+        return np.sort(self.rows[found[inside]])
+
+    def query_radius(self, lat, lon, radius_km):
+        # 중심점(들)에서 radius_km 안의 점 -> (질의 번호, 원래 행 위치, 거리 km), 질의별 거리 오름차순
+        lat, lon = np.atleast_1d(np.asarray(lat, dtype=float)), np.atleast_1d(np.asarray(lon, dtype=float))
+        lat_pad = radius_km / KM_PER_DEG_LAT
+        lon_pad = radius_km / (KM_PER_DEG_LAT * np.maximum(np.cos(np.radians(np.minimum(np.abs(lat) + lat_pad, 89.9))), 1e-6))
+        query, found = self.candidates(lat - lat_pad, lon - lon_pad, lat + lat_pad, lon + lon_pad)
+        distance = haversine_km(lat[query], lon[query], self.lat[found], self.lon[found])
+        inside = distance <= radius_km
+        query, rows, distance = query[inside], self.rows[found[inside]], distance[inside]
+        order = np.lexsort((rows, distance, query))
+        return query[order], rows[order], distance[order]
@@ -0,0 +1,391 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import crime_data
+import geometry
+import markers
+
+# Streamlit 없이 정적 파일 서버로 올릴 수 있는 단일 HTML 내보내기
+# 날짜별 위험 점수(지표 3개 초과 여부 비트), 년도별 지도 점수, 예측 일별 값/년도 평균, 사건 배열(일 번호, 좌표 정수),
+# 도 경계를 JSON 하나로 묶어 HTML에 넣고 보기 유형/년도/날짜 필터와 지도·표 갱신은 브라우저에서 한다.
+DEFAULT_OUTPUT = "./site/index.html"
+COORD_SCALE = 10 ** markers.COORD_PRECISION
+PROBABILITY_SCALE = 1000
+COUNT_END = pd.Timestamp('2023-12-31')  # 전체 데이터 보기의 건수 기준 (real.py count_period와 동일)
+EPOCH = pd.Timestamp('1970-01-01')
+LEAFLET_CSS = "https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css"
+LEAFLET_JS = "https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"
+CLUSTER_CSS = ["https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.css",
+               "https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.Default.css"]
+CLUSTER_JS = "https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/leaflet.markercluster.js"
+
+
+def day_numbers(dates):
+    # 날짜 -> 1970-01-01 기준 일 번호 (JSON에 문자열 대신 정수로)
+    return ((pd.DatetimeIndex(dates).normalize() - EPOCH).days).astype(int).tolist()
+
+
+def indicator_payload(df_indicator):
+    # 날짜별 비트(기후 1, 사회 2, 금융 4)를 지역 순서대로 이은 문자열 + 전체/년도별 지도 점수
+    data = df_indicator.sort_values('date', kind='stable')
+    missing = pd.Series(np.nan, index=data.index)
+    bits = []
+    for region in crime_data.REGIONS:
+        climate, social, financial = crime_data.exceeds_thresholds(
+            data.get(f"기후스트레스:{region}", missing), data.get(f"사회스트레스:{region}", missing), data.get('금융스트레스', missing))
+        bits.append(climate.astype(int).to_numpy() + 2 * social.astype(int).to_numpy() + 4 * financial.astype(int).to_numpy())
+    # 전체/년도별 지도 점수는 real.py 지도와 같은 crime_data.region_scores로
+    periods = {'all': data}
+    periods.update({str(year): group for year, group in data.groupby(data['date'].dt.year)})
+    map_scores = {key: list(crime_data.region_scores(group).values()) for key, group in periods.items()}
+    digits = np.column_stack(bits) if bits else np.zeros((len(data), 0), dtype=int)
+    return {
+        'days': day_numbers(data['date']),
+        'flags': ''.join(''.join(map(str, row)) for row in digits),
+        'mapScores': map_scores,
+    }
+
+
+def prediction_payload(df_prediction):
+    # 일별: 날짜 × 지역 확률(×1000 정수, 없으면 -1), 년도별: 지역 평균
+    data = df_prediction.assign(day=df_prediction['date'].dt.normalize())
+    daily = data.pivot_table(index='day', columns='도단위', values='crime_probability', aggfunc='first')
+    daily = daily.reindex(columns=crime_data.REGIONS)
+    values = np.where(daily.notna(), np.rint(daily.to_numpy(dtype=float) * PROBABILITY_SCALE), -1).astype(int)
+    yearly = {}
+    for year, group in data.groupby(data['date'].dt.year):
+        means = group.groupby('도단위')['crime_probability'].mean().reindex(crime_data.REGIONS)
+        yearly[str(year)] = [round(float(value), 4) if pd.notna(value) else None for value in means]
+    return {'days': day_numbers(daily.index), 'values': values.ravel().tolist(), 'yearly': yearly}
+
+
+def crime_payload(df_crime):
+    # 사건별 일 번호, 정수 좌표, 도단위 번호(-1: 미상), 주소 번호 (주소 문자열은 한 번만)
+    data = df_crime.dropna(subset=['위도', '경도']).sort_values('date', kind='stable')
+    region_index = {region: i for i, region in enumerate(crime_data.REGIONS)}
+    addresses, address_codes = np.unique(data['full_address'].astype(str).to_numpy(), return_inverse=True)
+    provinces = data['도단위'].map(crime_data.normalize_province).map(region_index) if '도단위' in data else None
+    return {
+        'days': day_numbers(data['date']),
+        'lat': np.rint(data['위도'].to_numpy() * COORD_SCALE).astype(int).tolist(),
+        'lon': np.rint(data['경도'].to_numpy() * COORD_SCALE).astype(int).tolist(),
+        'region': provinces.fillna(-1).astype(int).tolist() if provinces is not None else [-1] * len(data),
+        'address': address_codes.astype(int).tolist(),
+        'addresses': addresses.tolist(),
+        'coordScale': COORD_SCALE,
+    }
+
+
+def build_bundle(df_crime, df_indicator, df_prediction, geo_data):
+    return {
+        'generated': time.strftime('%Y-%m-%d %H:%M'),
+        'regions': crime_data.REGIONS,
+        'regionMapping': crime_data.REGION_MAPPING,
+        'countEnd': day_numbers([COUNT_END])[0],
+        'probabilityScale': PROBABILITY_SCALE,
+        'geo': geo_data,
+        'indicator': indicator_payload(df_indicator),
+        'prediction': prediction_payload(df_prediction),
+        'crime': crime_payload(df_crime),
+    }
+
+
+def render_html(bundle):
+    payload = json.dumps(bundle, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    head = ''.join(f'<link rel="stylesheet" href="{href}">' for href in [LEAFLET_CSS] + CLUSTER_CSS)
+    head += f'<script src="{LEAFLET_JS}"></script><script src="{CLUSTER_JS}"></script>'
+    return (PAGE_TEMPLATE.replace('__HEAD__', head)
+            .replace('__CLUSTER_ICON__', markers.WEIGHTED_CLUSTER_JS.strip())
+            .replace('__BUNDLE__', payload))
+
+
+def export_site(output=DEFAULT_OUTPUT, crime_path=None, indicator_path=None, prediction_path=None, geojson_path=None):
+    # 반환: 기록한 바이트 수
+    df_crime = crime_data.read_crime(crime_path)
+    df_indicator = crime_data.read_indicator(indicator_path)
+    df_prediction = crime_data.read_prediction(prediction_path)
+    if geojson_path:
+        with open(geojson_path, encoding='utf-8') as f:
+            geo_data = geometry.compact_geojson(json.load(f))
+    else:
+        geo_data = geometry.load_province_geojson()
+    html = render_html(build_bundle(df_crime, df_indicator, df_prediction, geo_data)).encode('utf-8')
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'wb') as f:
+        f.write(html)
+    return len(html)
+
+
+PAGE_TEMPLATE = r"""<!DOCTYPE html>
+<html lang="ko">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>이상동기 범죄 경보 맵</title>
+__HEAD__
+<style>
+  body { margin: 0; font-family: sans-serif; display: flex; height: 100vh; }
+  #sidebar { width: 260px; padding: 16px; background: #f0f2f6; overflow-y: auto; box-sizing: border-box; }
+  #sidebar label { display: block; margin-top: 12px; font-size: 14px; }
+  #sidebar select { width: 100%; margin-top: 4px; }
+  #main { flex: 1; padding: 16px; overflow-y: auto; box-sizing: border-box; }
+  #map-row { display: flex; gap: 12px; }
+  #map { flex: 1; height: 600px; }
+  #legend { width: 220px; background: white; padding: 10px; border: 2px solid grey; font-size: 13px; align-self: flex-start; }
+  #legend p { margin: 4px 0; }
+  table { border-collapse: collapse; margin-top: 8px; font-size: 14px; }
+  th, td { border: 1px solid #ddd; padding: 4px 8px; text-align: right; }
+  th:first-child, td:first-child { text-align: left; }
+  .count-icon { border-radius: 50%; background: white; border: 2px solid; text-align: center; font-weight: bold; line-height: 24px; }
+  .hidden { display: none; }
+</style>
+</head>
+<body>
+<div id="sidebar">
+  <h3>🚨 대시보드</h3>
+  <label>보기 유형<select id="view"><option>전체 데이터</option><option>년도별</option><option>일별</option><option>예측</option></select></label>
+  <label id="year-field">년도<select id="year"></select></label>
+  <label id="mode-field">예측 모드<select id="mode"><option>년도별</option><option>일별</option></select></label>
+  <label id="date-field">날짜<select id="date"></select></label>
+  <label id="basis-field">코로플렛 기준<select id="basis"><option>위험 점수</option><option>범죄 건수</option></select></label>
+  <p id="generated" style="font-size: 12px; color: grey; margin-top: 24px;"></p>
+</div>
+<div id="main">
+  <h2>이상동기 범죄 경보 맵</h2>
+  <h4 id="title"></h4>
+  <div id="map-row"><div id="map"></div><div id="legend"></div></div>
+  <h4>지역별 위험 점수/예측 확률</h4>
+  <div id="table"></div>
+  <p id="count-total"></p>
+</div>
+<script id="bundle" type="application/json">__BUNDLE__</script>
+<script>
+const B = JSON.parse(document.getElementById('bundle').textContent);
+const R = B.regions, NR = R.length, DAY_MS = 86400000;
+const $ = (id) => document.getElementById(id);
+const iso = (day) => new Date(day * DAY_MS).toISOString().slice(0, 10);
+const yearOf = (day) => new Date(day * DAY_MS).getUTCFullYear();
+const unique = (values) => Array.from(new Set(values)).sort((a, b) => a - b);
+const crimeYears = unique(B.crime.days.map(yearOf)).filter((y) => y <= 2023);
+const predictionYears = unique(B.prediction.days.map(yearOf));
+const SCORE_COLORS = ['green', 'yellow', 'orange', 'red'];
+
+function predictionColor(p) {
+  if (p === null || p === undefined) return 'gray';
+  return p < 0.3 ? 'green' : p < 0.5 ? 'lime' : p < 0.7 ? 'yellow' : p < 0.85 ? 'orange' : 'red';
+}
+function countColor(count, max) {
+  if (!count) return 'green';
+  const ratio = count / Math.max(max, 1);
+  return ratio < 0.34 ? 'yellow' : ratio < 0.67 ? 'orange' : 'red';
+}
+function setOptions(select, values, label) {
+  const previous = select.value;
+  select.innerHTML = values.map((v) => `<option value="${v}">${label ? label(v) : v}</option>`).join('');
+  if (values.map(String).includes(previous)) select.value = previous;
+  else if (values.length) select.value = values[values.length - 1];
+}
+function show(id, visible) { $(id).classList.toggle('hidden', !visible); }
+
+const map = L.map('map').setView([36.5, 127.5], 7);
+L.tileLayer('https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png', {
+  attribution: '&copy; OpenStreetMap contributors &copy; CARTO', subdomains: 'abcd', maxZoom: 20
+}).addTo(map);
+const clusterIcon = __CLUSTER_ICON__;
+let crimeLayer = L.markerClusterGroup({iconCreateFunction: clusterIcon}).addTo(map);
+let riskLayer = L.geoJSON(null).addTo(map);
+L.control.layers(null, {'범죄 마커': crimeLayer, '위험 코로플렛': riskLayer}).addTo(map);
+
+function state() {
+  const view = $('view').value;
+  const year = Number($('year').value);
+  const mode = $('mode').value;
+  const date = $('date').value === '' ? null : Number($('date').value);
+  const daily = view === '일별' || (view === '예측' && mode === '일별');
+  return {view, year, mode, date: daily ? date : null, basis: $('basis').value};
+}
+
+function refreshControls() {
+  const view = $('view').value;
+  show('year-field', view !== '전체 데이터');
+  show('mode-field', view === '예측');
+  show('basis-field', view !== '예측');
+  if (view === '예측') setOptions($('year'), predictionYears);
+  else if (view !== '전체 데이터') setOptions($('year'), crimeYears);
+  const year = Number($('year').value);
+  let dates = [];
+  if (view === '일별') dates = unique(B.crime.days.filter((d) => yearOf(d) === year));
+  if (view === '예측' && $('mode').value === '일별') dates = B.prediction.days.filter((d) => yearOf(d) === year);
+  show('date-field', dates.length > 0);
+  setOptions($('date'), dates, iso);
+}
+
+function crimeIndices(s) {
+  // 보기에 해당하는 사건 번호 (markers) 와 건수 기준 사건 번호 (counts)
+  const all = B.crime.days.map((_, i) => i);
+  if (s.view === '예측') return {markers: [], counts: []};
+  if (s.view === '전체 데이터') return {markers: all, counts: all.filter((i) => B.crime.days[i] <= B.countEnd)};
+  const match = s.view === '년도별' ? (i) => yearOf(B.crime.days[i]) === s.year : (i) => B.crime.days[i] === s.date;
+  const selected = all.filter(match);
+  return {markers: selected, counts: selected};
+}
+
+function indicatorRows(s) {
+  const days = B.indicator.days;
+  const rows = days.map((_, i) => i);
+  if (s.view === '년도별') return rows.filter((i) => yearOf(days[i]) === s.year);
+  if (s.view === '일별') { const i = days.indexOf(s.date); return i < 0 ? [] : [i]; }
+  return rows;
+}
+const flag = (row, r) => Number(B.indicator.flags[row * NR + r]);
+
+function regionValues(s) {
+  if (s.view === '예측') {
+    if (s.date !== null) {
+      const row = B.prediction.days.indexOf(s.date);
+      return R.map((_, r) => { const v = row < 0 ? -1 : B.prediction.values[row * NR + r]; return v < 0 ? null : v / B.probabilityScale; });
+    }
+    return B.prediction.yearly[String(s.year)] || R.map(() => null);
+  }
+  if (s.view === '일별') {
+    const rows = indicatorRows(s);
+    return R.map((_, r) => { if (!rows.length) return 0; const f = flag(rows[0], r); return Math.min((f & 1) + ((f >> 1) & 1) + ((f >> 2) & 1), 3); });
+  }
+  const key = s.view === '년도별' ? String(s.year) : 'all';
+  return B.indicator.mapScores[key] || R.map(() => 0);
+}
+
+function collapse(indices) {
+  // 같은 좌표의 사건을 하나로 (건수, 날짜 목록, 대표 주소), 건수 많은 순
+  const groups = new Map();
+  for (const i of indices) {
+    const key = B.crime.lat[i] + ',' + B.crime.lon[i];
+    if (!groups.has(key)) groups.set(key, {lat: B.crime.lat[i] / B.crime.coordScale, lon: B.crime.lon[i] / B.crime.coordScale,
+                                             dates: [], address: B.crime.addresses[B.crime.address[i]]});
+    groups.get(key).dates.push(iso(B.crime.days[i]));
+  }
+  return Array.from(groups.values()).sort((a, b) => b.dates.length - a.dates.length);
+}
+
+function drawMarkers(indices) {
+  crimeLayer.clearLayers();
+  const color = indices.length < 100 ? 'green' : indices.length < 500 ? 'orange' : 'red';
+  const points = collapse(indices).slice(0, 2000);
+  crimeLayer.addLayers(points.map((p) => {
+    const count = p.dates.length, dates = p.dates.slice().sort(), shown = dates.slice(0, 10);
+    const more = count > shown.length ? `<br>외 ${count - shown.length}건` : '';
+    const popup = count === 1 ? `날짜: ${shown[0]}<br>지역: ${p.address}`
+                              : `지역: ${p.address}<br>사건 ${count}건<br>날짜: ${shown.join(', ')}${more}`;
+    const icon = L.divIcon({className: '', iconSize: [28, 28],
+                            html: `<div class="count-icon" style="border-color:${color};color:${color}">${count}</div>`});
+    return L.marker([p.lat, p.lon], {icon: icon, weight: count}).bindPopup(popup);
+  }));
+  return points;
+}
+
+function drawChoropleth(s, values, counts) {
+  const maxCount = Math.max(0, ...counts);
+  const useCounts = s.view !== '예측' && s.basis === '범죄 건수';
+  map.removeLayer(riskLayer);
+  riskLayer = L.geoJSON(B.geo, {
+    style: (feature) => {
+      const r = R.indexOf(B.regionMapping[feature.properties.NAME_1] || feature.properties.NAME_1);
+      const color = s.view === '예측' ? predictionColor(values[r]) : useCounts ? countColor(counts[r], maxCount) : (SCORE_COLORS[values[r]] || 'green');
+      return {fillColor: color, color: 'black', weight: 1, fillOpacity: 0.3};
+    },
+    onEachFeature: (feature, layer) => {
+      const r = R.indexOf(B.regionMapping[feature.properties.NAME_1] || feature.properties.NAME_1);
+      const value = s.view === '예측' ? `위험률: ${values[r] === null || values[r] === undefined ? '없음' : values[r].toFixed(3)}`
+                  : useCounts ? `범죄 건수: ${counts[r] || 0}` : `위험 점수: ${values[r] || 0}`;
+      layer.bindTooltip(`지역 ${feature.properties.NAME_1}<br>${value}`);
+    }
+  }).addTo(map);
+  return {useCounts, maxCount};
+}
+
+function drawLegend(s, scale) {
+  const item = (color, text) => `<p><span style="color:${color};">■</span> ${text}</p>`;
+  const risk = s.view === '예측'
+    ? item('green', '안전 (&lt;0.3)') + item('lime', '대비 (0.3~0.5)') + item('yellow', '주의 (0.5~0.7)') + item('orange', '경보 (0.7~0.85)') + item('red', '위험 (≥0.85)')
+    : scale.useCounts
+    ? item('green', '0건') + item('yellow', `최다 대비 &lt;34% (최다 ${scale.maxCount}건)`) + item('orange', '최다 대비 &lt;67%') + item('red', '최다 대비 ≥67%')
+    : item('green', '0점: 안전') + item('yellow', '1점: 주의') + item('orange', '2점: 경고') + item('red', '3점: 위험');
+  $('legend').innerHTML = `<p><strong>범례${s.view === '예측' ? ' (예측)' : ''}</strong></p><p><strong>위험 코로플렛</strong></p>${risk}`
+    + `<p><strong>범죄 마커</strong>${s.view === '예측' ? ': 표시되지 않음' : ''}</p>`
+    + item('green', '소수 (&lt;100건)') + item('orange', '보통 (&lt;500건)') + item('red', '다수 (≥500건)');
+}
+
+function drawTable(s, values, counts) {
+  let head, rows;
+  if (s.view === '예측') {
+    head = ['지역', '위험률'];
+    rows = R.map((region, r) => [region, values[r] === null || values[r] === undefined ? '데이터 없음' : values[r].toFixed(3)]);
+  } else {
+    // crime_data.create_risk_score_table과 같은 기간 평균 (일별은 그날 값)
+    const indicator = indicatorRows(s);
+    head = ['지역', '기후스트레스 점수', '사회스트레스 점수', '금융스트레스 점수', '총 점수', '범죄 건수'];
+    rows = R.map((region, r) => {
+      const sums = [0, 0, 0];
+      for (const row of indicator) { const f = flag(row, r); sums[0] += f & 1; sums[1] += (f >> 1) & 1; sums[2] += (f >> 2) & 1; }
+      const means = sums.map((v) => indicator.length ? v / indicator.length : 0);
+      const total = Math.min(means[0] + means[1] + means[2], 3);
+      return [region, ...means.map((v) => v.toFixed(2)), total.toFixed(2), counts[r]];
+    });
+  }
+  $('table').innerHTML = '<table><tr>' + head.map((h) => `<th>${h}</th>`).join('') + '</tr>'
+    + rows.map((row) => '<tr>' + row.map((v) => `<td>${v}</td>`).join('') + '</tr>').join('') + '</table>';
+}
+
+function render() {
+  const s = state();
+  const crime = crimeIndices(s);
+  const counts = R.map(() => 0);
+  for (const i of crime.counts) if (B.crime.region[i] >= 0) counts[B.crime.region[i]] += 1;
+  const values = regionValues(s);
+  const points = drawMarkers(crime.markers);
+  const scale = drawChoropleth(s, values, counts);
+  drawLegend(s, scale);
+  drawTable(s, values, counts);
+  const title = s.view === '전체 데이터' ? '전체 데이터 맵' : s.view === '예측'
+    ? (s.date !== null ? `${iso(s.date)} 예측 맵` : `${s.year}년 예측 맵`)
+    : s.view === '일별' && s.date !== null ? `${iso(s.date)} 맵` : `${s.year}년 맵`;
+  $('title').textContent = title + (crime.markers.length > 0 && points.length < collapse(crime.markers).length ? ' (상위 2000개 위치만 표시)' : '');
+  $('count-total').textContent = s.view === '예측' ? '예측 모드: crime_probability 기반 코로플렛 및 표 표시'
+    : `범죄 건수: ${counts.reduce((a, b) => a + b, 0)}`;
+  if (crime.markers.length) {
+    const lat = crime.markers.reduce((a, i) => a + B.crime.lat[i], 0) / crime.markers.length / B.crime.coordScale;
+    const lon = crime.markers.reduce((a, i) => a + B.crime.lon[i], 0) / crime.markers.length / B.crime.coordScale;
+    map.setView([lat, lon], 8);
+  } else {
+    map.setView([36.5, 127.5], 7);
+  }
+}
+
+for (const id of ['view', 'year', 'mode']) $(id).addEventListener('change', () => { refreshControls(); render(); });
+for (const id of ['date', 'basis']) $(id).addEventListener('change', render);
+$('generated').textContent = `생성: ${B.generated}`;
+refreshControls();
+render();
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="정적 단일 페이지(HTML 하나)로 대시보드 내보내기")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--crime-path', default=crime_data.CRIME_PATH)
+    parser.add_argument('--indicator-path', default=crime_data.INDICATOR_PATH)
+    parser.add_argument('--prediction-path', default=crime_data.PREDICTION_PATH)
+    parser.add_argument('--geojson', help="도 경계 GeoJSON (기본: 번들, 없으면 내려받기)")
+    args = parser.parse_args()
+
+    size = export_site(args.output, args.crime_path, args.indicator_path, args.prediction_path, args.geojson)
+    print(f"{args.output}: {size / 1024:.0f} KB")